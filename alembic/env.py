@@ -1,18 +1,18 @@
 import os
+import sys
 from logging.config import fileConfig
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 from alembic import context
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from config.settings import get_settings
 
 # this is the Alembic Config object
 config = context.config
 
-# Set the SQLAlchemy URL
-db_url = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+# Set the SQLAlchemy URL; Settings reads .env and builds it the same way the app does
+db_url = get_settings().DATABASE_URL
 config.set_main_option('sqlalchemy.url', db_url)
 
 # Interpret the config file for Python logging
@@ -20,8 +20,6 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 # Import your models
-import sys
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from src.storage.database import Base
 target_metadata = Base.metadata
 
@@ -0,0 +1,40 @@
+"""Add auction snapshots
+
+Revision ID: 5c1e9a7d2f43
+Revises: b3222a5ac9f4
+Create Date: 2026-10-18 09:12:31.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e9a7d2f43'
+down_revision: Union[str, None] = 'b3222a5ac9f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('auction_snapshots',
+    sa.Column('auction_id', sa.String(), nullable=False),
+    sa.Column('observed_at', sa.DateTime(), nullable=False),
+    sa.Column('current_bid', sa.Float(), nullable=True),
+    sa.Column('total_bids', sa.Integer(), nullable=True),
+    sa.Column('cost_per_unit', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('auction_id', 'observed_at'),
+    postgresql_partition_by='RANGE (observed_at)'
+    )
+    # BRIN stays tiny on append-only, time-ordered data; created on the parent
+    # so every daily partition inherits it
+    op.create_index('ix_auction_snapshots_observed_at', 'auction_snapshots', ['observed_at'], unique=False, postgresql_using='brin')
+    # Catch-all partition so inserts never fail before a daily partition exists
+    op.execute('CREATE TABLE auction_snapshots_default PARTITION OF auction_snapshots DEFAULT')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_auction_snapshots_observed_at', table_name='auction_snapshots')
+    op.drop_table('auction_snapshots')
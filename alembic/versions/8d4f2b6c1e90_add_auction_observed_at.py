@@ -0,0 +1,28 @@
+"""Add auction observed_at
+
+Revision ID: 8d4f2b6c1e90
+Revises: 5c1e9a7d2f43
+Create Date: 2026-10-18 14:03:52.117604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4f2b6c1e90'
+down_revision: Union[str, None] = '5c1e9a7d2f43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('auctions', sa.Column('observed_at', sa.DateTime(), nullable=True))
+    # Until now updated_at doubled as the observation time
+    op.execute('UPDATE auctions SET observed_at = updated_at')
+
+
+def downgrade() -> None:
+    op.drop_column('auctions', 'observed_at')
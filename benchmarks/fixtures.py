@@ -0,0 +1,79 @@
+# Synthetic B-Stock pages built from the prompts/ samples
+import random
+import re
+from pathlib import Path
+from typing import Optional
+
+PROMPTS_DIR = Path(__file__).resolve().parent.parent / "prompts"
+
+LISTING_FIXTURES = {
+    "amazon": "HTML amazon all-inventory.html",
+    "target": "HTML target all-inventory.html",
+}
+
+DETAIL_FIXTURES = {
+    "amazon": "HTML amazon auction detail.html",
+    "target": "HTML target auction detail.html",
+}
+
+_ITEM_RE = re.compile(r'<li id="auction-(\d+)">.*?</li>', re.S)
+
+
+def load_fixture(name: str) -> str:
+    return (PROMPTS_DIR / name).read_text(encoding="utf-8")
+
+
+def listing_item_template(marketplace: str) -> str:
+    """
+    The sample ``li`` element with its auction id replaced by ``{auction_id}``
+
+    Prices and bid counts are replaced by ``{current_bid}``, ``{cost_per_unit}``
+    and ``{total_bids}`` so generated items differ from one another.
+    """
+    html = load_fixture(LISTING_FIXTURES[marketplace])
+    match = _ITEM_RE.search(html)
+    item, auction_id = match.group(0), match.group(1)
+    item = item.replace("{", "{{").replace("}", "}}")
+    item = item.replace(auction_id, "{auction_id}")
+    item = re.sub(r'(class="current_bid".*?<strong>)\$[\d,.]+', r"\1${current_bid}", item, flags=re.S)
+    item = re.sub(r'(class="cost_per_unit".*?<strong>)\s*\$[\d,.]+\s*', r"\1${cost_per_unit}", item, flags=re.S)
+    item = re.sub(r'(id="bid_number\{auction_id\}">)\d+', r"\1{total_bids}", item)
+    return item
+
+
+def listing_page(marketplace: str, items: int, first_id: int = 100000,
+                 seed: Optional[int] = 0) -> str:
+    """
+    Build a listing page with ``items`` auctions in the sample markup
+
+    Args:
+        marketplace: "amazon" or "target"
+        items: Number of ``li[id^="auction-"]`` elements
+        first_id: Auction id of the first item; ids are consecutive
+        seed: Random seed for bid values (None for nondeterministic)
+    """
+    rng = random.Random(seed)
+    template = listing_item_template(marketplace)
+    parts = ['<ul class="products-grid products-grid--max-4-col">']
+    for offset in range(items):
+        bid = rng.randint(25, 20000)
+        parts.append(template.format(
+            auction_id=first_id + offset,
+            current_bid=f"{bid:,}",
+            cost_per_unit=f"{bid / rng.randint(50, 2000):.2f}",
+            total_bids=rng.randint(0, 60),
+        ))
+    parts.append("</ul>")
+    return "\n".join(parts)
+
+
+def detail_page(marketplace: str, auction_id: int, current_bid: Optional[float] = None,
+                total_bids: Optional[int] = None) -> str:
+    """Detail page sample re-targeted at ``auction_id`` with optional bid values"""
+    html = load_fixture(DETAIL_FIXTURES[marketplace])
+    html = re.sub(r"/view/id/\d+/", f"/view/id/{auction_id}/", html)
+    if current_bid is not None:
+        html = re.sub(r'(id="current_bid_amount">)\$[\d,.]+', rf"\g<1>${current_bid:,.0f}", html)
+    if total_bids is not None:
+        html = re.sub(r'(id="bid_number">)\d+', rf"\g<1>{total_bids}", html)
+    return html
@@ -0,0 +1,121 @@
+# Import-time benchmark
+"""
+Time how long a fresh interpreter takes to import each subsystem and list
+the heavy packages it pulls in. Parser pool workers and cron runs start
+cold, so this is their startup cost.
+
+Usage:
+    python -m benchmarks.imports
+    python -m benchmarks.imports --modules src.parsers.pool --repeat 10 --output bench_results/imports.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.parsers import git_commit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "src.models.auction",
+    "src.parsers.pool",
+    "src.storage.archive",
+    "src.storage.writer",
+    "src.storage.database",
+    "src.utils.http",
+    "src.core.scraper",
+    "config.settings",
+]
+
+HEAVY = ["aiohttp", "bs4", "lxml", "numpy", "pydantic", "sqlalchemy", "psycopg2", "pyarrow", "zstandard"]
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps([elapsed, [name for name in {heavy!r} if name in sys.modules]]))
+"""
+
+
+def parse_importtime(stderr: str, limit: int = 5) -> List[Dict]:
+    """Slowest imports by cumulative microseconds from ``-X importtime`` output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append({"module": name.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+    rows.sort(key=lambda row: row["cumulative_us"], reverse=True)
+    return rows[:limit]
+
+
+def bench_import(module: str, repeat: int) -> Dict:
+    """Import ``module`` in ``repeat`` fresh interpreters and keep the best time"""
+    timings = []
+    heavy: List[str] = []
+    slowest: List[Dict] = []
+    for i in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module, heavy=HEAVY)],
+            cwd=ROOT, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+        elapsed, heavy = json.loads(result.stdout.strip().splitlines()[-1])
+        timings.append(elapsed)
+        if i == 0:
+            slowest = parse_importtime(result.stderr)
+    return {
+        "benchmark": "import",
+        "module": module,
+        "best_ms": min(timings) * 1e3,
+        "heavy": heavy,
+        "slowest": slowest,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark cold import times")
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write JSON results to this path")
+    parser.add_argument("--max-ms", type=float, help="Exit non-zero if any import is slower than this")
+    args = parser.parse_args(argv)
+
+    results = []
+    for module in args.modules:
+        result = bench_import(module, args.repeat)
+        results.append(result)
+        print(f"{module:24} {result['best_ms']:8.1f} ms  loads: {', '.join(result['heavy']) or '-'}")
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({
+                "commit": git_commit(),
+                "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results,
+            }, f, indent=2)
+
+    if args.max_ms is not None:
+        slow = [r for r in results if r["best_ms"] > args.max_ms]
+        for result in slow:
+            print(f"{result['module']} took {result['best_ms']:.1f} ms (budget {args.max_ms:g} ms)")
+        return 1 if slow else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+# End-to-end load test against the local mock marketplace
+"""
+Drive the full scrape pipeline (login, listing sweep, detail fetches, sink)
+against benchmarks.mock_server and report throughput and latency.
+
+Usage:
+    python -m benchmarks.load_test --pages 50 --latency 0.05 --throttle-rate 0.02 --details
+    python -m benchmarks.load_test --url http://localhost:8080 --database
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_server import MockConfig, MockMarketplace, start_server
+from src.core.auth import BStockAuthenticator
+from src.core.concurrency import AdaptiveConcurrencyLimiter
+from src.core.rate_limiter import RateLimiter
+from src.core.scraper import Scraper, SweepStats
+from src.parsers.pool import PARSERS
+from src.utils.http import FetchResult, HTTPClient
+
+
+class CountingSink:
+    """Sink that only counts rows, for runs without a database"""
+
+    def __init__(self):
+        self.rows = 0
+
+    def add_many(self, auctions, observed_at=None) -> int:
+        self.rows += len(auctions)
+        return len(auctions)
+
+    def flush(self) -> int:
+        return 0
+
+
+class TimedHTTPClient(HTTPClient):
+    """HTTPClient recording end-to-end latency of every fetch"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies: List[float] = []
+        self.statuses: Dict[Optional[int], int] = {}
+
+    async def fetch(self, url: str, method: str = "GET", **kwargs) -> FetchResult:
+        result = await super().fetch(url, method, **kwargs)
+        self.latencies.append(result.elapsed)
+        self.statuses[result.status] = self.statuses.get(result.status, 0) + 1
+        return result
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_marketplace(base_url: str, marketplace: str, args, sink) -> Dict:
+    auth = BStockAuthenticator("load@test.local", "load-test", marketplace,
+                               base_url=f"{base_url}/{marketplace}")
+    await auth.create_session()
+    try:
+        await auth.login()
+        client = TimedHTTPClient(
+            session=auth.session,
+            before_request=auth.login,
+            marketplace=marketplace,
+            rate_limiter=RateLimiter(requests_per_minute=args.requests_per_minute),
+            concurrency=AdaptiveConcurrencyLimiter(initial=args.concurrency, max_limit=args.max_concurrency),
+            backoff_base=0.05,
+        )
+        scraper = Scraper(client, PARSERS[marketplace](), auth.base_url, sink=sink,
+                          page_window=args.page_window, fetch_shipping=args.shipping)
+        stats: SweepStats = await scraper.sweep(details=args.details)
+        return {
+            "marketplace": marketplace,
+            "pages": stats.pages,
+            "auctions": stats.auctions,
+            "details": stats.details,
+            "details_skipped": stats.details_skipped,
+            "failures": stats.failures,
+            "latencies": client.latencies,
+            "statuses": client.statuses,
+            "final_concurrency": client.concurrency.limit,
+        }
+    finally:
+        await auth.close()
+
+
+async def run(args) -> Dict:
+    runner = None
+    mock = None
+    base_url = args.url
+    if base_url is None:
+        mock = MockMarketplace(MockConfig(
+            pages=args.pages, items_per_page=args.items_per_page, latency=args.latency,
+            latency_jitter=args.latency_jitter, throttle_rate=args.throttle_rate, seed=0,
+        ))
+        runner, base_url = await start_server(mock)
+
+    if args.database:
+        from src.storage.writer import AsyncAuctionWriter
+        sink = AsyncAuctionWriter()
+        await sink.start()
+    else:
+        sink = CountingSink()
+
+    started = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(run_marketplace(base_url, m, args, sink) for m in args.marketplaces))
+        if isinstance(sink, CountingSink):
+            sink.flush()
+        else:
+            await sink.close()
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+    wall = time.perf_counter() - started
+
+    latencies = [latency for result in results for latency in result.pop("latencies")]
+    report = {
+        "wall_s": wall,
+        "fetches": len(latencies),
+        "fetches_per_s": len(latencies) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1e3,
+        "p99_ms": percentile(latencies, 99) * 1e3,
+        "mean_ms": statistics.fmean(latencies) * 1e3 if latencies else 0.0,
+        "rows_written": sink.rows if isinstance(sink, CountingSink) else sink.rows_written,
+        "marketplaces": results,
+    }
+    if mock is not None:
+        report["server_requests"] = mock.stats.requests
+        report["server_requests_per_s"] = mock.stats.requests / wall if wall else 0.0
+        report["server_throttled"] = mock.stats.throttled
+        report["server_logins"] = mock.stats.logins
+    return report
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Load test the scrape pipeline against a mock marketplace")
+    parser.add_argument("--url", help="Use an already running mock server instead of starting one")
+    parser.add_argument("--marketplaces", nargs="+", choices=sorted(PARSERS), default=sorted(PARSERS))
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--items-per-page", type=int, default=48)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--latency-jitter", type=float, default=0.02)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--details", action="store_true",
+                        help="Also fetch detail pages of auctions whose titles are not enough")
+    parser.add_argument("--shipping", action="store_true",
+                        help="With --details, fetch every detail page for shipping cost")
+    parser.add_argument("--page-window", type=int, default=4)
+    parser.add_argument("--requests-per-minute", type=int, default=60000)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--max-concurrency", type=int, default=50)
+    parser.add_argument("--database", action="store_true", help="Write rows with AuctionWriter")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    print(f"{report['fetches']} fetches in {report['wall_s']:.2f}s "
+          f"({report['fetches_per_s']:.1f}/s), p50 {report['p50_ms']:.1f} ms, "
+          f"p99 {report['p99_ms']:.1f} ms, {report['rows_written']} rows written")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# Local stand-in for the B-Stock marketplaces
+"""
+aiohttp application imitating the parts of B-Stock the scraper touches:
+the form_key login flow, paginated listing pages and auction detail pages,
+all rendered from the prompts/ samples.
+
+Usage:
+    python -m benchmarks.mock_server --port 8080 --pages 20 --latency 0.05 --throttle-rate 0.02
+"""
+import argparse
+import asyncio
+import os
+import random
+import secrets
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from aiohttp import web
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import detail_page, listing_page
+
+LOGIN_FORM = """<html><body>
+<form action="{action}" method="post">
+  <input name="form_key" type="hidden" value="{form_key}"/>
+  <input name="login[username]"/><input name="login[password]" type="password"/>
+</form>
+</body></html>"""
+
+
+# Routes of the login flow; throttling is only injected on the crawl routes
+LOGIN_ROUTES = {"login_form", "login_post", "account"}
+
+
+@dataclass
+class MockConfig:
+    """Knobs for the simulated marketplace"""
+    pages: int = 10
+    items_per_page: int = 48
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: int = 1
+    require_login: bool = True
+    # Answer requests without a session like B-Stock does, with a redirect to
+    # the login page, instead of a 403
+    redirect_to_login: bool = False
+    seed: Optional[int] = None
+
+
+@dataclass
+class MockStats:
+    """Server-side request counters"""
+    requests: int = 0
+    throttled: int = 0
+    logins: int = 0
+    by_route: Dict[str, int] = field(default_factory=dict)
+
+
+class MockMarketplace:
+    """Builds the aiohttp application and tracks what it served"""
+
+    MARKETPLACE_IDS = {"amazon": 1_000_000, "target": 2_000_000}
+
+    def __init__(self, config: Optional[MockConfig] = None):
+        self.config = config or MockConfig()
+        self.stats = MockStats()
+        self._rng = random.Random(self.config.seed)
+        self._form_keys: Dict[str, str] = {}
+        self._sessions = set()
+        self._pages: Dict[tuple, str] = {}
+
+    def first_id(self, marketplace: str, page: int) -> int:
+        return self.MARKETPLACE_IDS[marketplace] + (page - 1) * self.config.items_per_page
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.stats.requests += 1
+        route = request.match_info.route.name or "unknown"
+        self.stats.by_route[route] = self.stats.by_route.get(route, 0) + 1
+
+        config = self.config
+        if config.latency or config.latency_jitter:
+            await asyncio.sleep(config.latency + self._rng.uniform(0, config.latency_jitter))
+        if (config.throttle_rate and route not in LOGIN_ROUTES
+                and self._rng.random() < config.throttle_rate):
+            self.stats.throttled += 1
+            return web.Response(status=429, headers={"Retry-After": str(config.retry_after)})
+        return await handler(request)
+
+    def _check_session(self, request: web.Request) -> None:
+        if self.config.require_login and request.cookies.get("frontend") not in self._sessions:
+            if self.config.redirect_to_login:
+                marketplace = request.match_info["marketplace"]
+                raise web.HTTPFound(f"/{marketplace}/customer/account/login/")
+            raise web.HTTPForbidden(text="login required")
+
+    async def login_form(self, request: web.Request) -> web.Response:
+        marketplace = request.match_info["marketplace"]
+        form_key = secrets.token_hex(8)
+        self._form_keys[marketplace] = form_key
+        action = f"/{marketplace}/customer/account/loginPost/"
+        return web.Response(text=LOGIN_FORM.format(action=action, form_key=form_key),
+                            content_type="text/html")
+
+    async def login_post(self, request: web.Request) -> web.Response:
+        marketplace = request.match_info["marketplace"]
+        data = await request.post()
+        if (data.get("form_key") != self._form_keys.get(marketplace)
+                or not data.get("login[username]") or not data.get("login[password]")):
+            raise web.HTTPFound(f"/{marketplace}/customer/account/login/")
+
+        token = secrets.token_hex(16)
+        self._sessions.add(token)
+        self.stats.logins += 1
+        response = web.HTTPFound(f"/{marketplace}/customer/account/")
+        response.set_cookie("frontend", token, path="/")
+        raise response
+
+    async def account(self, request: web.Request) -> web.Response:
+        self._check_session(request)
+        return web.Response(text="<html><body>My Account</body></html>", content_type="text/html")
+
+    async def listing(self, request: web.Request) -> web.Response:
+        self._check_session(request)
+        marketplace = request.match_info["marketplace"]
+        page = int(request.query.get("p", "1"))
+        if page > self.config.pages:
+            items = 0
+        else:
+            items = self.config.items_per_page
+        key = (marketplace, page)
+        if key not in self._pages:
+            self._pages[key] = listing_page(marketplace, items, first_id=self.first_id(marketplace, page), seed=page)
+        return web.Response(text=self._pages[key], content_type="text/html")
+
+    async def detail(self, request: web.Request) -> web.Response:
+        self._check_session(request)
+        marketplace = request.match_info["marketplace"]
+        auction_id = int(request.match_info["auction_id"])
+        html = detail_page(marketplace, auction_id,
+                           current_bid=self._rng.randint(25, 20000), total_bids=self._rng.randint(0, 60))
+        return web.Response(text=html, content_type="text/html")
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        prefix = "/{marketplace:amazon|target}"
+        app.router.add_get(prefix + "/customer/account/login/", self.login_form, name="login_form")
+        app.router.add_post(prefix + "/customer/account/loginPost/", self.login_post, name="login_post")
+        app.router.add_get(prefix + "/customer/account/", self.account, name="account")
+        app.router.add_get(prefix + "/", self.listing, name="listing")
+        app.router.add_get(prefix + "/auction/auction/view/id/{auction_id:\\d+}/", self.detail, name="detail")
+        return app
+
+
+async def start_server(marketplace: MockMarketplace, host: str = "localhost", port: int = 0):
+    """
+    Start the mock marketplace in the running event loop
+
+    Returns:
+        (runner, base_url); call ``await runner.cleanup()`` to stop it
+    """
+    runner = web.AppRunner(marketplace.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}"
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Run a local B-Stock stand-in")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--items-per-page", type=int, default=48)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    config = MockConfig(pages=args.pages, items_per_page=args.items_per_page, latency=args.latency,
+                        latency_jitter=args.latency_jitter, throttle_rate=args.throttle_rate)
+    web.run_app(MockMarketplace(config).app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# Parser benchmarks over synthetic listing pages
+"""
+Time the marketplace parsers on listing pages synthesized from prompts/.
+
+Usage:
+    python -m benchmarks.parsers --items 100 1000 --output bench_results/parsers.json
+    python -m benchmarks.parsers --compare bench_results/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import listing_page
+from src.parsers.backends import BACKENDS
+from src.parsers.pool import PARSERS
+
+PRICE_SAMPLES = ["$2,202", " $2.26 ", "$19,051", "$0.09", "not a price"]
+DATETIME_SAMPLES = ["Sat Nov 2, 2024 5:06:00 PM", "Sun Nov 3, 2024 1:00:00 PM", "Sat, 02 Nov 2024 14:48:00 -0700"]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _timed_runs(func, repeat: int, setup=None) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def bench_listing(marketplace: str, backend: str, items: int, repeat: int) -> Dict:
+    """
+    Time parse_auction_list on one synthetic page and measure peak memory
+
+    Peak memory comes from tracemalloc, so it covers the Python heap only;
+    allocations made inside libxml2 by the lxml backend are not counted.
+    The title LRU is cleared before every measured run so each one extracts
+    every title, as a first sweep does, and stays comparable with baselines
+    recorded before titles were cached.
+    """
+    parser = PARSERS[marketplace](backend=backend)
+    html = listing_page(marketplace, items)
+    megabytes = len(html.encode("utf-8")) / 1e6
+
+    parsed = parser.parse_auction_list(html)  # warm selector caches
+    if len(parsed) != items:
+        raise RuntimeError(f"{backend} parsed {len(parsed)} of {items} {marketplace} items")
+
+    clear_titles = parser.title_extractor.clear
+    timings = _timed_runs(lambda: parser.parse_auction_list(html), repeat, setup=clear_titles)
+    clear_titles()
+    tracemalloc.start()
+    parser.parse_auction_list(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        "benchmark": "parse_auction_list",
+        "marketplace": marketplace,
+        "backend": backend,
+        "items": items,
+        "page_mb": round(megabytes, 4),
+        "best_s": best,
+        "median_s": statistics.median(timings),
+        "us_per_item": best / items * 1e6,
+        "ms_per_mb": best / megabytes * 1e3,
+        "peak_py_heap_mb": peak / 1e6,
+    }
+
+
+def bench_helper(name: str, samples: List[str], repeat: int, loops: int = 2000) -> Dict:
+    """Time a BaseParser helper per call"""
+    parser = PARSERS["amazon"](backend="bs4")
+    func = getattr(parser, name)
+
+    def run():
+        for _ in range(loops):
+            for sample in samples:
+                func(sample)
+
+    best = min(_timed_runs(run, repeat))
+    return {
+        "benchmark": name,
+        "calls": loops * len(samples),
+        "best_s": best,
+        "us_per_call": best / (loops * len(samples)) * 1e6,
+    }
+
+
+def run(items: List[int], backends: List[str], marketplaces: List[str], repeat: int) -> Dict:
+    results = []
+    for marketplace in marketplaces:
+        for backend in backends:
+            for count in items:
+                result = bench_listing(marketplace, backend, count, repeat)
+                results.append(result)
+                print(f"{marketplace:7} {backend:5} {count:6} items  "
+                      f"{result['us_per_item']:8.1f} us/item  {result['ms_per_mb']:8.1f} ms/MB  "
+                      f"peak {result['peak_py_heap_mb']:.1f} MB")
+    for name, samples in (("_parse_price", PRICE_SAMPLES), ("_parse_datetime", DATETIME_SAMPLES)):
+        result = bench_helper(name, samples, repeat)
+        results.append(result)
+        print(f"{name:22} {result['us_per_call']:8.2f} us/call")
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def _result_key(result: Dict) -> tuple:
+    return tuple(result.get(k) for k in ("benchmark", "marketplace", "backend", "items"))
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = 0.10) -> List[str]:
+    """
+    Report benchmarks slower than the baseline by more than ``threshold``
+
+    Returns:
+        Human-readable regression lines (empty if none)
+    """
+    previous = {_result_key(r): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get(_result_key(result))
+        if not before:
+            continue
+        change = result["best_s"] / before["best_s"] - 1
+        label = " ".join(str(k) for k in _result_key(result) if k is not None)
+        line = f"{label}: {change:+.1%} vs {baseline.get('commit') or 'baseline'}"
+        print(line)
+        if change > threshold:
+            regressions.append(line)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark B-Stock parsers")
+    parser.add_argument("--items", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--backends", nargs="+", choices=sorted(BACKENDS), default=sorted(BACKENDS))
+    parser.add_argument("--marketplaces", nargs="+", choices=sorted(PARSERS), default=sorted(PARSERS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write JSON results to this path")
+    parser.add_argument("--compare", help="Baseline JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    current = run(args.items, args.backends, args.marketplaces, args.repeat)
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(current, json.load(f), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
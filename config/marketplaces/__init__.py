@@ -1 +1,9 @@
- 
+# Supported marketplaces
+
+# Public site of each marketplace; Settings.base_urls() applies the configured overrides
+MARKETPLACE_URLS = {
+    "amazon": "https://bstock.com/amazon",
+    "target": "https://bstock.com/target",
+}
+
+MARKETPLACES = tuple(MARKETPLACE_URLS)
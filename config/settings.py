@@ -1,7 +1,9 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from functools import lru_cache
 
+from .marketplaces import MARKETPLACE_URLS
+
 class Settings(BaseSettings):
     # Database settings
     DB_HOST: str
@@ -10,18 +12,54 @@ class Settings(BaseSettings):
     DB_USER: str
     DB_PASSWORD: str
     DATABASE_URL: Optional[str] = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
 
     # B-Stock credentials
     BSTOCK_EMAIL: str
     BSTOCK_PASSWORD: str
+    # Extra accounts as a JSON list of [email, password] pairs; the crawl is sharded across all of them
+    BSTOCK_ACCOUNTS: List[Tuple[str, str]] = []
 
     # Scraping settings
     REQUESTS_PER_MINUTE: int = 60
     CONCURRENT_REQUESTS: int = 5
+    MIN_CONCURRENT_REQUESTS: int = 1
+    MAX_CONCURRENT_REQUESTS: int = 20
+
+    # HTTP cache settings
+    HTTP_CACHE_PATH: str = ".cache/http_cache.sqlite3"
+    HTTP_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # Parse-result cache; set PARSE_CACHE_PATH to share results across processes
+    PARSE_CACHE_ENTRIES: int = 2048
+    PARSE_CACHE_PATH: Optional[str] = None
+
+    # Metrics: /metrics is served on METRICS_PORT when set, on localhost unless METRICS_HOST says otherwise
+    METRICS_ENABLED: bool = False
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_PORT: Optional[int] = None
+    METRICS_SUMMARY_INTERVAL: float = 60.0
+
+    # Raw page archive, replayable with scripts/replay_archive.py
+    PAGE_ARCHIVE_DIR: str = "archive"
+
+    # Shipping estimates: quote address as "City, ST" and the learned rate tables
+    SHIPPING_DESTINATION: str = ""
+    SHIPPING_RATES_PATH: Optional[str] = ".cache/shipping_rates.json"
+
+    # Saved-search alerts: rules as a JSON list, alerts appended as JSON lines
+    ALERT_RULES_PATH: str = "alert_rules.json"
+    ALERT_LOG_PATH: str = "alerts.jsonl"
+    ALERT_STATE_PATH: Optional[str] = ".cache/alerts_sent.json"
+
+    # Persisted login cookies
+    SESSION_COOKIE_DIR: str = ".cache/sessions"
 
     # Base URLs
-    AMAZON_BASE_URL: str = "https://bstock.com/amazon"
-    TARGET_BASE_URL: str = "https://bstock.com/target"
+    AMAZON_BASE_URL: str = MARKETPLACE_URLS["amazon"]
+    TARGET_BASE_URL: str = MARKETPLACE_URLS["target"]
 
     class Config:
         env_file = ".env"
@@ -31,6 +69,19 @@ class Settings(BaseSettings):
         if not self.DATABASE_URL:
             self.DATABASE_URL = f"postgresql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    def credentials(self) -> List[Tuple[str, str]]:
+        """Every configured (email, password) pair, primary account first"""
+        accounts = [(self.BSTOCK_EMAIL, self.BSTOCK_PASSWORD)]
+        for email, password in self.BSTOCK_ACCOUNTS:
+            if email not in {e for e, _ in accounts}:
+                accounts.append((email, password))
+        return accounts
+
+    def base_urls(self) -> Dict[str, str]:
+        """Base URL of every supported marketplace, read from ``<MARKETPLACE>_BASE_URL``"""
+        return {marketplace: getattr(self, f"{marketplace.upper()}_BASE_URL", url)
+                for marketplace, url in MARKETPLACE_URLS.items()}
+
 @lru_cache()
 def get_settings() -> Settings:
     return Settings()
\ No newline at end of file
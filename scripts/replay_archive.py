@@ -0,0 +1,56 @@
+# Re-parse archived pages into the database
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import get_settings
+from src.core.replay import replay
+from src.parsers.pool import PARSERS, ParsePool
+from src.storage.archive import DETAIL, LISTING, PageArchive
+from src.storage.writer import AsyncAuctionWriter
+from src.utils.logging import setup_logging
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Re-run the parsers over the raw page archive and upsert the results")
+    parser.add_argument("--archive", help="Archive directory (defaults to PAGE_ARCHIVE_DIR)")
+    parser.add_argument("--marketplace", choices=sorted(PARSERS))
+    parser.add_argument("--kind", choices=[LISTING, DETAIL])
+    parser.add_argument("--since", type=datetime.fromisoformat,
+                        help="Only pages fetched at or after this ISO timestamp")
+    parser.add_argument("--until", type=datetime.fromisoformat,
+                        help="Only pages fetched before this ISO timestamp")
+    parser.add_argument("--workers", type=int, help="Parser processes (defaults to the CPU count)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per database flush")
+    return parser.parse_args(argv)
+
+
+async def run(args) -> None:
+    directory = args.archive or get_settings().PAGE_ARCHIVE_DIR
+    # Replayed rows are not new observations, so no history snapshots
+    writer = AsyncAuctionWriter(batch_size=args.batch_size, flush_interval=float("inf"), record_snapshots=False)
+    with PageArchive(directory) as archive:
+        async with ParsePool(max_workers=args.workers) as pool, writer:
+            stats = await replay(
+                archive, writer, parse_pool=pool,
+                marketplace=args.marketplace, kind=args.kind,
+                since=args.since.timestamp() if args.since else None,
+                until=args.until.timestamp() if args.until else None,
+                window=pool.max_pending,
+            )
+    print(f"Replayed {stats.pages} pages: {stats.auctions} auctions parsed, "
+          f"{writer.rows_written} rows changed, {stats.failures} failures")
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    setup_logging()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+# Multi-account sharding of the crawl frontier
+import asyncio
+import bisect
+import hashlib
+import time
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+from ..utils.http import FetchResult, HTTPClient, RequestError, fetch_concurrently
+from .auth import AuthenticationError, BStockAuthenticator, default_cookie_path
+from .concurrency import AdaptiveConcurrencyLimiter
+from .rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Statuses meaning the account itself, not the URL, is the problem
+LOGGED_OUT_STATUSES = (401, 403)
+THROTTLED_STATUSES = (429,)
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Consistent hash ring with virtual nodes
+
+    Each node is placed on the ring ``replicas`` times. Removing a node only
+    moves the keys it owned, spread evenly over the remaining nodes; every
+    other key keeps its owner.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 64):
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self._nodes: set = set()
+        for node in nodes:
+            self.add(node)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, node: str) -> bool:
+        return node in self._nodes
+
+    def add(self, node: str) -> None:
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        for i in range(self.replicas):
+            point = _hash(f"{node}#{i}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove(self, node: str) -> None:
+        if node not in self._nodes:
+            return
+        self._nodes.discard(node)
+        keep = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+        self._points = [p for p, _ in keep]
+        self._owners = [o for _, o in keep]
+
+    def nodes_for(self, key: str) -> List[str]:
+        """Distinct nodes in ring order starting at the key's owner"""
+        if not self._points:
+            return []
+        start = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        found: List[str] = []
+        for i in range(len(self._points)):
+            owner = self._owners[(start + i) % len(self._points)]
+            if owner not in found:
+                found.append(owner)
+                if len(found) == len(self._nodes):
+                    break
+        return found
+
+    def node_for(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+
+class Account:
+    """One set of credentials with its own session, rate-limit bucket and concurrency budget"""
+
+    def __init__(self, auth: BStockAuthenticator, rate_limiter: RateLimiter,
+                 concurrency: AdaptiveConcurrencyLimiter, **client_kwargs):
+        self.auth = auth
+        self.name = auth.email
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.client_kwargs = client_kwargs
+        self._client: Optional[HTTPClient] = None
+
+    async def get_client(self) -> HTTPClient:
+        """Fetch engine bound to this account's session and limits, created on first use"""
+        if self._client is None:
+            if not self.auth.session or self.auth.session.closed:
+                await self.auth.create_session()
+            # Logged-out results come back to the pool, which fails over and logs in again
+            self._client = self.auth.http_client(
+                rate_limiter=self.rate_limiter, concurrency=self.concurrency, on_logged_out=None,
+                **self.client_kwargs
+            )
+        return self._client
+
+    def __repr__(self) -> str:
+        return f"Account({self.name!r}, {self.auth.marketplace!r})"
+
+
+class AccountPool:
+    """
+    Spreads crawl keys (auction IDs, listing pages) across accounts
+
+    Keys are consistently hashed onto the healthy accounts. An account that
+    is throttled is taken off the ring for a cooldown and one that gets
+    logged out is taken off until it logs in again; in both cases only its
+    keys move, and they move back once it returns. Each account paces
+    itself with its own buckets, so throughput grows with the number of
+    accounts.
+
+    ``fetch_many`` keys each URL by itself, so the pool can stand in for an
+    ``HTTPClient`` as a ``Scraper``'s client.
+    """
+
+    def __init__(self, accounts: Sequence[Account], replicas: int = 64,
+                 throttle_cooldown: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            accounts: Accounts for one marketplace
+            replicas: Virtual nodes per account on the hash ring
+            throttle_cooldown: Seconds a throttled account sits out when the
+                server gives no Retry-After
+            clock: Monotonic time source
+        """
+        if not accounts:
+            raise ValueError("AccountPool needs at least one account")
+        self.accounts: Dict[str, Account] = {a.name: a for a in accounts}
+        self.throttle_cooldown = throttle_cooldown
+        self._clock = clock
+        self._ring = HashRing(self.accounts, replicas=replicas)
+        self._benched: Dict[str, float] = {}
+        self._relogins: Dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def from_credentials(cls, credentials: Iterable[Tuple[str, str]], marketplace: str = "amazon",
+                         base_url: Optional[str] = None, cookie_dir: Optional[str] = None,
+                         requests_per_minute: int = 60, concurrency: int = 5,
+                         min_concurrency: int = 1, max_concurrency: int = 20,
+                         client_kwargs: Optional[dict] = None, **kwargs) -> "AccountPool":
+        """
+        Build one account per (email, password) pair, each with fresh limits
+
+        ``client_kwargs`` are passed to every account's ``HTTPClient``, e.g.
+        a shared ``cache``.
+        """
+        accounts = []
+        for email, password in credentials:
+            cookie_path = default_cookie_path(cookie_dir, email, marketplace) if cookie_dir else None
+            auth = BStockAuthenticator(email, password, marketplace, base_url=base_url,
+                                       cookie_path=cookie_path)
+            accounts.append(Account(
+                auth,
+                RateLimiter(requests_per_minute=requests_per_minute),
+                AdaptiveConcurrencyLimiter(initial=concurrency, min_limit=min_concurrency,
+                                           max_limit=max_concurrency),
+                **(client_kwargs or {}),
+            ))
+        return cls(accounts, **kwargs)
+
+    @classmethod
+    def from_settings(cls, marketplace: str, settings=None, **kwargs) -> "AccountPool":
+        if settings is None:
+            from config.settings import get_settings
+            settings = get_settings()
+        return cls.from_credentials(
+            settings.credentials(), marketplace,
+            base_url=settings.base_urls().get(marketplace),
+            cookie_dir=settings.SESSION_COOKIE_DIR,
+            requests_per_minute=settings.REQUESTS_PER_MINUTE,
+            concurrency=settings.CONCURRENT_REQUESTS,
+            min_concurrency=settings.MIN_CONCURRENT_REQUESTS,
+            max_concurrency=settings.MAX_CONCURRENT_REQUESTS,
+            **kwargs,
+        )
+
+    def __len__(self) -> int:
+        return len(self.accounts)
+
+    @property
+    def healthy(self) -> List[str]:
+        self._reinstate()
+        return [name for name in self.accounts if name in self._ring]
+
+    def _reinstate(self) -> None:
+        now = self._clock()
+        for name, until in list(self._benched.items()):
+            if until <= now:
+                del self._benched[name]
+                self._ring.add(name)
+                logger.info(f"Account {name} back in rotation")
+
+    def _candidates(self, key: str) -> List[Account]:
+        self._reinstate()
+        names = self._ring.nodes_for(key)
+        if not names:
+            # Everyone is out; fall back to whoever returns soonest
+            names = sorted(self._benched, key=self._benched.get)
+        return [self.accounts[name] for name in names]
+
+    def account_for(self, key: str) -> Account:
+        """Account currently responsible for a key"""
+        return self._candidates(key)[0]
+
+    def shard(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """Group keys by the account that owns them"""
+        shards: Dict[str, List[str]] = {}
+        for key in keys:
+            shards.setdefault(self.account_for(key).name, []).append(key)
+        return shards
+
+    def mark_throttled(self, account: Account, retry_after: Optional[float] = None) -> None:
+        """Take an account off the ring until its cooldown ends"""
+        cooldown = retry_after if retry_after is not None else self.throttle_cooldown
+        self._benched[account.name] = max(self._benched.get(account.name, 0.0), self._clock() + cooldown)
+        self._ring.remove(account.name)
+        logger.warning(f"Account {account.name} throttled; rebalancing for {cooldown:.0f}s")
+
+    def mark_logged_out(self, account: Account) -> None:
+        """Take an account off the ring and log it in again in the background"""
+        self._ring.remove(account.name)
+        self._benched.pop(account.name, None)
+        if account.name in self._relogins:
+            return
+        logger.warning(f"Account {account.name} logged out; rebalancing until it logs in again")
+        task = asyncio.create_task(self._relogin(account))
+        self._relogins[account.name] = task
+
+    async def _relogin(self, account: Account) -> None:
+        try:
+            await account.auth.login(force=True)
+        except AuthenticationError as e:
+            logger.error(f"Re-login for {account.name} failed: {str(e)}")
+            self.mark_throttled(account, self.throttle_cooldown)
+        else:
+            self._ring.add(account.name)
+            logger.info(f"Account {account.name} logged in again")
+        finally:
+            self._relogins.pop(account.name, None)
+
+    async def fetch(self, key: str, url: str, **kwargs) -> FetchResult:
+        """
+        Fetch a URL with the account owning ``key``
+
+        If that account is throttled or logged out (a 401/403, or a redirect
+        to the login page), or its login fails, the request moves on to the
+        next account on the ring.
+        """
+        result: Optional[FetchResult] = None
+        for account in self._candidates(key):
+            try:
+                client = await account.get_client()
+                result = await client.fetch(url, **kwargs)
+            except AuthenticationError as e:
+                logger.error(f"Account {account.name} could not log in: {str(e)}")
+                self.mark_logged_out(account)
+                result = FetchResult(url=url, error=str(e))
+                continue
+            except RequestError as e:
+                result = FetchResult(url=url, error=str(e))
+                continue
+            if result.status in LOGGED_OUT_STATUSES or result.logged_out:
+                self.mark_logged_out(account)
+                continue
+            if result.status in THROTTLED_STATUSES:
+                self.mark_throttled(account, HTTPClient.parse_retry_after(result.headers.get("Retry-After")))
+                continue
+            return result
+        return result or FetchResult(url=url, error="No account available")
+
+    async def fetch_many(self, urls: Iterable[str], max_in_flight: Optional[int] = None,
+                         **kwargs) -> AsyncIterator[FetchResult]:
+        """
+        Fetch many URLs across the accounts, yielding results as they complete
+
+        Args:
+            urls: URLs to fetch, each keyed by itself
+            max_in_flight: Number of worker tasks (defaults to the accounts'
+                combined concurrency maximum)
+            **kwargs: Passed through to ``fetch``
+        """
+        if max_in_flight is None:
+            max_in_flight = sum(a.concurrency.max_limit for a in self.accounts.values())
+        results = fetch_concurrently(lambda url: self.fetch(url, url, **kwargs), urls, max_in_flight)
+        try:
+            async for result in results:
+                yield result
+        finally:
+            await results.aclose()
+
+    async def login_all(self) -> None:
+        """Log every account in; accounts that fail are benched"""
+        accounts = list(self.accounts.values())
+        outcomes = await asyncio.gather(*(a.auth.login() for a in accounts), return_exceptions=True)
+        for account, outcome in zip(accounts, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Login for {account.name} failed: {str(outcome)}")
+                self.mark_throttled(account)
+
+    async def close(self) -> None:
+        for task in list(self._relogins.values()):
+            task.cancel()
+        await asyncio.gather(*self._relogins.values(), return_exceptions=True)
+        for account in self.accounts.values():
+            await account.auth.close()
+
+    async def __aenter__(self):
+        await self.login_all()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
@@ -0,0 +1,367 @@
+# Saved-search alerts
+import bisect
+import inspect
+import json
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from ..models.auction import Auction
+from ..models.shipping import location_state
+from ..parsers.title import TitleExtractor
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lower-cased alphanumeric words, as used for keyword matching"""
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+@dataclass
+class AlertRule:
+    """
+    One saved search; unset criteria match everything
+
+    ``keywords`` must all appear in the title as whole words (a phrase
+    counts as all of its words). ``regions`` match either the state of the
+    auction's location ("NV") or the region at the end of its title
+    ("West Coast"); any one is enough.
+    """
+    name: str
+    marketplace: Optional[str] = None
+    condition: Optional[str] = None
+    max_cost_per_unit: Optional[float] = None
+    min_retail_value: Optional[float] = None
+    regions: Tuple[str, ...] = ()
+    keywords: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AlertRule":
+        data = dict(data)
+        data["regions"] = tuple(data.get("regions") or ())
+        data["keywords"] = tuple(data.get("keywords") or ())
+        return cls(**data)
+
+
+@dataclass
+class Alert:
+    """An auction that matched a rule"""
+    rule: str
+    auction_id: str
+    marketplace: str
+    title: str
+    current_bid: float
+    cost_per_unit: Optional[float]
+    retail_value: Optional[float]
+    location: Optional[str]
+    source_url: str
+    triggered_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat(timespec="seconds"))
+
+    @classmethod
+    def for_auction(cls, rule: AlertRule, auction: Auction) -> "Alert":
+        return cls(rule.name, auction.auction_id, auction.marketplace, auction.title, auction.current_bid,
+                   auction.cost_per_unit, auction.retail_value, auction.location, auction.source_url)
+
+
+def load_rules(path: str) -> List[AlertRule]:
+    """Saved searches from a JSON list of rule objects"""
+    with open(path) as f:
+        return [AlertRule.from_dict(rule) for rule in json.load(f)]
+
+
+class _Bucket:
+    """Rules keyed by an exact (case-insensitive) value, plus those that accept any"""
+
+    def __init__(self):
+        self.any = 0
+        self.by_value: Dict[str, int] = {}
+
+    def add(self, bit: int, values: Iterable[str]) -> None:
+        values = [v.lower() for v in values if v]
+        if not values:
+            self.any |= bit
+        for value in values:
+            self.by_value[value] = self.by_value.get(value, 0) | bit
+
+    def match(self, values: Iterable[Optional[str]]) -> int:
+        mask = self.any
+        for value in values:
+            if value:
+                mask |= self.by_value.get(value.lower(), 0)
+        return mask
+
+
+class _Threshold:
+    """
+    Rules with a numeric bound, sorted so one bisect finds every rule satisfied
+
+    ``upper`` bounds (``value <= bound``) are satisfied by a suffix of the
+    sorted bounds and lower bounds by a prefix; the masks of every suffix or
+    prefix are precomputed, so a lookup costs a bisect and an OR.
+    """
+
+    def __init__(self, upper: bool):
+        self.upper = upper
+        self.any = 0
+        self._pending: List[Tuple[float, int]] = []
+        self._bounds: List[float] = []
+        self._masks: List[int] = []
+
+    def add(self, bit: int, bound: Optional[float]) -> None:
+        if bound is None:
+            self.any |= bit
+        else:
+            self._pending.append((float(bound), bit))
+
+    def build(self) -> None:
+        entries = sorted(self._pending)
+        self._bounds = [bound for bound, _ in entries]
+        masks = [0] * (len(entries) + 1)
+        if self.upper:
+            for i in range(len(entries) - 1, -1, -1):
+                masks[i] = masks[i + 1] | entries[i][1]
+        else:
+            for i, (_, bit) in enumerate(entries):
+                masks[i + 1] = masks[i] | bit
+        self._masks = masks
+
+    def match(self, value: Optional[float]) -> int:
+        if value is None or value != value:
+            return self.any
+        if self.upper:
+            return self.any | self._masks[bisect.bisect_left(self._bounds, value)]
+        return self.any | self._masks[bisect.bisect_right(self._bounds, value)]
+
+
+class RuleIndex:
+    """
+    Saved searches compiled into indexes, so an auction is tested against
+    the few rules that can match it rather than every rule.
+
+    Each rule is one bit. Marketplace, condition and region are hash
+    buckets, the cost-per-unit and retail-value bounds are sorted
+    thresholds, and keywords are an inverted index from word to rules.
+    Matching an auction ANDs the masks from each index, cheapest first,
+    and stops as soon as no rule is left.
+
+    Keyword words also get a bit each, and every rule keeps the mask of
+    the words it requires; a title's words are looked up once, and a rule
+    matches when its required mask is covered by the title's.
+    """
+
+    def __init__(self, rules: Iterable[AlertRule]):
+        self.rules = list(rules)
+        self._marketplace = _Bucket()
+        self._condition = _Bucket()
+        self._region = _Bucket()
+        self._max_cost_per_unit = _Threshold(upper=True)
+        self._min_retail_value = _Threshold(upper=False)
+        self._no_keywords = 0
+        self._with_keywords = 0
+        # word -> rules needing it, word -> its own bit, rule position -> words it needs
+        self._keywords: Dict[str, int] = {}
+        self._word_bits: Dict[str, int] = {}
+        self._required: List[int] = []
+
+        for position, rule in enumerate(self.rules):
+            bit = 1 << position
+            self._marketplace.add(bit, [rule.marketplace] if rule.marketplace else [])
+            self._condition.add(bit, [rule.condition] if rule.condition else [])
+            self._region.add(bit, rule.regions)
+            self._max_cost_per_unit.add(bit, rule.max_cost_per_unit)
+            self._min_retail_value.add(bit, rule.min_retail_value)
+            words = sorted({word for keyword in rule.keywords for word in tokenize(keyword)})
+            if not words:
+                self._no_keywords |= bit
+            else:
+                self._with_keywords |= bit
+            required = 0
+            for word in words:
+                self._keywords[word] = self._keywords.get(word, 0) | bit
+                word_bit = self._word_bits.get(word)
+                if word_bit is None:
+                    word_bit = self._word_bits[word] = 1 << len(self._word_bits)
+                required |= word_bit
+            self._required.append(required)
+        self._max_cost_per_unit.build()
+        self._min_retail_value.build()
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def _keyword_mask(self, title: str, candidates: int) -> int:
+        """Rules among ``candidates`` whose keywords all appear in ``title``"""
+        candidates &= self._with_keywords
+        if not candidates:
+            return self._no_keywords
+        # Rules with at least one of the title's words, and the words present
+        touched = present = 0
+        for word in set(tokenize(title)):
+            rules = self._keywords.get(word)
+            if rules is not None:
+                touched |= rules
+                present |= self._word_bits[word]
+        candidates &= touched
+        matched = self._no_keywords
+        while candidates:
+            low = candidates & -candidates
+            if not self._required[low.bit_length() - 1] & ~present:
+                matched |= low
+            candidates ^= low
+        return matched
+
+    def match(self, auction: Auction, region: Optional[str] = None) -> List[AlertRule]:
+        """Rules the auction satisfies; ``region`` is the region read from its title"""
+        mask = self._marketplace.match([auction.marketplace])
+        if mask:
+            mask &= self._condition.match([auction.condition])
+        if mask:
+            mask &= self._max_cost_per_unit.match(auction.cost_per_unit)
+        if mask:
+            mask &= self._min_retail_value.match(auction.retail_value)
+        if mask:
+            mask &= self._region.match([location_state(auction.location), region])
+        if mask:
+            mask &= self._keyword_mask(auction.title, mask)
+        matched = []
+        while mask:
+            low = mask & -mask
+            matched.append(self.rules[low.bit_length() - 1])
+            mask ^= low
+        return matched
+
+
+class AlertSink(ABC):
+    """Delivers alerts; ``send`` may be a coroutine"""
+
+    @abstractmethod
+    def send(self, alerts: List[Alert]):
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class FileAlertSink(AlertSink):
+    """Appends alerts to a file as JSON lines; handy for testing rules"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+
+    def send(self, alerts: List[Alert]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            for alert in alerts:
+                f.write(json.dumps(asdict(alert)) + "\n")
+
+
+class AlertEngine:
+    """
+    Matches changed auctions against saved searches and sends each alert once.
+
+    Feed it the auctions a sweep reports as new or changed (``Scraper``
+    does this when given ``alerts=``). An auction alerts a rule at most once
+    per ``dedupe_window`` seconds however often it changes; with ``path``
+    set, the sent alerts survive restarts.
+    """
+
+    def __init__(self, rules: Iterable[AlertRule], sink: AlertSink,
+                 dedupe_window: float = 14 * 24 * 3600, path: Optional[str] = None,
+                 clock=time.time):
+        self.index = RuleIndex(rules)
+        self.sink = sink
+        self.dedupe_window = dedupe_window
+        self.path = path
+        self.clock = clock
+        self.titles = TitleExtractor()
+        self.alerts_sent = 0
+        # "rule\tauction_id" -> time the alert was sent
+        self._sent: Dict[str, float] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self._sent = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable alert state {path}: {str(e)}")
+
+    @classmethod
+    def from_settings(cls, settings) -> "AlertEngine":
+        rules = load_rules(settings.ALERT_RULES_PATH) if os.path.exists(settings.ALERT_RULES_PATH) else []
+        return cls(rules, FileAlertSink(settings.ALERT_LOG_PATH), path=settings.ALERT_STATE_PATH or None)
+
+    @staticmethod
+    def _key(alert: Alert) -> str:
+        return f"{alert.rule}\t{alert.auction_id}"
+
+    def match(self, auctions: Iterable[Auction]) -> List[Alert]:
+        """
+        Alerts for ``auctions`` not already sent within the dedupe window
+
+        Nothing is marked as sent here; ``record`` does that once the alerts
+        were delivered, so a failed send is retried on the next change.
+        """
+        now = self.clock()
+        alerts = []
+        matched = set()
+        for auction in auctions:
+            rules = self.index.match(auction, self.titles.extract(auction.title).region)
+            for rule in rules:
+                alert = Alert.for_auction(rule, auction)
+                key = self._key(alert)
+                sent = self._sent.get(key)
+                if key in matched or (sent is not None and now - sent < self.dedupe_window):
+                    continue
+                matched.add(key)
+                alerts.append(alert)
+        return alerts
+
+    def record(self, alerts: Iterable[Alert]) -> None:
+        """Mark alerts as sent, starting their dedupe window"""
+        now = self.clock()
+        for alert in alerts:
+            self._sent[self._key(alert)] = now
+
+    async def process(self, auctions: Iterable[Auction]) -> List[Alert]:
+        """Match auctions and deliver the new alerts; raises if the sink fails"""
+        if not len(self.index):
+            return []
+        alerts = self.match(auctions)
+        if alerts:
+            result = self.sink.send(alerts)
+            if inspect.isawaitable(result):
+                await result
+            self.record(alerts)
+            self.alerts_sent += len(alerts)
+            logger.info(f"Sent {len(alerts)} auction alerts")
+        return alerts
+
+    def prune(self) -> None:
+        """Forget sent alerts older than the dedupe window"""
+        cutoff = self.clock() - self.dedupe_window
+        self._sent = {key: sent for key, sent in self._sent.items() if sent >= cutoff}
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        self.prune()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._sent, f)
+        os.replace(tmp_path, self.path)
+
+    def close(self) -> None:
+        self.save()
+        self.sink.close()
@@ -1,113 +1,303 @@
+import asyncio
+import hashlib
+import json
 import logging
+import os
+import re
 import aiohttp
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
-from ..utils.http import get_user_agent
+from yarl import URL
+from config.marketplaces import MARKETPLACE_URLS
+from ..utils import metrics
+from ..utils.http import HTTPClient, get_user_agent
 
 logger = logging.getLogger(__name__)
 
+# The login form is tiny and fixed; a regex avoids building a soup per login
+_FORM_KEY_INPUT_RE = re.compile(r'<input\b[^>]*\bname=["\']form_key["\'][^>]*>', re.I)
+_VALUE_ATTR_RE = re.compile(r'\bvalue=["\']([^"\']*)["\']', re.I)
+
+# B-Stock answers requests from a dropped session by redirecting here
+LOGIN_PATH = "/customer/account/login"
+
 class AuthenticationError(Exception):
     """Raised when authentication fails"""
     pass
 
+def extract_form_key(html: str) -> Optional[str]:
+    """Return the value of the login form's form_key input, if present"""
+    tag = _FORM_KEY_INPUT_RE.search(html)
+    if not tag:
+        return None
+    value = _VALUE_ATTR_RE.search(tag.group(0))
+    return value.group(1) if value and value.group(1) else None
+
+def default_cookie_path(directory: str, email: str, marketplace: str) -> str:
+    """Per-account cookie file, named without exposing the email address"""
+    digest = hashlib.sha1(email.lower().encode("utf-8")).hexdigest()[:12]
+    return os.path.join(directory, f"{marketplace}-{digest}.json")
+
 class BStockAuthenticator:
     """Handles authentication with B-Stock marketplaces"""
-    
-    MARKETPLACE_URLS = {
-        "amazon": "https://bstock.com/amazon",
-        "target": "https://bstock.com/target"
-    }
 
-    def __init__(self, email: str, password: str, marketplace: str = "amazon"):
+    MARKETPLACE_URLS = MARKETPLACE_URLS
+
+    def __init__(self, email: str, password: str, marketplace: str = "amazon",
+                 base_url: Optional[str] = None, cookie_path: Optional[str] = None,
+                 session_lifetime: timedelta = timedelta(hours=1),
+                 refresh_margin: timedelta = timedelta(minutes=5)):
+        """
+        Args:
+            email: Account email
+            password: Account password
+            marketplace: "amazon" or "target"
+            base_url: Overrides the public site, e.g. to point at a local test server
+            cookie_path: File where the session cookies are persisted between runs
+            session_lifetime: How long a login stays valid
+            refresh_margin: How long before expiry the background refresh logs in again
+        """
         if marketplace.lower() not in self.MARKETPLACE_URLS:
             raise ValueError(f"Unsupported marketplace: {marketplace}")
-            
+
         self.email = email
         self.password = password
         self.marketplace = marketplace.lower()
-        self.base_url = self.MARKETPLACE_URLS[marketplace]
+        self.base_url = (base_url or self.MARKETPLACE_URLS[self.marketplace]).rstrip('/')
+        self.cookie_path = cookie_path
+        self.session_lifetime = session_lifetime
+        self.refresh_margin = refresh_margin
         self.session: Optional[aiohttp.ClientSession] = None
         self.last_auth: Optional[datetime] = None
         self.auth_token: Optional[str] = None
+        self.login_count = 0
+        self._login_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
 
     async def create_session(self) -> None:
         """Create a new aiohttp session"""
         if self.session and not self.session.closed:
             await self.session.close()
-        
+
         headers = {
             "User-Agent": get_user_agent(),
             "Accept": "text/html,application/xhtml+xml,*/*",
         }
-        self.session = aiohttp.ClientSession(headers=headers)
+        self.session = aiohttp.ClientSession(
+            headers=headers,
+            connector=HTTPClient().create_connector()
+        )
 
     async def close(self) -> None:
         """Close the session"""
+        await self.stop_refresh()
         if self.session and not self.session.closed:
             await self.session.close()
             self.session = None
             self.last_auth = None
             self.auth_token = None
 
+    @property
+    def expires_at(self) -> Optional[datetime]:
+        """When the current login is considered expired"""
+        if not self.last_auth:
+            return None
+        return self.last_auth + self.session_lifetime
+
     def is_authenticated(self) -> bool:
         """Check if current session is authenticated and not expired"""
-        if not all([self.last_auth, self.session, not self.session.closed]):
+        if not self.last_auth or not self.session or self.session.closed:
+            return False
+        return datetime.now() < self.expires_at
+
+    def save_cookies(self) -> None:
+        """Persist the session cookies so a restart can skip logging in"""
+        if not self.cookie_path or not self.session:
+            return
+        cookies = self.session.cookie_jar.filter_cookies(URL(self.base_url))
+        state = {
+            "marketplace": self.marketplace,
+            "base_url": self.base_url,
+            "last_auth": self.last_auth.isoformat(),
+            "cookies": {name: morsel.value for name, morsel in cookies.items()},
+        }
+        directory = os.path.dirname(self.cookie_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Cookies grant account access; keep the file private to this user
+        fd = os.open(self.cookie_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(state, f)
+
+    async def restore_cookies(self) -> bool:
+        """
+        Load persisted cookies into the session
+
+        Returns:
+            True if a saved, unexpired login was restored
+        """
+        if not self.cookie_path or not os.path.exists(self.cookie_path):
             return False
-        return (datetime.now() - self.last_auth) < timedelta(hours=1)
+        try:
+            with open(self.cookie_path) as f:
+                state = json.load(f)
+            last_auth = datetime.fromisoformat(state["last_auth"])
+            cookies = state["cookies"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable cookie file {self.cookie_path}: {str(e)}")
+            return False
+
+        if state.get("base_url") != self.base_url or "frontend" not in cookies:
+            return False
+        if datetime.now() >= last_auth + self.session_lifetime:
+            return False
+
+        if not self.session or self.session.closed:
+            await self.create_session()
+        self.session.cookie_jar.update_cookies(cookies, response_url=URL(self.base_url))
+        self.last_auth = last_auth
+        self.auth_token = cookies["frontend"]
+        logger.info(f"Restored {self.marketplace} session saved at {last_auth:%Y-%m-%d %H:%M:%S}")
+        return True
+
+    def expire(self) -> None:
+        """
+        Forget the current login, e.g. after the site dropped the session
+
+        The persisted cookies are deleted too, so the next ``login()``
+        performs a full login instead of restoring them.
+        """
+        self.last_auth = None
+        if self.cookie_path:
+            try:
+                os.remove(self.cookie_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove {self.cookie_path}: {str(e)}")
+
+    async def login(self, force: bool = False) -> None:
+        """
+        Authenticate with B-Stock
 
-    async def login(self) -> None:
-        """Authenticate with B-Stock"""
-        if self.is_authenticated():
+        Concurrent callers share one login: the first takes the lock and the
+        rest find a valid session once it is released.
+
+        Args:
+            force: Log in again even if the current session is still valid
+        """
+        if not force and self.is_authenticated():
             return
 
+        async with self._login_lock:
+            if not force and self.is_authenticated():
+                return
+            if not force and await self.restore_cookies():
+                return
+            await self._login()
+
+    async def _login(self) -> None:
         if not self.session or self.session.closed:
             await self.create_session()
 
         try:
             # Get form key
             login_response = await self.session.get(f"{self.base_url}/customer/account/login/")
-            await login_response.raise_for_status()
+            login_response.raise_for_status()
             html = await login_response.text()
-            
-            # Parse form key
-            soup = BeautifulSoup(html, 'html.parser')
-            form_key = soup.select_one('input[name="form_key"]')
-            if not form_key or not form_key.get('value'):
+
+            form_key = extract_form_key(html)
+            if not form_key:
                 raise AuthenticationError("Could not find form key")
-            
+
             # Login request
             login_data = {
-                'form_key': form_key['value'],
+                'form_key': form_key,
                 'login[username]': self.email,
                 'login[password]': self.password
             }
-            
+
             response = await self.session.post(
                 f"{self.base_url}/customer/account/loginPost/",
                 data=login_data
             )
-            await response.raise_for_status()
-            
+            response.raise_for_status()
+
             if "login" in str(response.url):
                 raise AuthenticationError("Invalid credentials")
 
             self.last_auth = datetime.now()
+            self.login_count += 1
+            metrics.LOGINS.inc(marketplace=self.marketplace)
             self.auth_token = response.cookies.get('frontend')
+            if not self.auth_token:
+                # Set on the redirect rather than the final page; read it back from the jar
+                cookie = self.session.cookie_jar.filter_cookies(URL(self.base_url)).get('frontend')
+                self.auth_token = cookie.value if cookie else None
 
         except Exception as e:
             raise AuthenticationError(f"Login failed: {str(e)}")
 
+        try:
+            self.save_cookies()
+        except OSError as e:
+            logger.warning(f"Could not persist cookies to {self.cookie_path}: {str(e)}")
+
+    def start_refresh(self) -> None:
+        """Start re-logging in in the background shortly before the session expires"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop_refresh(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def _refresh_loop(self) -> None:
+        retry_delay = 5.0
+        while True:
+            if self.expires_at is None:
+                delay = 0.0
+            else:
+                refresh_at = self.expires_at - self.refresh_margin
+                delay = max(0.0, (refresh_at - datetime.now()).total_seconds())
+            await asyncio.sleep(delay)
+            try:
+                await self.login(force=True)
+                retry_delay = 5.0
+            except AuthenticationError as e:
+                logger.error(f"Background refresh of {self.marketplace} session failed: {str(e)}")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, self.refresh_margin.total_seconds())
+
     async def make_authenticated_request(self, url: str, method: str = "GET", **kwargs) -> aiohttp.ClientResponse:
         """Make an authenticated request"""
         if not self.is_authenticated():
             await self.login()
 
         response = await self.session.request(method, url, **kwargs)
-        await response.raise_for_status()
-        
+        response.raise_for_status()
+
         return response
 
+    def http_client(self, **kwargs) -> HTTPClient:
+        """
+        Create a retrying fetch engine that reuses this authenticated session
+
+        Each attempt first ensures the login is still valid, and a request
+        redirected to the login page expires it and is retried.
+        """
+        if not self.session or self.session.closed:
+            raise AuthenticationError("No active session; call login() first")
+        kwargs.setdefault("marketplace", self.marketplace)
+        kwargs.setdefault("login_path", LOGIN_PATH)
+        kwargs.setdefault("on_logged_out", self.expire)
+        return HTTPClient(session=self.session, before_request=self.login, **kwargs)
+
     async def __aenter__(self):
         if not self.session:
             await self.create_session()
@@ -115,4 +305,74 @@ class BStockAuthenticator:
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.close()
\ No newline at end of file
+        await self.close()
+
+
+class SessionPool:
+    """
+    One authenticated session per marketplace, shared by all scrapers
+
+    Sessions are restored from persisted cookies when possible and kept
+    fresh in the background, so requests rarely wait on a login.
+    """
+
+    def __init__(self, email: str, password: str, cookie_dir: Optional[str] = None,
+                 base_urls: Optional[Dict[str, str]] = None, **auth_kwargs):
+        """
+        Args:
+            email: Account email
+            password: Account password
+            cookie_dir: Directory for persisted cookies; None disables persistence
+            base_urls: Per-marketplace base URL overrides
+            **auth_kwargs: Passed to every BStockAuthenticator
+        """
+        self.email = email
+        self.password = password
+        self.cookie_dir = cookie_dir
+        self.base_urls = base_urls or {}
+        self.auth_kwargs = auth_kwargs
+        self._sessions: Dict[str, BStockAuthenticator] = {}
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_settings(cls, settings=None) -> "SessionPool":
+        if settings is None:
+            from config.settings import get_settings
+            settings = get_settings()
+        return cls(
+            settings.BSTOCK_EMAIL,
+            settings.BSTOCK_PASSWORD,
+            cookie_dir=settings.SESSION_COOKIE_DIR,
+            base_urls=settings.base_urls(),
+        )
+
+    async def get(self, marketplace: str) -> BStockAuthenticator:
+        """Return the logged-in authenticator for a marketplace, creating it on first use"""
+        marketplace = marketplace.lower()
+        async with self._lock:
+            auth = self._sessions.get(marketplace)
+            if auth is None:
+                cookie_path = None
+                if self.cookie_dir:
+                    cookie_path = default_cookie_path(self.cookie_dir, self.email, marketplace)
+                auth = BStockAuthenticator(
+                    self.email, self.password, marketplace,
+                    base_url=self.base_urls.get(marketplace),
+                    cookie_path=cookie_path,
+                    **self.auth_kwargs,
+                )
+                self._sessions[marketplace] = auth
+        await auth.login()
+        auth.start_refresh()
+        return auth
+
+    async def close(self) -> None:
+        for auth in self._sessions.values():
+            await auth.close()
+        self._sessions.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
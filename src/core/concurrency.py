@@ -0,0 +1,166 @@
+# Adaptive concurrency control
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional
+import logging
+
+from ..utils.http import HTTPClient
+
+logger = logging.getLogger(__name__)
+
+
+class RequestSlot:
+    """Handle for one in-flight request; report its outcome with ``record``"""
+
+    def __init__(self, started: float):
+        self.started = started
+        self.status: Optional[int] = None
+        self.retry_after: Optional[float] = None
+
+    def record(self, status: int, retry_after: Optional[str] = None) -> None:
+        """
+        Record the response for this request
+
+        Args:
+            status: HTTP status code of the response
+            retry_after: Raw Retry-After header value, if any
+        """
+        self.status = status
+        self.retry_after = HTTPClient.parse_retry_after(retry_after)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD governor for the number of in-flight requests.
+
+    The limit grows by roughly ``increase`` per window of healthy responses
+    and is multiplied by ``decrease_factor`` when the server throttles us
+    (429/408/5xx or timeouts). Latency above ``latency_tolerance`` times the
+    best observed latency holds the limit steady instead of growing it.
+    A Retry-After header pauses all new requests until it has elapsed.
+    """
+
+    def __init__(self, initial: int = 5, min_limit: int = 1, max_limit: int = 50,
+                 increase: float = 1.0, decrease_factor: float = 0.5,
+                 latency_tolerance: float = 2.0, cooldown: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError("require 1 <= min_limit <= max_limit")
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+        self._clock = clock
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self._in_flight = 0
+        self._blocked_until = 0.0
+        self._last_decrease = float("-inf")
+        self._min_latency: Optional[float] = None
+        self._avg_latency: Optional[float] = None
+        self._condition = asyncio.Condition()
+
+    @classmethod
+    def from_settings(cls, settings) -> "AdaptiveConcurrencyLimiter":
+        """Build a limiter starting at ``Settings.CONCURRENT_REQUESTS``"""
+        return cls(
+            initial=settings.CONCURRENT_REQUESTS,
+            min_limit=settings.MIN_CONCURRENT_REQUESTS,
+            max_limit=settings.MAX_CONCURRENT_REQUESTS,
+        )
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed in flight"""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self) -> RequestSlot:
+        """Wait for a free slot and any active Retry-After pause"""
+        async with self._condition:
+            while True:
+                pause = self._blocked_until - self._clock()
+                if pause > 0:
+                    # Sleep without holding the condition so releases still progress
+                    self._condition.release()
+                    try:
+                        await asyncio.sleep(pause)
+                    finally:
+                        await self._condition.acquire()
+                    continue
+                if self._in_flight < self.limit:
+                    break
+                await self._condition.wait()
+            self._in_flight += 1
+        return RequestSlot(self._clock())
+
+    async def release(self, slot: RequestSlot, failed: bool = False) -> None:
+        """
+        Return a slot and feed its outcome into the limit
+
+        Args:
+            slot: Slot returned by ``acquire``
+            failed: True if the request timed out without a response
+        """
+        latency = self._clock() - slot.started
+        async with self._condition:
+            self._in_flight -= 1
+            if failed or (slot.status is not None and HTTPClient.is_throttle_status(slot.status)):
+                self._on_congestion(slot.retry_after)
+            elif slot.status is not None:
+                self._on_success(latency)
+            self._condition.notify_all()
+
+    @asynccontextmanager
+    async def request(self) -> AsyncIterator[RequestSlot]:
+        """
+        Context manager wrapping one request
+
+        Example:
+            async with limiter.request() as slot:
+                response = await session.get(url)
+                slot.record(response.status, response.headers.get("Retry-After"))
+        """
+        slot = await self.acquire()
+        failed = False
+        try:
+            yield slot
+        except asyncio.TimeoutError:
+            failed = True
+            raise
+        finally:
+            await self.release(slot, failed=failed)
+
+    def _on_success(self, latency: float) -> None:
+        if self._min_latency is None or latency < self._min_latency:
+            self._min_latency = latency
+        if self._avg_latency is None:
+            self._avg_latency = latency
+        else:
+            self._avg_latency = 0.8 * self._avg_latency + 0.2 * latency
+
+        if self._avg_latency > self._min_latency * self.latency_tolerance:
+            return
+        # Additive increase: roughly +increase per full window of responses
+        self._limit = min(self.max_limit, self._limit + self.increase / self._limit)
+
+    def _on_congestion(self, retry_after: Optional[float]) -> None:
+        now = self._clock()
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+            logger.info(f"Server asked to retry after {retry_after:.1f} seconds, pausing requests")
+
+        # Responses from the same window share one decrease
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        previous = self.limit
+        self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+        logger.info(f"Throttling detected, concurrency limit {previous} -> {self.limit}")
@@ -0,0 +1,113 @@
+# Re-parse archived pages
+import asyncio
+import inspect
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Deque, Dict, Optional
+import logging
+
+from ..models.batch import AuctionBatch
+from ..parsers.base_parser import BaseParser
+from ..parsers.pool import PARSERS, ParsePool
+from ..storage.archive import DETAIL, LISTING, ArchivedPage, PageArchive, url_marketplace
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReplayStats:
+    """Counters for one replay run"""
+    pages: int = 0
+    auctions: int = 0
+    skipped: int = 0
+    failures: int = 0
+
+
+def _marketplace(page: ArchivedPage) -> Optional[str]:
+    if page.marketplace in PARSERS:
+        return page.marketplace
+    marketplace = url_marketplace(page.url)
+    return marketplace if marketplace in PARSERS else None
+
+
+async def replay(archive: PageArchive, sink, parse_pool: Optional[ParsePool] = None,
+                 marketplace: Optional[str] = None, kind: Optional[str] = None,
+                 since: Optional[float] = None, until: Optional[float] = None,
+                 window: int = 64) -> ReplayStats:
+    """
+    Run the current parsers over archived pages and hand the results to ``sink``
+
+    Pages are parsed up to ``window`` at a time (in the pool's worker
+    processes when one is given) but reach the sink in archive order, so a
+    later fetch of an auction still overrides an earlier one. Each page's
+    auctions are passed with ``observed_at`` set to its fetch time (naive
+    UTC), so the writers leave alone rows observed after it; rows they do
+    change get the current time as ``updated_at`` like any other write.
+
+    Args:
+        archive: Archive to read
+        sink: Receives parsed auctions via ``add_many(auctions, observed_at=...)``
+            (awaited if it is a coroutine), usually an ``AuctionWriter`` or
+            ``AsyncAuctionWriter`` created with ``record_snapshots=False``
+        parse_pool: Optional ``ParsePool``; parses inline when omitted
+        marketplace: Only replay this marketplace
+        kind: Only replay ``listing`` or ``detail`` pages
+        since: Only pages fetched at or after this Unix time
+        until: Only pages fetched before this Unix time
+        window: Pages in flight at once
+    """
+    stats = ReplayStats()
+    parsers: Dict[str, BaseParser] = {}
+    loop = asyncio.get_running_loop()
+
+    async def parse(page: ArchivedPage, market: str) -> AuctionBatch:
+        body = await loop.run_in_executor(None, archive.read, page.content_hash)
+        if parse_pool is not None:
+            if page.kind == DETAIL:
+                auction = await parse_pool.parse_detail(market, body)
+                return AuctionBatch.from_auctions([auction] if auction is not None else [])
+            return await parse_pool.parse_listing(market, body)
+        parser = parsers.get(market)
+        if parser is None:
+            parser = parsers[market] = PARSERS[market]()
+        html = body.decode("utf-8", errors="replace")
+        if page.kind == DETAIL:
+            auction = parser.parse_auction_detail(html)
+            return AuctionBatch.from_auctions([auction] if auction is not None else [])
+        return parser.parse_auction_batch(html)
+
+    async def drain_one(pending: Deque) -> None:
+        page, task = pending.popleft()
+        try:
+            batch = await task
+        except Exception as e:
+            stats.failures += 1
+            logger.error(f"Failed to replay {page.url} fetched at {page.fetched_at}: {str(e)}")
+            return
+        stats.pages += 1
+        if len(batch):
+            stats.auctions += len(batch)
+            observed_at = datetime.fromtimestamp(page.fetched_at, timezone.utc).replace(tzinfo=None)
+            result = sink.add_many(batch, observed_at=observed_at)
+            if inspect.isawaitable(result):
+                await result
+
+    pending: Deque = deque()
+    try:
+        for page in archive.pages(marketplace=marketplace, kind=kind, since=since, until=until):
+            market = _marketplace(page)
+            if market is None or page.kind not in (LISTING, DETAIL):
+                stats.skipped += 1
+                continue
+            pending.append((page, asyncio.ensure_future(parse(page, market))))
+            if len(pending) >= window:
+                await drain_one(pending)
+        while pending:
+            await drain_one(pending)
+    finally:
+        for _, task in pending:
+            task.cancel()
+    logger.info(f"Replayed {stats.pages} pages into {stats.auctions} auctions "
+                f"({stats.skipped} skipped, {stats.failures} failed)")
+    return stats
@@ -1 +1,659 @@
-# Core scraping functionality 
+# Core scraping functionality
+import asyncio
+import hashlib
+import heapq
+import inspect
+import itertools
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+from ..models.auction import Auction
+from ..models.batch import AuctionBatch
+from ..models.shipping import ShippingEstimator
+from ..parsers.base_parser import BaseParser
+from ..utils import metrics
+from ..utils.http import FetchResult, HTTPClient
+from ..utils.http_cache import HTTPCache
+from .accounts import AccountPool
+from .alerts import AlertEngine
+from .rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+RefreshFunc = Callable[[Auction], Awaitable[Optional[Auction]]]
+
+
+def refresh_interval(seconds_left: Optional[float], min_interval: float = 5.0,
+                     max_interval: float = 3 * 3600.0, fraction: float = 0.1) -> float:
+    """
+    How long to wait before refreshing an auction
+
+    The interval is a fixed fraction of the time left, clamped between
+    ``min_interval`` and ``max_interval``: auctions closing next week are
+    polled every few hours, ones in their final minutes every few seconds.
+
+    Args:
+        seconds_left: Seconds until the auction closes, or None if unknown
+        min_interval: Shortest refresh interval in seconds
+        max_interval: Longest refresh interval in seconds
+        fraction: Share of the remaining time to wait
+    """
+    if seconds_left is None:
+        return max_interval
+    return min(max_interval, max(min_interval, seconds_left * fraction))
+
+
+class CrawlScheduler:
+    """
+    Deadline-aware refresh scheduler for known auctions.
+
+    Auctions sit in a heap keyed by their next-due time. Once due they move
+    to a per-marketplace ready heap ordered by ``end_time``, and each
+    marketplace's dispatcher pops the most urgent ready auction and then
+    takes a rate-limiter token for it. When the request budget is short, auctions
+    about to close are refreshed first and far-off ones simply wait.
+    """
+
+    def __init__(self, refresh: RefreshFunc, rate_limiter: RateLimiter,
+                 max_in_flight: int = 5, min_interval: float = 5.0,
+                 max_interval: float = 3 * 3600.0, fraction: float = 0.1,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            refresh: Coroutine fetching an auction again; returns the updated
+                auction, or None to keep the previous values
+            rate_limiter: Limiter whose marketplace buckets bound dispatch;
+                pass the one the HTTP client uses (``RateLimiter.from_settings``)
+                so refreshes and crawls share a single budget
+            max_in_flight: Maximum concurrent refreshes
+            min_interval: Shortest refresh interval in seconds
+            max_interval: Longest refresh interval in seconds
+            fraction: Share of the remaining time to wait between refreshes
+            clock: Wall-clock time source comparable with ``end_time``
+        """
+        self.refresh = refresh
+        self.rate_limiter = rate_limiter
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.fraction = fraction
+        self._clock = clock
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._counter = itertools.count()
+        self._auctions: Dict[str, Auction] = {}
+        self._due: Dict[str, float] = {}
+        self._waiting: List[Tuple[float, int, str]] = []
+        self._ready: Dict[str, List[Tuple[float, int, str]]] = {}
+        self._queued: Set[str] = set()
+        self._final: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._auctions)
+
+    def _seconds_left(self, auction: Auction, now: float) -> Optional[float]:
+        if not auction.end_time:
+            return None
+        return auction.end_time.timestamp() - now
+
+    def schedule(self, auction: Auction, due: Optional[float] = None) -> None:
+        """
+        Add or update an auction and compute its next refresh time
+
+        Auctions past their end time get one final refresh to capture the
+        closing price and are then dropped.
+        """
+        now = self._clock()
+        seconds_left = self._seconds_left(auction, now)
+        if seconds_left is not None and seconds_left <= 0:
+            if auction.auction_id in self._final:
+                self.remove(auction.auction_id)
+                return
+            self._final.add(auction.auction_id)
+            # Give the site a moment to settle the final bid
+            due = now + self.min_interval if due is None else due
+
+        if due is None:
+            due = now + refresh_interval(seconds_left, self.min_interval, self.max_interval, self.fraction)
+
+        self._auctions[auction.auction_id] = auction
+        self._due[auction.auction_id] = due
+        heapq.heappush(self._waiting, (due, next(self._counter), auction.auction_id))
+
+    def remove(self, auction_id: str) -> None:
+        """Stop refreshing an auction; stale heap entries are skipped lazily"""
+        self._auctions.pop(auction_id, None)
+        self._due.pop(auction_id, None)
+        self._final.discard(auction_id)
+
+    def next_due_in(self) -> Optional[float]:
+        """Seconds until the earliest waiting auction is due"""
+        self._discard_stale()
+        if not self._waiting:
+            return None
+        return max(0.0, self._waiting[0][0] - self._clock())
+
+    def _discard_stale(self) -> None:
+        while self._waiting:
+            due, _, auction_id = self._waiting[0]
+            if self._due.get(auction_id) == due:
+                return
+            heapq.heappop(self._waiting)
+
+    def promote_due(self) -> int:
+        """Move due auctions into their marketplace ready heaps; returns how many moved"""
+        now = self._clock()
+        moved = 0
+        while True:
+            self._discard_stale()
+            if not self._waiting or self._waiting[0][0] > now:
+                return moved
+            _, _, auction_id = heapq.heappop(self._waiting)
+            auction = self._auctions[auction_id]
+            del self._due[auction_id]
+            if auction_id in self._queued:
+                continue
+            end = auction.end_time.timestamp() if auction.end_time else float("inf")
+            ready = self._ready.setdefault(auction.marketplace, [])
+            heapq.heappush(ready, (end, next(self._counter), auction_id))
+            self._queued.add(auction_id)
+            moved += 1
+
+    def pop_ready(self, marketplace: str) -> Optional[Auction]:
+        """Most urgent ready auction for a marketplace"""
+        ready = self._ready.get(marketplace)
+        while ready:
+            _, _, auction_id = heapq.heappop(ready)
+            self._queued.discard(auction_id)
+            # Skip auctions removed or rescheduled since becoming ready
+            if auction_id in self._auctions and auction_id not in self._due:
+                return self._auctions[auction_id]
+        return None
+
+    def ready_count(self, marketplace: str) -> int:
+        return len(self._ready.get(marketplace, ()))
+
+    async def _refresh_one(self, auction: Auction) -> None:
+        try:
+            updated = await self.refresh(auction)
+        except Exception as e:
+            logger.error(f"Error refreshing auction {auction.auction_id}: {str(e)}")
+            updated = None
+        finally:
+            self._slots.release()
+        if auction.auction_id in self._auctions:
+            self.schedule(updated or auction)
+
+    async def _dispatch(self, marketplace: str) -> None:
+        """Dispatch loop for one marketplace, paced by its rate-limit bucket"""
+        while True:
+            self.promote_due()
+            if not self.ready_count(marketplace):
+                delay = self.next_due_in()
+                delay = self.min_interval if delay is None else min(max(delay, 0.05), self.min_interval)
+                await asyncio.sleep(delay)
+                continue
+            await self._slots.acquire()
+            # Choose after waiting for a slot so the latest urgent arrivals win
+            self.promote_due()
+            auction = self.pop_ready(marketplace)
+            if auction is None:
+                self._slots.release()
+                continue
+            # Only spend budget once there is an auction to refresh
+            await self.rate_limiter.acquire(marketplace)
+            task = asyncio.create_task(self._refresh_one(auction))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def run(self, marketplaces: Optional[List[str]] = None) -> None:
+        """Run dispatchers for each marketplace until cancelled"""
+        if marketplaces is None:
+            marketplaces = sorted({a.marketplace for a in self._auctions.values()} or {"amazon", "target"})
+        dispatchers = [asyncio.create_task(self._dispatch(m)) for m in marketplaces]
+        try:
+            await asyncio.gather(*dispatchers)
+        finally:
+            for task in dispatchers + list(self._tasks):
+                task.cancel()
+            await asyncio.gather(*dispatchers, *self._tasks, return_exceptions=True)
+
+
+def auction_fingerprint(auction: Auction) -> str:
+    """Compact digest of the listing fields that change while an auction runs"""
+    return f"{auction.current_bid}:{auction.total_bids}"
+
+
+def page_fingerprint(auctions: List[Auction]) -> str:
+    """Digest of a listing page: which auctions it holds and their bids"""
+    digest = hashlib.blake2b(digest_size=12)
+    for auction in auctions:
+        digest.update(f"{auction.auction_id}={auction_fingerprint(auction)};".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ListingState:
+    """
+    What the previous sweeps saw: a fingerprint per listing page and per auction
+
+    Lets an incremental sweep recognise unchanged pages and auctions.
+    Fingerprints are only recorded once an auction has been handed to the
+    sink (and, when it needs one, its detail page fetched), so a failed
+    write or fetch is retried on the next sweep. Auctions that ended more
+    than ``ended_grace`` seconds ago, and after a complete sweep those it
+    did not see, are forgotten. State can be saved to a JSON file so it
+    survives restarts.
+    """
+
+    def __init__(self, path: Optional[str] = None, ended_grace: float = 24 * 3600.0):
+        self.path = path
+        self.ended_grace = ended_grace
+        self.pages: Dict[int, str] = {}
+        self.auctions: Dict[str, str] = {}
+        # auction_id -> end time as a timestamp, where known
+        self.ends: Dict[str, float] = {}
+        self._seen: Set[str] = set()
+        if path and os.path.exists(path):
+            self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+            pages = {int(page): fp for page, fp in state.get("pages", {}).items()}
+            auctions = dict(state.get("auctions", {}))
+            ends = {auction_id: float(end) for auction_id, end in state.get("ends", {}).items()}
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable listing state {self.path}: {str(e)}")
+            return
+        self.pages, self.auctions, self.ends = pages, auctions, ends
+
+    def page_unchanged(self, page: int, fingerprint: str) -> bool:
+        """True if a page's fingerprint matches the one recorded last"""
+        return self.pages.get(page) == fingerprint
+
+    def record_page(self, page: int, fingerprint: str) -> None:
+        self.pages[page] = fingerprint
+
+    def changed(self, auctions: List[Auction]) -> List[Auction]:
+        """Auctions new or changed since last recorded; all of them count as seen this sweep"""
+        changed = []
+        for auction in auctions:
+            self._seen.add(auction.auction_id)
+            if self.auctions.get(auction.auction_id) != auction_fingerprint(auction):
+                changed.append(auction)
+        return changed
+
+    def record(self, auctions: Iterable[Auction]) -> None:
+        """Record the fingerprints of auctions that were processed successfully"""
+        for auction in auctions:
+            self.auctions[auction.auction_id] = auction_fingerprint(auction)
+            if auction.end_time:
+                self.ends[auction.auction_id] = auction.end_time.timestamp()
+
+    def prune(self, complete: bool = False, now: Optional[float] = None) -> int:
+        """
+        Forget auctions that are over and start a new set of seen auctions
+
+        Args:
+            complete: The sweep walked every listing page without failures,
+                so auctions it did not see are no longer listed
+            now: Current time as a timestamp
+
+        Returns:
+            Number of auctions forgotten
+        """
+        cutoff = (time.time() if now is None else now) - self.ended_grace
+        stale = {auction_id for auction_id, end in self.ends.items() if end < cutoff}
+        if complete:
+            stale.update(auction_id for auction_id in self.auctions if auction_id not in self._seen)
+        for auction_id in stale:
+            self.auctions.pop(auction_id, None)
+            self.ends.pop(auction_id, None)
+        self._seen = set()
+        return len(stale)
+
+    def forget_pages_after(self, page: int) -> None:
+        """Drop fingerprints past the end of the listing"""
+        self.pages = {p: fp for p, fp in self.pages.items() if p <= page}
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write a temp file and swap it in, so a crash never leaves a torn file
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"pages": self.pages, "auctions": self.auctions, "ends": self.ends}, f)
+        os.replace(temp_path, self.path)
+
+
+@dataclass
+class SweepStats:
+    """Counters for one marketplace sweep"""
+    pages: int = 0
+    auctions: int = 0
+    details: int = 0
+    failures: int = 0
+    unchanged_pages: int = 0
+    changed: int = 0
+    details_skipped: int = 0
+
+
+class Scraper:
+    """
+    Sweeps a marketplace: listing pages, then optionally detail pages.
+
+    Listing pages are fetched ``page_window`` at a time until a page comes
+    back empty. Parsed auctions are handed to ``sink.add_many`` page by page
+    (an ``AuctionWriter`` or anything with the same method). If ``add_many``
+    is a coroutine, as on ``AsyncAuctionWriter``, it is awaited, so a full
+    write queue holds back further fetches.
+
+    With a ``ListingState`` the sweep is incremental: only new or changed
+    auctions reach the sink, the alert engine and the detail fetches, and
+    paging stops after ``stop_after_unchanged`` consecutive pages identical
+    to the last sweep.
+
+    Units, condition, retail value and location come from the lot title, so
+    detail pages are only fetched for titles the parser could not read with
+    confidence, unless ``fetch_shipping`` asks for detail pages for their
+    shipping cost too. With a ``ShippingEstimator`` and ``shipping_top``,
+    only the lots with the lowest estimated landed cost per unit get that
+    extra fetch, and every shipping cost seen on a detail page is fed back
+    into the estimator.
+
+    When the client revalidates pages against an ``HTTPCache``, a 304
+    (``FetchResult.not_modified``) reuses the previous parse of that URL
+    instead of parsing the cached body again.
+    """
+
+    def __init__(self, client, parser: BaseParser, base_url: str, sink=None,
+                 parse_pool=None, page_window: int = 4, max_pages: Optional[int] = None,
+                 state: Optional[ListingState] = None, stop_after_unchanged: int = 2,
+                 fetch_shipping: bool = False, shipping_estimator: Optional[ShippingEstimator] = None,
+                 shipping_top: Optional[int] = None, alerts: Optional[AlertEngine] = None):
+        """
+        Args:
+            client: Fetch engine, usually ``BStockAuthenticator.http_client()`` or an
+                ``AccountPool``
+            parser: Parser for this marketplace
+            base_url: Marketplace root, e.g. ``https://bstock.com/amazon``
+            sink: Receives parsed auctions via ``add_many``
+            parse_pool: Optional ``ParsePool`` to parse off the event loop
+            page_window: Listing pages requested concurrently
+            max_pages: Stop after this many listing pages
+            state: Fingerprints from earlier sweeps; enables incremental sweeps
+            stop_after_unchanged: Unchanged pages in a row that end an incremental sweep
+            fetch_shipping: Also fetch detail pages for shipping cost
+            shipping_estimator: Ranks lots by estimated landed cost and learns from detail pages
+            shipping_top: With an estimator, fetch shipping only for this many cheapest lots per sweep
+            alerts: Saved-search alerts, checked against every auction handed to the sink
+        """
+        self.client = client
+        self.parser = parser
+        self.marketplace = parser.marketplace
+        self.base_url = base_url.rstrip('/')
+        self.sink = sink
+        self.parse_pool = parse_pool
+        self.page_window = page_window
+        self.max_pages = max_pages
+        self.state = state
+        self.stop_after_unchanged = stop_after_unchanged
+        self.fetch_shipping = fetch_shipping
+        self.shipping_estimator = shipping_estimator
+        self.shipping_top = shipping_top
+        self.alerts = alerts
+        self.max_parsed = 4096
+        # URL -> last parse of a response carrying validators, reused on a 304
+        self._parsed: "OrderedDict[str, Any]" = OrderedDict()
+
+    @classmethod
+    def from_settings(cls, parser: BaseParser, client=None, settings=None, **kwargs) -> "Scraper":
+        """
+        Scraper for the parser's marketplace, configured from settings
+
+        Without a ``client`` the crawl is sharded over every configured
+        account through an ``AccountPool``; close it with
+        ``scraper.client.close()``. Clients are given the shared on-disk
+        ``HTTPCache`` (unless one already has a cache), so repeat sweeps
+        revalidate pages with conditional GETs.
+        """
+        if settings is None:
+            from config.settings import get_settings
+            settings = get_settings()
+        cache = None
+        if settings.HTTP_CACHE_PATH and getattr(client, "cache", None) is None:
+            cache = HTTPCache.from_settings(settings)
+        if client is None:
+            client = AccountPool.from_settings(parser.marketplace, settings,
+                                               client_kwargs={"cache": cache})
+        elif cache is not None and getattr(client, "cache", None) is None:
+            client.cache = cache
+        return cls(client, parser, settings.base_urls()[parser.marketplace], **kwargs)
+
+    def needs_detail(self, auction: Auction) -> bool:
+        """Whether the listing title left fields only the detail page can give"""
+        return not self.parser.title_extractor.extract(auction.title).confident
+
+    def detail_targets(self, auctions: List[Auction]) -> List[Auction]:
+        """Auctions whose detail pages are worth fetching this sweep"""
+        targets, rest = [], []
+        for auction in auctions:
+            (targets if self.needs_detail(auction) else rest).append(auction)
+        if not self.fetch_shipping or not rest:
+            return targets
+        if self.shipping_estimator is not None and self.shipping_top is not None:
+            order = self.shipping_estimator.rank(AuctionBatch.from_auctions(rest), top=self.shipping_top)
+            rest = [rest[i] for i in order.tolist()]
+        return targets + rest
+
+    def listing_url(self, page: int) -> str:
+        return HTTPClient.build_url(self.base_url, "/", {"p": page})
+
+    def detail_url(self, auction_id: str) -> str:
+        return f"{self.base_url}/auction/auction/view/id/{auction_id}/"
+
+    async def _parse_listing(self, html: str) -> Iterable[Auction]:
+        with metrics.PARSE_LATENCY.time(marketplace=self.marketplace, kind="listing"):
+            if self.parse_pool is not None:
+                auctions = await self.parse_pool.parse_listing(self.marketplace, html)
+            else:
+                auctions = self.parser.parse_listing(html)
+        metrics.ITEMS_PARSED.inc(len(auctions), marketplace=self.marketplace, kind="listing")
+        return auctions
+
+    async def _parse_detail(self, html: str) -> Optional[Auction]:
+        with metrics.PARSE_LATENCY.time(marketplace=self.marketplace, kind="detail"):
+            if self.parse_pool is not None:
+                auction = await self.parse_pool.parse_detail(self.marketplace, html)
+            else:
+                auction = self.parser.parse_detail(html)
+        if auction is not None:
+            metrics.ITEMS_PARSED.inc(marketplace=self.marketplace, kind="detail")
+        return auction
+
+    async def _parse_result(self, result: FetchResult, parse: Callable[[str], Awaitable[Any]]) -> Any:
+        """Parse a response body, reusing the previous parse when the page was not modified"""
+        if result.not_modified and result.url in self._parsed:
+            self._parsed.move_to_end(result.url)
+            return self._parsed[result.url]
+        parsed = await parse(result.text)
+        if result.headers.get("ETag") or result.headers.get("Last-Modified"):
+            self._parsed[result.url] = parsed
+            self._parsed.move_to_end(result.url)
+            if len(self._parsed) > self.max_parsed:
+                self._parsed.popitem(last=False)
+        return parsed
+
+    async def _emit(self, auctions: List[Auction]) -> None:
+        if not len(auctions):
+            return
+        if self.sink is not None:
+            result = self.sink.add_many(auctions)
+            if inspect.isawaitable(result):
+                await result
+        if self.alerts is not None:
+            try:
+                await self.alerts.process(auctions)
+            except Exception as e:
+                # Alerts are best effort; unsent ones go out when the auction next changes
+                logger.error(f"{self.marketplace}: failed to send alerts: {str(e)}")
+
+    async def crawl_listings(self, stats: Optional[SweepStats] = None,
+                             full: bool = False, record: bool = True) -> List[Auction]:
+        """
+        Fetch and parse listing pages until one comes back empty
+
+        In incremental mode, also stops at a run of unchanged pages unless
+        ``full`` is set. Fingerprints are recorded as each page is handed
+        to the sink; with ``record`` unset the caller records the returned
+        auctions itself once it is done with them.
+
+        Returns:
+            Auctions new or changed since the last sweep (all of them
+            without a ``ListingState``)
+        """
+        stats = stats or SweepStats()
+        failures = stats.failures
+        found: List[Auction] = []
+        unchanged_run = 0
+        complete = False
+        page = 1
+        while self.max_pages is None or page <= self.max_pages:
+            last = page + self.page_window - 1
+            if self.max_pages is not None:
+                last = min(last, self.max_pages)
+            pages = {self.listing_url(p): p for p in range(page, last + 1)}
+
+            parsed: Dict[int, List[Auction]] = {}
+            async for result in self.client.fetch_many(pages, max_in_flight=len(pages)):
+                if not result.ok:
+                    stats.failures += 1
+                    logger.error(f"Failed to fetch {result.url}: {result.error or result.status}")
+                    continue
+                stats.pages += 1
+                parsed[pages[result.url]] = await self._parse_result(result, self._parse_listing)
+
+            if not parsed:
+                # A whole window failed (down, or logged out); the crawl is incomplete
+                logger.error(f"{self.marketplace}: no listing page from {page} to {last} could be fetched, stopping")
+                break
+
+            # Pages complete out of order; walk them in order for the stop rules
+            stop = False
+            for number in range(page, last + 1):
+                if number not in parsed:
+                    unchanged_run = 0
+                    continue
+                auctions = parsed[number]
+                if not auctions:
+                    if self.state is not None:
+                        self.state.forget_pages_after(number - 1)
+                    complete = stats.failures == failures
+                    stop = True
+                    break
+                stats.auctions += len(auctions)
+                if self.state is not None:
+                    fingerprint = page_fingerprint(auctions)
+                    changed = self.state.changed(auctions)
+                    # A page only counts as unchanged once all its auctions were recorded
+                    if self.state.page_unchanged(number, fingerprint) and not changed:
+                        stats.unchanged_pages += 1
+                        unchanged_run += 1
+                    else:
+                        unchanged_run = 0
+                    auctions = changed
+                stats.changed += len(auctions)
+                found.extend(auctions)
+                await self._emit(auctions)
+                if self.state is not None:
+                    self.state.record_page(number, fingerprint)
+                    if record:
+                        self.state.record(auctions)
+                if self.state is not None and not full and unchanged_run >= self.stop_after_unchanged:
+                    logger.info(f"{self.marketplace}: {unchanged_run} unchanged pages, stopping at page {number}")
+                    stop = True
+                    break
+            if stop:
+                break
+            page = last + 1
+        if self.state is not None:
+            forgotten = self.state.prune(complete)
+            if forgotten:
+                logger.debug(f"{self.marketplace}: forgot {forgotten} finished auctions")
+            self.state.save()
+        return found
+
+    @staticmethod
+    def _merge_detail(listing: Auction, detail: Auction) -> Auction:
+        """Fill what a detail page left out (such as its id) from the listing"""
+        if not detail.auction_id:
+            detail.auction_id = listing.auction_id
+            detail.source_url = listing.source_url
+        for name in ("total_units", "condition", "retail_value", "location", "end_time"):
+            if getattr(detail, name) is None:
+                setattr(detail, name, getattr(listing, name))
+        return detail
+
+    async def fetch_details(self, auctions: List[Auction],
+                            stats: Optional[SweepStats] = None) -> List[Auction]:
+        """
+        Fetch detail pages and return auctions updated from them
+
+        With a ``ListingState``, the listing fingerprints of the auctions
+        whose detail page was fetched are recorded once the updates have
+        been handed to the sink; failed ones are tried again next sweep.
+        Shipping costs found are fed to the ``ShippingEstimator``, whose
+        rates are then saved.
+        """
+        stats = stats or SweepStats()
+        by_url = {self.detail_url(a.auction_id): a for a in auctions}
+        updated: List[Auction] = []
+        fetched: List[Auction] = []
+        async for result in self.client.fetch_many(by_url):
+            if not result.ok:
+                stats.failures += 1
+                continue
+            stats.details += 1
+            listing = by_url[result.url]
+            fetched.append(listing)
+            detail = await self._parse_result(result, self._parse_detail)
+            if detail is not None:
+                updated.append(self._merge_detail(listing, detail))
+        if self.shipping_estimator is not None and self.shipping_estimator.observe_auctions(updated):
+            await asyncio.to_thread(self.shipping_estimator.save)
+        await self._emit(updated)
+        if self.state is not None:
+            self.state.record(fetched)
+            self.state.save()
+        return updated
+
+    async def sweep(self, details: bool = False, full: bool = False) -> SweepStats:
+        """
+        Crawl the listing pages and optionally the detail pages
+
+        Detail pages are only fetched for auctions that need one (see
+        ``detail_targets``), and only for those new or changed since the last
+        sweep when a ``ListingState`` is in use. ``full`` disables the
+        early stop, e.g. for a periodic complete pass.
+        """
+        stats = SweepStats()
+        auctions = await self.crawl_listings(stats, full=full, record=not details)
+        if details and auctions:
+            targets = self.detail_targets(auctions)
+            stats.details_skipped = len(auctions) - len(targets)
+            if self.state is not None:
+                target_ids = {a.auction_id for a in targets}
+                self.state.record(a for a in auctions if a.auction_id not in target_ids)
+            if targets:
+                await self.fetch_details(targets, stats)
+            elif self.state is not None:
+                self.state.save()
+        return stats
@@ -4,22 +4,28 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
-@dataclass
+@dataclass(slots=True)
 class Auction:
-    """Base auction model representing common fields across marketplaces"""
+    """
+    Base auction model representing common fields across marketplaces
+
+    Uses ``__slots__`` since millions of these pass through a sweep; for
+    bulk hand-offs see ``AuctionBatch``.
+    """
     auction_id: str
     title: str
     current_bid: float
-    total_units: int
-    condition: str
-    retail_value: float
-    location: str
+    # None when neither the title nor a detail page gave the value
+    total_units: Optional[int]
+    condition: Optional[str]
+    retail_value: Optional[float]
+    location: Optional[str]
     end_time: datetime
+    marketplace: str
+    source_url: str
     shipping_cost: Optional[float] = None
     total_bids: Optional[int] = None
     cost_per_unit: Optional[float] = None
-    marketplace: str
-    source_url: str
     
     @property
     def is_ending_soon(self) -> bool:
@@ -0,0 +1,243 @@
+# Columnar auction batches
+import sys
+from dataclasses import fields
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .auction import Auction
+
+# Auction fields in declaration order
+FIELDS: List[str] = [f.name for f in fields(Auction)]
+
+# Per-row strings, kept as plain lists
+STRING_COLUMNS = ("auction_id", "title", "source_url")
+# Low-cardinality strings, dictionary-encoded as int32 codes
+CATEGORY_COLUMNS = ("marketplace", "condition", "location")
+# float64 with NaN for missing values
+FLOAT_COLUMNS = ("current_bid", "retail_value", "shipping_cost", "cost_per_unit")
+# int64 with a separate validity mask
+INT_COLUMNS = ("total_units", "total_bids")
+# datetime64[us] with NaT for missing values
+TIME_COLUMNS = ("end_time",)
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class AuctionBatch:
+    """
+    Column-oriented container for many auctions
+
+    Numeric and time fields live in NumPy arrays and the repetitive
+    ``marketplace``/``condition``/``location`` strings are dictionary
+    encoded, so a batch takes far less memory than the equivalent list of
+    ``Auction`` objects and pickles as a handful of buffers when sent
+    between processes. Iterating yields ``Auction`` objects, so a batch can
+    be used wherever a list of auctions is expected.
+
+    Timezone-aware end times are stored as naive UTC.
+    """
+
+    def __init__(self, strings: Dict[str, List[str]],
+                 categories: Dict[str, Tuple[List[Optional[str]], np.ndarray]],
+                 floats: Dict[str, np.ndarray], ints: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                 times: Dict[str, np.ndarray]):
+        self._strings = strings
+        self._categories = categories
+        self._floats = floats
+        self._ints = ints
+        self._times = times
+        self._length = len(strings["auction_id"])
+
+    @classmethod
+    def from_auctions(cls, auctions: Iterable[Auction]) -> "AuctionBatch":
+        auctions = list(auctions)
+        strings = {name: [getattr(a, name) for a in auctions] for name in STRING_COLUMNS}
+
+        categories = {}
+        for name in CATEGORY_COLUMNS:
+            lookup: Dict[Optional[str], int] = {}
+            values: List[Optional[str]] = []
+            codes = np.empty(len(auctions), dtype=np.int32)
+            for i, auction in enumerate(auctions):
+                value = getattr(auction, name)
+                code = lookup.get(value)
+                if code is None:
+                    code = lookup[value] = len(values)
+                    values.append(sys.intern(value) if isinstance(value, str) else value)
+                codes[i] = code
+            categories[name] = (values, codes)
+
+        floats = {
+            name: np.array([np.nan if getattr(a, name) is None else getattr(a, name) for a in auctions],
+                           dtype=np.float64)
+            for name in FLOAT_COLUMNS
+        }
+
+        ints = {}
+        for name in INT_COLUMNS:
+            raw = [getattr(a, name) for a in auctions]
+            valid = np.array([value is not None for value in raw], dtype=bool)
+            values = np.array([0 if value is None else value for value in raw], dtype=np.int64)
+            ints[name] = (values, valid)
+
+        times = {
+            name: np.array(
+                [np.datetime64("NaT") if getattr(a, name) is None else _naive_utc(getattr(a, name))
+                 for a in auctions],
+                dtype="datetime64[us]",
+            )
+            for name in TIME_COLUMNS
+        }
+        return cls(strings, categories, floats, ints, times)
+
+    @classmethod
+    def concat(cls, batches: Sequence["AuctionBatch"]) -> "AuctionBatch":
+        """Join batches into one, re-encoding category columns"""
+        if not batches:
+            return cls.from_auctions([])
+        strings = {name: [v for b in batches for v in b._strings[name]] for name in STRING_COLUMNS}
+
+        categories = {}
+        for name in CATEGORY_COLUMNS:
+            lookup: Dict[Optional[str], int] = {}
+            values: List[Optional[str]] = []
+            parts = []
+            for batch in batches:
+                batch_values, codes = batch._categories[name]
+                remap = np.empty(len(batch_values), dtype=np.int32)
+                for old, value in enumerate(batch_values):
+                    if value not in lookup:
+                        lookup[value] = len(values)
+                        values.append(value)
+                    remap[old] = lookup[value]
+                parts.append(remap[codes] if len(codes) else codes)
+            categories[name] = (values, np.concatenate(parts))
+
+        floats = {name: np.concatenate([b._floats[name] for b in batches]) for name in FLOAT_COLUMNS}
+        ints = {
+            name: (np.concatenate([b._ints[name][0] for b in batches]),
+                   np.concatenate([b._ints[name][1] for b in batches]))
+            for name in INT_COLUMNS
+        }
+        times = {name: np.concatenate([b._times[name] for b in batches]) for name in TIME_COLUMNS}
+        return cls(strings, categories, floats, ints, times)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def array(self, name: str) -> np.ndarray:
+        """Raw NumPy column for vectorised work: NaN, NaT or masked zeros mark missing values"""
+        if name in self._floats:
+            return self._floats[name]
+        if name in self._ints:
+            return self._ints[name][0]
+        if name in self._times:
+            return self._times[name]
+        if name in self._categories:
+            return self._categories[name][1]
+        raise KeyError(f"{name} is not a numeric column")
+
+    def valid(self, name: str) -> np.ndarray:
+        """Boolean mask of the rows where a column has a value"""
+        if name in self._floats:
+            return ~np.isnan(self._floats[name])
+        if name in self._ints:
+            return self._ints[name][1]
+        if name in self._times:
+            return ~np.isnat(self._times[name])
+        return np.array([value is not None for value in self.column(name)], dtype=bool)
+
+    def categories(self, name: str) -> Tuple[List[Optional[str]], np.ndarray]:
+        """Distinct values of a category column and each row's int32 code into them"""
+        if name not in self._categories:
+            raise KeyError(f"{name} is not a category column")
+        return self._categories[name]
+
+    def column(self, name: str) -> List:
+        """A column as Python values, with None for missing entries"""
+        if name in self._strings:
+            return list(self._strings[name])
+        if name in self._categories:
+            values, codes = self._categories[name]
+            return [values[code] for code in codes.tolist()]
+        if name in self._floats:
+            array = self._floats[name]
+            return [None if value != value else value for value in array.tolist()]
+        if name in self._ints:
+            values, valid = self._ints[name]
+            return [value if ok else None for value, ok in zip(values.tolist(), valid.tolist())]
+        if name in self._times:
+            return self._times[name].tolist()
+        raise KeyError(name)
+
+    def rows(self, columns: Sequence[str] = FIELDS) -> Iterator[tuple]:
+        """Row tuples in ``columns`` order, built column-wise"""
+        return zip(*(self.column(name) for name in columns))
+
+    def __iter__(self) -> Iterator[Auction]:
+        for row in self.rows(FIELDS):
+            yield Auction(*row)
+
+    def __getitem__(self, index: int) -> Auction:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("AuctionBatch index out of range")
+        values = []
+        for name in FIELDS:
+            if name in self._strings:
+                values.append(self._strings[name][index])
+            elif name in self._categories:
+                category_values, codes = self._categories[name]
+                values.append(category_values[codes[index]])
+            elif name in self._floats:
+                value = float(self._floats[name][index])
+                values.append(None if value != value else value)
+            elif name in self._ints:
+                ints, valid = self._ints[name]
+                values.append(int(ints[index]) if valid[index] else None)
+            else:
+                values.append(self._times[name][index].tolist())
+        return Auction(*values)
+
+    def to_auctions(self) -> List[Auction]:
+        return list(self)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the batch"""
+        total = sum(a.nbytes for a in self._floats.values())
+        total += sum(v.nbytes + m.nbytes for v, m in self._ints.values())
+        total += sum(a.nbytes for a in self._times.values())
+        total += sum(codes.nbytes for _, codes in self._categories.values())
+        total += sum(sys.getsizeof(s) for column in self._strings.values() for s in column)
+        return total
+
+    def to_arrow(self):
+        """Convert to a ``pyarrow.Table`` (requires pyarrow)"""
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("pyarrow is required for AuctionBatch.to_arrow") from e
+        arrays = {}
+        for name in FIELDS:
+            if name in self._strings:
+                arrays[name] = pa.array(self._strings[name], type=pa.string())
+            elif name in self._categories:
+                values, codes = self._categories[name]
+                arrays[name] = pa.DictionaryArray.from_arrays(
+                    pa.array(codes, type=pa.int32()), pa.array(values, type=pa.string()))
+            elif name in self._floats:
+                arrays[name] = pa.array(self._floats[name], mask=np.isnan(self._floats[name]))
+            elif name in self._ints:
+                values, valid = self._ints[name]
+                arrays[name] = pa.array(values, mask=~valid)
+            else:
+                arrays[name] = pa.array(self._times[name], type=pa.timestamp("us"))
+        return pa.table(arrays)
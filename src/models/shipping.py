@@ -1 +1,259 @@
-# Shipping details model 
+# Shipping cost estimation
+import json
+import os
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterable, Optional, Tuple
+import logging
+
+import numpy as np
+
+from .auction import Auction
+from .batch import AuctionBatch
+
+logger = logging.getLogger(__name__)
+
+_PALLETS_RE = re.compile(r"\b(\d{1,3})\s+Pallets?\b", re.I)
+_TRUCKLOAD_RE = re.compile(r"\bTruck\s*load\b", re.I)
+_STATE_RE = re.compile(r",\s*([A-Z]{2})\b")
+
+# Pallets assumed for a full truckload when the title gives no count
+TRUCKLOAD_PALLETS = 26
+
+Lane = Tuple[str, str]
+
+
+def pallet_count(title: Optional[str], default: float = 1.0) -> float:
+    """Pallets in a lot, from titles like "Est. 2 Pallets of ..." or "Truckload of ..." """
+    if title:
+        match = _PALLETS_RE.search(title)
+        if match:
+            return float(match.group(1))
+        if _TRUCKLOAD_RE.search(title):
+            return float(TRUCKLOAD_PALLETS)
+    return default
+
+
+def location_state(location: Optional[str]) -> Optional[str]:
+    """Two-letter state of a "City, ST" location"""
+    if not location:
+        return None
+    match = _STATE_RE.search(location)
+    return match.group(1) if match else None
+
+
+@dataclass(slots=True)
+class LaneRate:
+    """Fitted ``cost = base + per_pallet * pallets`` for one lane"""
+    base: float
+    per_pallet: float
+    observations: int
+
+    def cost(self, pallets: float) -> float:
+        return self.base + self.per_pallet * pallets
+
+
+def fit_rate(pallets: np.ndarray, costs: np.ndarray) -> LaneRate:
+    """
+    Least-squares fit of a fixed charge plus a per-pallet charge
+
+    Falls back to a purely per-pallet rate when every observation has the
+    same pallet count or the free fit would give a negative term.
+    """
+    count = len(costs)
+    if count >= 2 and np.ptp(pallets) > 0:
+        design = np.column_stack([np.ones(count), pallets])
+        (base, per_pallet), *_ = np.linalg.lstsq(design, costs, rcond=None)
+        if base >= 0 and per_pallet >= 0:
+            return LaneRate(float(base), float(per_pallet), count)
+    per_pallet = float(np.dot(pallets, costs) / np.dot(pallets, pallets))
+    return LaneRate(0.0, per_pallet, count)
+
+
+class ShippingEstimator:
+    """
+    Learns shipping quotes per origin/destination lane and prices whole batches.
+
+    Every observed ``shipping_cost`` is recorded against the lot's pallet
+    count for its ``(location, destination)`` lane, and quotes are pooled
+    into ``(origin state, destination state)`` lanes too. Estimates use
+    the most specific lane with at least ``min_observations`` quotes, then
+    a fit over everything, so new warehouses get a usable number right
+    away. Fitted rates are cached per lane and only refitted after new
+    observations arrive.
+
+    Scoring an ``AuctionBatch`` looks rates up once per distinct location
+    and then works on whole NumPy columns, so thousands of lots are ranked
+    by landed cost per unit in milliseconds. Lots whose shipping cost is
+    already known keep it.
+
+    With ``path`` set, the observations are kept in a JSON file so the
+    rate tables survive restarts.
+    """
+
+    def __init__(self, destination: str, min_observations: int = 5,
+                 max_observations: int = 500, path: Optional[str] = None):
+        """
+        Args:
+            destination: Quote address as "City, ST", used when none is given
+            min_observations: Quotes a lane needs before its own fit is used
+            max_observations: Most recent quotes kept per lane
+            path: JSON file holding the observations
+        """
+        self.destination = destination
+        self.min_observations = min_observations
+        self.max_observations = max_observations
+        self.path = path
+        self._observations: Dict[Lane, Deque[Tuple[float, float]]] = {}
+        self._rates: Optional[Dict[Lane, LaneRate]] = None
+        self._global: Optional[LaneRate] = None
+        self._title_pallets: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    @classmethod
+    def from_settings(cls, settings) -> "ShippingEstimator":
+        return cls(settings.SHIPPING_DESTINATION, path=settings.SHIPPING_RATES_PATH or None)
+
+    @staticmethod
+    def lanes(origin: str, destination: str) -> Tuple[Lane, Optional[Lane]]:
+        """Exact lane and state lane (None when either state is unknown)"""
+        origin_state, destination_state = location_state(origin), location_state(destination)
+        state_lane = None
+        if origin_state and destination_state:
+            state_lane = (origin_state, destination_state)
+        return (origin, destination), state_lane
+
+    def observe(self, origin: str, pallets: float, cost: float,
+                destination: Optional[str] = None) -> None:
+        """Record one shipping quote"""
+        if not origin or cost is None or cost != cost or not pallets or pallets <= 0:
+            return
+        lane = (origin, destination or self.destination)
+        with self._lock:
+            quotes = self._observations.get(lane)
+            if quotes is None:
+                quotes = self._observations[lane] = deque(maxlen=self.max_observations)
+            quotes.append((float(pallets), float(cost)))
+            self._rates = None
+
+    def observe_auctions(self, auctions: Iterable[Auction], destination: Optional[str] = None) -> int:
+        """Record the quotes of auctions that have a shipping cost; returns how many"""
+        observed = 0
+        for auction in auctions:
+            if auction.shipping_cost is not None and auction.location:
+                self.observe(auction.location, self.pallets(auction.title), auction.shipping_cost, destination)
+                observed += 1
+        return observed
+
+    def _fitted(self) -> Tuple[Dict[Lane, LaneRate], Optional[LaneRate]]:
+        with self._lock:
+            if self._rates is None:
+                rates: Dict[Lane, LaneRate] = {}
+                by_state: Dict[Lane, list] = {}
+                everything = []
+                for lane, quotes in self._observations.items():
+                    array = np.array(quotes, dtype=np.float64)
+                    everything.append(array)
+                    if len(array) >= self.min_observations:
+                        rates[lane] = fit_rate(array[:, 0], array[:, 1])
+                    _, state = self.lanes(*lane)
+                    if state is not None:
+                        by_state.setdefault(state, []).append(array)
+                for state, arrays in by_state.items():
+                    array = np.concatenate(arrays)
+                    if len(array) >= self.min_observations:
+                        rates[state] = fit_rate(array[:, 0], array[:, 1])
+                self._rates = rates
+                if everything:
+                    array = np.concatenate(everything)
+                    self._global = fit_rate(array[:, 0], array[:, 1])
+                else:
+                    self._global = None
+            return self._rates, self._global
+
+    def rates(self) -> Dict[Lane, LaneRate]:
+        """Fitted rate table of every lane with enough observations"""
+        return dict(self._fitted()[0])
+
+    def rate_for(self, origin: Optional[str], destination: Optional[str] = None) -> Optional[LaneRate]:
+        """Rate of the most specific lane with enough data, else the overall fit"""
+        rates, overall = self._fitted()
+        if origin:
+            exact, state = self.lanes(origin, destination or self.destination)
+            rate = rates.get(exact)
+            if rate is None and state is not None:
+                rate = rates.get(state)
+            if rate is not None:
+                return rate
+        return overall
+
+    def pallets(self, title: Optional[str]) -> float:
+        count = self._title_pallets.get(title)
+        if count is None:
+            count = pallet_count(title)
+            if len(self._title_pallets) >= 65536:
+                self._title_pallets.clear()
+            self._title_pallets[title] = count
+        return count
+
+    def estimate(self, batch: AuctionBatch, destination: Optional[str] = None) -> np.ndarray:
+        """
+        Shipping cost per lot, NaN where nothing is known yet
+
+        Observed ``shipping_cost`` values are passed through unchanged.
+        """
+        locations, codes = batch.categories("location")
+        base = np.full(len(locations), np.nan)
+        per_pallet = np.full(len(locations), np.nan)
+        for i, location in enumerate(locations):
+            rate = self.rate_for(location, destination)
+            if rate is not None:
+                base[i], per_pallet[i] = rate.base, rate.per_pallet
+        pallets = np.fromiter((self.pallets(t) for t in batch.column("title")),
+                              dtype=np.float64, count=len(batch))
+        estimated = base[codes] + per_pallet[codes] * pallets
+        known = batch.array("shipping_cost")
+        return np.where(np.isnan(known), estimated, known)
+
+    def landed_cost_per_unit(self, batch: AuctionBatch, destination: Optional[str] = None) -> np.ndarray:
+        """(current bid + shipping) / units, NaN when units or shipping are unknown"""
+        units, valid = batch.array("total_units"), batch.valid("total_units")
+        total = batch.array("current_bid") + self.estimate(batch, destination)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(valid & (units > 0), total / units, np.nan)
+
+    def rank(self, batch: AuctionBatch, top: Optional[int] = None,
+             destination: Optional[str] = None) -> np.ndarray:
+        """Row indices ordered by landed cost per unit, cheapest first and unknowns last"""
+        order = np.argsort(self.landed_cost_per_unit(batch, destination), kind="stable")
+        return order if top is None else order[:top]
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        if not path:
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            lanes = [{"origin": origin, "destination": destination, "quotes": list(quotes)}
+                     for (origin, destination), quotes in self._observations.items()]
+        with open(path, "w") as f:
+            json.dump({"lanes": lanes}, f)
+
+    def load(self, path: str) -> None:
+        try:
+            with open(path) as f:
+                lanes = json.load(f).get("lanes", [])
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable shipping rates {path}: {str(e)}")
+            return
+        with self._lock:
+            for lane in lanes:
+                quotes = deque((tuple(q) for q in lane["quotes"]), maxlen=self.max_observations)
+                self._observations[(lane["origin"], lane["destination"])] = quotes
+            self._rates = None
@@ -1,43 +1,57 @@
 # Amazon marketplace parser 
+import logging
+import re
 from typing import List, Optional
-from bs4 import BeautifulSoup
-from datetime import datetime
 from .base_parser import BaseParser
 from ..models.auction import Auction
 
+logger = logging.getLogger(__name__)
+
+_AUCTION_URL_RE = re.compile(r"/auction/auction/view/id/(\d+)/")
+_ORIGIN_RE = re.compile(r"^([^,]+,\s*[A-Z]{2})\b")
+
 class AmazonParser(BaseParser):
     """Parser implementation for Amazon B-Stock marketplace"""
+
+    marketplace = "amazon"
     
     def parse_auction_list(self, html: str) -> List[Auction]:
-        soup = BeautifulSoup(html, 'html.parser')
+        backend = self.backend
+        root = backend.parse(html)
         auctions = []
         
-        for item in soup.select('li[id^="auction-"]'):
+        for item in backend.select(root, 'li[id^="auction-"]'):
+            auction_id = None
             try:
-                auction_id = item['id'].replace('auction-', '')
-                title = item.select_one('.product-name a').text.strip()
-                current_bid = self._parse_price(item.select_one('.current_bid .price strong').text)
-                cost_per_unit = self._parse_price(item.select_one('.cost_per_unit .price strong').text)
-                total_bids = int(item.select_one('.bids_number strong span').text)
+                auction_id = backend.attr(item, 'id').replace('auction-', '')
+                title = self._select_text(item, '.product-name a').strip()
+                current_bid = self._parse_price(self._select_text(item, '.current_bid .price strong'))
+                cost_per_unit = self._parse_price(self._select_text(item, '.cost_per_unit .price strong'))
+                total_bids = int(self._select_text(item, '.bids_number strong span'))
                 
                 # Extract end time
-                end_time_elem = item.select_one('.time_remaining span[data-end-time]')
-                end_time = self._parse_datetime(end_time_elem['data-end-time']) if end_time_elem else None
+                end_time_elem = backend.select_one(item, '.time_remaining span[data-end-time]')
+                end_time = self._parse_datetime(backend.attr(end_time_elem, 'data-end-time')) if end_time_elem is not None else None
                 
+                # Units, condition, retail and location are packed into the title;
+                # what it lacks stays None and low-confidence titles get
+                # confirmed from the detail page
+                fields = self.title_extractor.extract(title)
+
                 # Create auction object
                 auction = Auction(
                     auction_id=auction_id,
                     title=title,
                     current_bid=current_bid,
-                    total_units=0,  # Will be updated from detail page
-                    condition="",   # Will be updated from detail page
-                    retail_value=0, # Will be updated from detail page
-                    location="",    # Will be updated from detail page
+                    total_units=fields.total_units,
+                    condition=fields.condition,
+                    retail_value=fields.retail_value,
+                    location=fields.location,
                     end_time=end_time,
                     total_bids=total_bids,
                     cost_per_unit=cost_per_unit,
-                    marketplace="amazon",
-                    source_url=f"https://bstock.com/amazon/auction/auction/view/id/{auction_id}/"
+                    marketplace=self.marketplace,
+                    source_url=f"https://bstock.com/{self.marketplace}/auction/auction/view/id/{auction_id}/"
                 )
                 auctions.append(auction)
             except Exception as e:
@@ -47,11 +61,52 @@ class AmazonParser(BaseParser):
         return auctions
     
     def parse_auction_detail(self, html: str) -> Optional[Auction]:
-        """Parse Amazon auction detail page"""
-        soup = BeautifulSoup(html, 'html.parser')
+        """
+        Parse Amazon auction detail page
+
+        The page names its auction only in its URL; when that is not in the
+        markup ``auction_id`` is left empty for the caller to fill in.
+        """
+        backend = self.backend
+        root = backend.parse(html)
         try:
-            # Implementation of detail page parsing
-            pass
+            match = _AUCTION_URL_RE.search(html)
+            auction_id = match.group(1) if match else ""
+            title = " ".join(self._select_text(root, '.product-name h1').split())
+            current_bid = self._parse_price(self._select_text(root, '#current_bid_amount'))
+            bids = backend.select_one(root, '#bid_number')
+            total_bids = int(backend.text(bids)) if bids is not None else None
+            shipping = backend.select_one(root, '#shipping_total_cost .price')
+            shipping_cost = self._parse_price(backend.text(shipping)) if shipping is not None else None
+            unit_price = backend.select_one(root, '#unit_per_price_span')
+            cost_per_unit = self._parse_price(backend.text(unit_price)) if unit_price is not None else None
+            end_time_elem = backend.select_one(root, '#auction_end_time')
+            end_time = self._parse_datetime(backend.text(end_time_elem)) if end_time_elem is not None else None
+
+            fields = self.title_extractor.extract(title)
+            # Target pages name the pickup address ("Upper Marlboro, MD, 20774")
+            location = fields.location
+            origin = backend.select_one(root, '#auction_origin')
+            if origin is not None:
+                origin_match = _ORIGIN_RE.match(" ".join(backend.text(origin).split()))
+                if origin_match:
+                    location = origin_match.group(1)
+
+            return Auction(
+                auction_id=auction_id,
+                title=title,
+                current_bid=current_bid,
+                total_units=fields.total_units,
+                condition=fields.condition,
+                retail_value=fields.retail_value,
+                location=location,
+                end_time=end_time,
+                total_bids=total_bids,
+                cost_per_unit=cost_per_unit,
+                shipping_cost=shipping_cost,
+                marketplace=self.marketplace,
+                source_url=f"https://bstock.com/{self.marketplace}/auction/auction/view/id/{auction_id}/"
+            )
         except Exception as e:
             logger.error(f"Error parsing auction detail: {str(e)}")
-            return None
\ No newline at end of file
+            return None
@@ -0,0 +1,144 @@
+# HTML parsing backends
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Union
+import logging
+
+try:
+    import lxml.html
+    from lxml.cssselect import CSSSelector
+except ImportError:  # pragma: no cover - exercised only without lxml installed
+    lxml = None
+    CSSSelector = None
+
+logger = logging.getLogger(__name__)
+
+
+class ParserBackend(ABC):
+    """
+    Minimal DOM interface used by the marketplace parsers.
+
+    Parsers only ever build a document, run CSS selectors against nodes and
+    read text or attributes, so any HTML engine offering those operations
+    can be swapped in without touching parser logic.
+    """
+
+    name: str = ""
+
+    @abstractmethod
+    def parse(self, html: str) -> Any:
+        """Parse an HTML document and return its root node"""
+        pass
+
+    @abstractmethod
+    def select(self, node: Any, selector: str) -> List[Any]:
+        """Return all descendants of ``node`` matching a CSS selector"""
+        pass
+
+    def select_one(self, node: Any, selector: str) -> Optional[Any]:
+        """Return the first descendant of ``node`` matching a CSS selector"""
+        matches = self.select(node, selector)
+        return matches[0] if matches else None
+
+    @abstractmethod
+    def text(self, node: Any) -> str:
+        """Concatenated text content of a node"""
+        pass
+
+    @abstractmethod
+    def attr(self, node: Any, name: str) -> Optional[str]:
+        """Attribute value of a node, or None if missing"""
+        pass
+
+
+class BeautifulSoupBackend(ParserBackend):
+    """Pure-Python backend using BeautifulSoup's ``html.parser``"""
+
+    name = "bs4"
+
+    def __init__(self, features: str = "html.parser"):
+        # Imported here so processes on the lxml backend never load bs4
+        from bs4 import BeautifulSoup
+        self._soup = BeautifulSoup
+        self.features = features
+
+    def parse(self, html: str) -> Any:
+        return self._soup(html, self.features)
+
+    def select(self, node: Any, selector: str) -> List[Any]:
+        return node.select(selector)
+
+    def select_one(self, node: Any, selector: str) -> Optional[Any]:
+        return node.select_one(selector)
+
+    def text(self, node: Any) -> str:
+        return node.text
+
+    def attr(self, node: Any, name: str) -> Optional[str]:
+        return node.get(name)
+
+
+class LxmlBackend(ParserBackend):
+    """
+    C-backed backend using lxml with selectors compiled to XPath once.
+
+    ``CSSSelector`` translation is the expensive part of a lookup, so every
+    selector string is compiled on first use and reused for every node.
+    """
+
+    name = "lxml"
+
+    def __init__(self):
+        if CSSSelector is None:
+            raise ImportError("lxml and cssselect are required for the lxml backend")
+        self._compiled: Dict[str, Any] = {}
+
+    def compile(self, selector: str) -> Any:
+        compiled = self._compiled.get(selector)
+        if compiled is None:
+            compiled = CSSSelector(selector)
+            self._compiled[selector] = compiled
+        return compiled
+
+    def parse(self, html: str) -> Any:
+        if not html or not html.strip():
+            # lxml refuses empty documents; BeautifulSoup returns an empty tree
+            html = "<html></html>"
+        return lxml.html.document_fromstring(html)
+
+    def select(self, node: Any, selector: str) -> List[Any]:
+        return self.compile(selector)(node)
+
+    def text(self, node: Any) -> str:
+        return node.text_content()
+
+    def attr(self, node: Any, name: str) -> Optional[str]:
+        return node.get(name)
+
+
+BACKENDS = {
+    BeautifulSoupBackend.name: BeautifulSoupBackend,
+    LxmlBackend.name: LxmlBackend,
+}
+
+
+def default_backend_name() -> str:
+    """Fastest backend available in this environment"""
+    return LxmlBackend.name if CSSSelector is not None else BeautifulSoupBackend.name
+
+
+def get_backend(backend: Union[str, ParserBackend, None] = None) -> ParserBackend:
+    """
+    Resolve a backend by name, falling back to BeautifulSoup when lxml is missing
+
+    Args:
+        backend: Backend instance, name ("lxml" or "bs4"), or None for the default
+    """
+    if isinstance(backend, ParserBackend):
+        return backend
+    name = backend or default_backend_name()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown parser backend: {name}")
+    if name == LxmlBackend.name and CSSSelector is None:
+        logger.warning("lxml is not installed, falling back to BeautifulSoup")
+        name = BeautifulSoupBackend.name
+    return BACKENDS[name]()
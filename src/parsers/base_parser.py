@@ -1,12 +1,37 @@
 # Abstract base parser 
 
 from abc import ABC, abstractmethod
-from typing import List, Optional
-from bs4 import BeautifulSoup
+from datetime import datetime
+from typing import List, Optional, Union
+from .backends import ParserBackend, get_backend
+from .memo import ParseCache
+from .title import TitleExtractor
 from ..models.auction import Auction
+from ..models.batch import AuctionBatch
 
 class BaseParser(ABC):
     """Abstract base class for marketplace-specific parsers"""
+
+    marketplace = ""
+    # Bump when parsing output changes so persisted parse caches are not reused
+    parser_version = 4
+
+    def __init__(self, backend: Union[str, ParserBackend, None] = None,
+                 cache: Optional[ParseCache] = None):
+        """
+        Args:
+            backend: HTML backend name ("lxml" or "bs4") or instance; defaults to
+                lxml when installed, otherwise BeautifulSoup
+            cache: Optional ``ParseCache`` used by ``parse_listing``/``parse_detail``
+        """
+        self.backend = get_backend(backend)
+        self.cache = cache
+        self.title_extractor = TitleExtractor()
+
+    @classmethod
+    def cache_namespace(cls, kind: str) -> str:
+        """Prefix separating cached results by parser, page kind and version"""
+        return f"{cls.__name__}:{cls.marketplace}:{kind}:v{cls.parser_version}"
     
     @abstractmethod
     def parse_auction_list(self, html: str) -> List[Auction]:
@@ -17,6 +42,40 @@ class BaseParser(ABC):
     def parse_auction_detail(self, html: str) -> Optional[Auction]:
         """Parse individual auction detail page"""
         pass
+
+    def parse_auction_batch(self, html: str) -> AuctionBatch:
+        """Parse auction listing page into a columnar batch"""
+        return AuctionBatch.from_auctions(self.parse_auction_list(html))
+
+    def parse_listing(self, html: str) -> AuctionBatch:
+        """Parse a listing page, reusing the cached result for a byte-identical page"""
+        if self.cache is None:
+            return self.parse_auction_batch(html)
+        key = ParseCache.key(self.cache_namespace("listing"), html)
+        batch = self.cache.get(key)
+        if batch is None:
+            batch = self.parse_auction_batch(html)
+            self.cache.put(key, batch)
+        return batch
+
+    def parse_detail(self, html: str) -> Optional[Auction]:
+        """Parse a detail page, reusing the cached result for a byte-identical page"""
+        if self.cache is None:
+            return self.parse_auction_detail(html)
+        key = ParseCache.key(self.cache_namespace("detail"), html)
+        batch = self.cache.get(key)
+        if batch is None:
+            auction = self.parse_auction_detail(html)
+            batch = AuctionBatch.from_auctions([auction] if auction is not None else [])
+            self.cache.put(key, batch)
+        return batch[0] if len(batch) else None
+
+    def _select_text(self, node, selector: str) -> str:
+        """Helper method returning the text of the first match, raising if absent"""
+        match = self.backend.select_one(node, selector)
+        if match is None:
+            raise ValueError(f"Missing element: {selector}")
+        return self.backend.text(match)
     
     def _parse_price(self, price_str: str) -> float:
         """Helper method to parse price strings"""
@@ -30,4 +89,4 @@ class BaseParser(ABC):
         try:
             return datetime.strptime(date_str.strip(), '%a %b %d, %Y %I:%M:%S %p')
         except (ValueError, AttributeError):
-            return None
\ No newline at end of file
+            return None
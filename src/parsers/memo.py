@@ -0,0 +1,155 @@
+# Parse-result memoization
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Union
+import logging
+
+from ..models.batch import AuctionBatch
+
+logger = logging.getLogger(__name__)
+
+
+def body_digest(body: Union[str, bytes]) -> str:
+    """Fast 128-bit digest of a page body"""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class ParseCache:
+    """
+    Bounded LRU cache of parse results keyed by a hash of the page body.
+
+    While an auction is polled hard near its close, most fetches return
+    the same bytes as the previous one; those skip parsing entirely.
+    Results are held as ``AuctionBatch`` so every hit hands out fresh
+    ``Auction`` objects that callers may modify freely.
+
+    With ``path`` set, entries are also written to a SQLite file that
+    several processes can share; it keeps at most ``disk_max_entries``
+    rows, dropping the least recently used.
+    """
+
+    def __init__(self, max_entries: int = 2048, path: Optional[str] = None,
+                 disk_max_entries: int = 100000):
+        self.max_entries = max_entries
+        self.path = path
+        self.disk_max_entries = disk_max_entries
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, AuctionBatch]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._disk_writes = 0
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_results_accessed_at ON results (accessed_at)")
+
+    @classmethod
+    def from_settings(cls, settings) -> "ParseCache":
+        return cls(settings.PARSE_CACHE_ENTRIES, path=settings.PARSE_CACHE_PATH or None)
+
+    @staticmethod
+    def key(namespace: str, body: Union[str, bytes]) -> str:
+        """Cache key for a body parsed by one parser (see ``BaseParser.cache_namespace``)"""
+        return f"{namespace}:{body_digest(body)}"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / lookups if lookups else 0.0
+
+    def get(self, key: str) -> Optional[AuctionBatch]:
+        with self._lock:
+            batch = self._entries.get(key)
+            if batch is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return batch
+        if self._conn is not None:
+            with self._lock:
+                row = self._conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            if row is not None:
+                batch = pickle.loads(row[0])
+                self._remember(key, batch)
+                with self._lock:
+                    self.disk_hits += 1
+                return batch
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, batch: AuctionBatch) -> None:
+        self._remember(key, batch)
+        if self._conn is not None:
+            value = pickle.dumps(batch, protocol=pickle.HIGHEST_PROTOCOL)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results (key, value, accessed_at) VALUES (?, ?, ?)",
+                    (key, value, time.time()),
+                )
+                self._disk_writes += 1
+                # Trimming scans the index, so only do it every so often
+                if self._disk_writes % 256 == 0:
+                    self._trim_disk()
+
+    def _remember(self, key: str, batch: AuctionBatch) -> None:
+        with self._lock:
+            self._entries[key] = batch
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _trim_disk(self) -> None:
+        count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        excess = count - self.disk_max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM results WHERE key IN "
+                "(SELECT key FROM results ORDER BY accessed_at LIMIT ?)", (excess,)
+            )
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM results")
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,141 @@
+# Process-pool parse stage
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Type, Union
+import logging
+
+from .amazon_parser import AmazonParser
+from .base_parser import BaseParser
+from .memo import ParseCache
+from .target_parser import TargetParser
+from ..models.auction import Auction
+from ..models.batch import AuctionBatch
+
+logger = logging.getLogger(__name__)
+
+PARSERS: Dict[str, Type[BaseParser]] = {
+    AmazonParser.marketplace: AmazonParser,
+    TargetParser.marketplace: TargetParser,
+}
+
+LISTING = "listing"
+DETAIL = "detail"
+
+# Parser instances owned by the current worker process
+_worker_parsers: Dict[str, BaseParser] = {}
+
+
+def _init_worker(backend: Optional[str]) -> None:
+    """Create one parser per marketplace when a worker process starts"""
+    _worker_parsers.clear()
+    for marketplace, parser_cls in PARSERS.items():
+        _worker_parsers[marketplace] = parser_cls(backend=backend)
+
+
+def _parse_in_worker(marketplace: str, kind: str, body: bytes, encoding: str) -> AuctionBatch:
+    """
+    Decode and parse one page inside a worker process
+
+    Results travel back as an AuctionBatch, which pickles as a few column
+    buffers instead of one object graph per auction.
+    """
+    parser = _worker_parsers[marketplace]
+    html = body.decode(encoding, errors="replace")
+    if kind == LISTING:
+        return parser.parse_auction_batch(html)
+    auction = parser.parse_auction_detail(html)
+    return AuctionBatch.from_auctions([auction] if auction is not None else [])
+
+
+class ParsePool:
+    """
+    Runs marketplace parsers in a pool of worker processes.
+
+    Raw page bytes are shipped to the workers so parsing never blocks the
+    event loop and scales with cores. At most ``max_pending`` pages may be
+    queued or in progress; further ``parse_*`` calls wait, which pushes
+    back on fetchers whenever the workers fall behind.
+
+    With a ``ParseCache``, pages byte-identical to one parsed before are
+    answered in this process without reaching a worker.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 backend: Optional[str] = None, mp_context: str = "spawn",
+                 cache: Optional[ParseCache] = None):
+        """
+        Args:
+            max_workers: Worker processes (defaults to the CPU count)
+            max_pending: Pages allowed in the pool at once (defaults to 4 per worker)
+            backend: Parser backend name passed to every worker
+            mp_context: Multiprocessing start method; spawn avoids forking a
+                process that already runs an event loop and network threads
+            cache: Optional ``ParseCache`` consulted before submitting a page
+        """
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.max_pending = max_pending or self.max_workers * 4
+        self.backend = backend
+        self.cache = cache
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(mp_context),
+            initializer=_init_worker,
+            initargs=(backend,),
+        )
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Pages currently queued or being parsed"""
+        return self._pending
+
+    async def _submit(self, marketplace: str, kind: str, body: Union[bytes, str],
+                      encoding: str) -> AuctionBatch:
+        if marketplace not in PARSERS:
+            raise ValueError(f"Unsupported marketplace: {marketplace}")
+        if isinstance(body, str):
+            body, encoding = body.encode("utf-8"), "utf-8"
+
+        key = None
+        if self.cache is not None:
+            key = ParseCache.key(f"{PARSERS[marketplace].cache_namespace(kind)}:{encoding}", body)
+            # A shared cache reads SQLite and unpickles; keep that off the event loop
+            batch = await asyncio.to_thread(self.cache.get, key)
+            if batch is not None:
+                return batch
+
+        async with self._slots:
+            self._pending += 1
+            try:
+                loop = asyncio.get_running_loop()
+                batch = await loop.run_in_executor(
+                    self._executor, _parse_in_worker, marketplace, kind, body, encoding
+                )
+            finally:
+                self._pending -= 1
+        if key is not None:
+            await asyncio.to_thread(self.cache.put, key, batch)
+        return batch
+
+    async def parse_listing(self, marketplace: str, body: Union[bytes, str],
+                            encoding: str = "utf-8") -> AuctionBatch:
+        """Parse a listing page in a worker; waits while the pool is saturated"""
+        return await self._submit(marketplace, LISTING, body, encoding)
+
+    async def parse_detail(self, marketplace: str, body: Union[bytes, str],
+                           encoding: str = "utf-8") -> Optional[Auction]:
+        """Parse a detail page in a worker; waits while the pool is saturated"""
+        auctions = await self._submit(marketplace, DETAIL, body, encoding)
+        return auctions[0] if auctions else None
+
+    def close(self, wait: bool = True) -> None:
+        """Shut down the worker processes"""
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
@@ -1 +1,12 @@
 # Target marketplace parser 
+from .amazon_parser import AmazonParser
+
+class TargetParser(AmazonParser):
+    """
+    Parser implementation for Target B-Stock marketplace
+
+    Both storefronts run on the same B-Stock platform, so listing pages share
+    the Amazon markup; only the marketplace name and URLs differ.
+    """
+
+    marketplace = "target"
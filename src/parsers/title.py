@@ -0,0 +1,109 @@
+# Lot title field extraction
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from ..models.auction import Auction
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_UNITS_RE = re.compile(r"(?:^|,\s)(?:Est\.\s*)?(\d{1,3}(?:,\d{3})+|\d+)\s+Units?(?=,|$)", re.I)
+_CONDITION_RE = re.compile(r"(?:^|,\s)([^,]+?)\s+Condition(?=,|$)", re.I)
+_RETAIL_RE = re.compile(r"(?:^|,\s)Ext\.?\s*Retail\s*\$\s*(\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?)(?=,|$)", re.I)
+# Whatever follows the retail value: "North Las Vegas, NV - West Coast"
+_LOCATION_RE = re.compile(r"^([A-Za-z][A-Za-z .'-]*?),\s([A-Z]{2})(?:\s+-\s+([^,]+))?$")
+
+
+@dataclass(slots=True)
+class TitleFields:
+    """
+    Fields packed into a B-Stock lot title
+
+    ``confident`` is set only when units, condition, retail value and a
+    ``City, ST`` location were each found exactly once in the usual
+    positions; anything else should be confirmed from the detail page.
+    """
+    total_units: Optional[int] = None
+    condition: Optional[str] = None
+    retail_value: Optional[float] = None
+    location: Optional[str] = None
+    region: Optional[str] = None
+    confident: bool = False
+
+    def missing(self) -> List[str]:
+        return [name for name in ("total_units", "condition", "retail_value", "location")
+                if getattr(self, name) is None]
+
+
+class TitleExtractor:
+    """
+    Pulls units, condition, retail value and location out of lot titles.
+
+    Titles look like ``"Est. 2 Pallets of Apparel & More, 974 Units, Used -
+    Good Condition, Ext. Retail $44,826, North Las Vegas, NV - West Coast"``;
+    the segment order varies between storefronts, so each field has its own
+    precompiled pattern anchored to comma boundaries. The same lot title
+    is seen on every sweep until the auction closes, so results are kept
+    in a bounded LRU keyed by the raw title.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, TitleFields]" = OrderedDict()
+
+    def extract(self, title: str) -> TitleFields:
+        fields = self._cache.get(title)
+        if fields is not None:
+            self._cache.move_to_end(title)
+            return fields
+        fields = self._extract(title)
+        self._cache[title] = fields
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return fields
+
+    def extract_many(self, titles: Iterable[str]) -> List[TitleFields]:
+        return [self.extract(title) for title in titles]
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def _extract(self, title: str) -> TitleFields:
+        text = _WHITESPACE_RE.sub(" ", title or "").strip()
+        fields = TitleFields()
+        ambiguous = False
+
+        units = _UNITS_RE.findall(text)
+        if units:
+            fields.total_units = int(units[0].replace(",", ""))
+            ambiguous |= len(units) > 1
+
+        conditions = _CONDITION_RE.findall(text)
+        if conditions:
+            fields.condition = conditions[0]
+            ambiguous |= len(conditions) > 1
+
+        retail = list(_RETAIL_RE.finditer(text))
+        if retail:
+            fields.retail_value = float(retail[0].group(1).replace(",", ""))
+            ambiguous |= len(retail) > 1
+            location = _LOCATION_RE.match(text[retail[-1].end():].lstrip(", "))
+            if location:
+                fields.location = f"{location.group(1)}, {location.group(2)}"
+                fields.region = location.group(3)
+
+        fields.confident = not ambiguous and not fields.missing()
+        return fields
+
+    def apply(self, auction: Auction) -> TitleFields:
+        """Fill the title-derived fields an auction is missing; returns what was extracted"""
+        fields = self.extract(auction.title)
+        if not auction.total_units and fields.total_units is not None:
+            auction.total_units = fields.total_units
+        if not auction.condition and fields.condition is not None:
+            auction.condition = fields.condition
+        if not auction.retail_value and fields.retail_value is not None:
+            auction.retail_value = fields.retail_value
+        if not auction.location and fields.location is not None:
+            auction.location = fields.location
+        return fields
@@ -0,0 +1,263 @@
+# Raw page archive
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+LISTING = "listing"
+DETAIL = "detail"
+
+_DETAIL_URL_RE = re.compile(r"/auction/auction/view/id/[^/]+")
+_MARKETPLACE_URL_RE = re.compile(r"^[a-z]+://[^/]+/([a-z]+)(?:/|\?|$)")
+
+
+def page_kind(url: str) -> str:
+    """Classify a fetched URL as a detail or listing page"""
+    return DETAIL if _DETAIL_URL_RE.search(url) else LISTING
+
+
+def url_marketplace(url: str) -> Optional[str]:
+    """Marketplace from the first path segment, e.g. ``https://bstock.com/amazon/...``"""
+    match = _MARKETPLACE_URL_RE.match(url)
+    return match.group(1) if match else None
+
+
+@dataclass
+class ArchivedPage:
+    """Index entry for one fetch of a URL"""
+    page_id: int
+    url: str
+    fetched_at: float
+    marketplace: Optional[str]
+    kind: str
+    status: int
+    content_hash: str
+
+
+class PageArchive:
+    """
+    Append-only archive of raw fetched pages.
+
+    Bodies are compressed one zstd frame each and appended to segment files
+    (``segment-000001.zst``, ...) that roll over at ``segment_max_bytes``.
+    A SQLite index maps every fetch (URL, fetch time) to the SHA-256 of its
+    body, and each distinct body to its segment offset, so a page fetched
+    unchanged a thousand times is stored once. Segments are never
+    rewritten, which keeps appends cheap and makes the archive safe to copy
+    while it is being written. Requires the ``zstandard`` package.
+    """
+
+    INDEX_NAME = "index.sqlite3"
+
+    def __init__(self, directory: str, segment_max_bytes: int = 256 * 1024 * 1024, level: int = 3):
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("zstandard is required for the page archive") from e
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, self.INDEX_NAME),
+                                     check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS blobs (
+                content_hash TEXT PRIMARY KEY,
+                segment INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                raw_length INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                page_id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                marketplace TEXT,
+                kind TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                content_hash TEXT NOT NULL REFERENCES blobs (content_hash)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_pages_url_fetched_at ON pages (url, fetched_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_pages_fetched_at ON pages (fetched_at)")
+        segment = self._conn.execute("SELECT MAX(segment) FROM blobs").fetchone()[0]
+        self._segment = segment or 1
+        self._file = None
+        self._readers = {}
+
+    @classmethod
+    def from_settings(cls, settings) -> "PageArchive":
+        return cls(settings.PAGE_ARCHIVE_DIR)
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment-{segment:06d}.zst")
+
+    def _writer(self):
+        if self._file is None:
+            self._file = open(self._segment_path(self._segment), "ab")
+        if self._file.tell() >= self.segment_max_bytes:
+            self._file.close()
+            self._segment += 1
+            self._file = open(self._segment_path(self._segment), "ab")
+        return self._file
+
+    def store(self, url: str, body: Union[str, bytes], fetched_at: Optional[float] = None,
+              marketplace: Optional[str] = None, kind: Optional[str] = None, status: int = 200) -> str:
+        """
+        Archive one fetched page
+
+        Args:
+            url: Page URL
+            body: Response body; text is stored UTF-8 encoded
+            fetched_at: Unix fetch time (defaults to now)
+            marketplace: Marketplace the page belongs to (inferred from the URL if omitted)
+            kind: ``listing`` or ``detail`` (inferred from the URL if omitted)
+            status: HTTP status
+
+        Returns:
+            SHA-256 of the body
+        """
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        content_hash = hashlib.sha256(body).hexdigest()
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        marketplace = marketplace or url_marketplace(url)
+        kind = kind or page_kind(url)
+
+        with self._lock:
+            known = self._conn.execute(
+                "SELECT 1 FROM blobs WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+            self._conn.execute("BEGIN")
+            try:
+                if not known:
+                    frame = self._compressor.compress(body)
+                    f = self._writer()
+                    offset = f.tell()
+                    f.write(frame)
+                    f.flush()
+                    self._conn.execute(
+                        "INSERT INTO blobs (content_hash, segment, offset, length, raw_length) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (content_hash, self._segment, offset, len(frame), len(body)),
+                    )
+                self._conn.execute(
+                    "INSERT INTO pages (url, fetched_at, marketplace, kind, status, content_hash) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, fetched_at, marketplace, kind, status, content_hash),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return content_hash
+
+    def read(self, content_hash: str) -> bytes:
+        """Raw body for a content hash"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT segment, offset, length FROM blobs WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(content_hash)
+            segment, offset, length = row
+            if self._file is not None:
+                self._file.flush()
+            reader = self._readers.get(segment)
+            if reader is None:
+                reader = self._readers[segment] = open(self._segment_path(segment), "rb")
+            reader.seek(offset)
+            frame = reader.read(length)
+        return self._decompressor.decompress(frame)
+
+    def latest(self, url: str) -> Optional[bytes]:
+        """Most recently archived body for a URL"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash FROM pages WHERE url = ? ORDER BY fetched_at DESC LIMIT 1", (url,)
+            ).fetchone()
+        return self.read(row[0]) if row else None
+
+    def history(self, url: str) -> List[ArchivedPage]:
+        """Every archived fetch of a URL, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT page_id, url, fetched_at, marketplace, kind, status, content_hash "
+                "FROM pages WHERE url = ? ORDER BY fetched_at", (url,)
+            ).fetchall()
+        return [ArchivedPage(*row) for row in rows]
+
+    def pages(self, marketplace: Optional[str] = None, kind: Optional[str] = None,
+              since: Optional[float] = None, until: Optional[float] = None,
+              batch_size: int = 1000) -> Iterator[ArchivedPage]:
+        """
+        Iterate archived fetches in the order they were archived
+
+        Index rows are read ``batch_size`` at a time, so the iterator stays
+        small however large the archive is.
+        """
+        clauses, params = ["page_id > ?"], [0]
+        for column, op, value in (("marketplace", "=", marketplace), ("kind", "=", kind),
+                                  ("fetched_at", ">=", since), ("fetched_at", "<", until)):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        sql = (
+            "SELECT page_id, url, fetched_at, marketplace, kind, status, content_hash FROM pages "
+            f"WHERE {' AND '.join(clauses)} ORDER BY page_id LIMIT {int(batch_size)}"
+        )
+        while True:
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield ArchivedPage(*row)
+            params[0] = rows[-1][0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            pages = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            blobs, raw, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_length), 0), COALESCE(SUM(length), 0) FROM blobs"
+            ).fetchone()
+        return {
+            "pages": pages,
+            "bodies": blobs,
+            "raw_bytes": raw,
+            "stored_bytes": stored,
+            "segments": self._segment,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            for reader in self._readers.values():
+                reader.close()
+            self._readers.clear()
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
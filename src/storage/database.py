@@ -1,67 +1,102 @@
-# Database operations 
+# Database operations
+"""
+SQLAlchemy models plus the process-wide engine and session factory.
 
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import QueuePool
-import os
-from dotenv import load_dotenv
+Nothing connects, and SQLAlchemy is not even imported, at import time: the
+engine is built from ``get_settings()`` the first time ``get_engine()`` (or
+the ``engine``/``SessionLocal`` attributes) is used, and the models in
+``models`` load the first time ``Base``, ``AuctionDB`` or
+``AuctionSnapshotDB`` is looked up here. Parser workers and short CLI runs
+that never touch the database don't pay for it or need the DB_* variables
+set.
+"""
+import threading
 
-load_dotenv()
+_engine = None
+_session_factory = None
+_lock = threading.Lock()
 
-# Database URL construction
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_PORT = os.getenv("DB_PORT", "5432")
-DB_NAME = os.getenv("DB_NAME")
 
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+def create_db_engine(settings=None):
+    """
+    Build a pooled engine for ``settings.DATABASE_URL``
 
-# SQLAlchemy setup
-engine = create_engine(
-    DATABASE_URL,
-    poolclass=QueuePool,
-    pool_size=5,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_pre_ping=True
-)
+    Args:
+        settings: Settings to use; defaults to ``get_settings()``
+    """
+    if settings is None:
+        from config.settings import get_settings
+        settings = get_settings()
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import QueuePool
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return create_engine(
+        settings.DATABASE_URL,
+        poolclass=QueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=True
+    )
+
+
+def get_engine():
+    """Process-wide engine, created on first use"""
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                _engine = create_db_engine()
+    return _engine
+
+
+def get_session_factory():
+    """Session factory bound to ``get_engine()``, created on first use"""
+    global _session_factory
+    if _session_factory is None:
+        from sqlalchemy.orm import sessionmaker
+        engine = get_engine()
+        with _lock:
+            if _session_factory is None:
+                _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return _session_factory
+
+
+def dispose_engine() -> None:
+    """
+    Close pooled connections and forget the engine
+
+    Call after forking, or in tests that change settings; the next
+    ``get_engine()`` builds a fresh one.
+    """
+    global _engine, _session_factory
+    with _lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = None
+        _session_factory = None
+
+
+# Loaded from ``models`` on first access, which is what imports SQLAlchemy
+_MODELS = {"Base", "AuctionDB", "AuctionSnapshotDB"}
+
+
+def __getattr__(name: str):
+    # ``engine`` and ``SessionLocal`` used to be module globals built at import
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        return get_session_factory()
+    if name in _MODELS:
+        from . import models
+        return getattr(models, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-Base = declarative_base()
 
 # Dependency to get DB session
 def get_db():
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
     finally:
         db.close()
-
-# src/models/database_models.py
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
-from ..storage.database import Base
-from datetime import datetime
-
-class AuctionDB(Base):
-    __tablename__ = "auctions"
-
-    id = Column(Integer, primary_key=True, index=True)
-    auction_id = Column(String, unique=True, index=True)
-    marketplace = Column(String, index=True)
-    title = Column(String)
-    current_bid = Column(Float)
-    total_units = Column(Integer)
-    condition = Column(String)
-    retail_value = Column(Float)
-    location = Column(String)
-    end_time = Column(DateTime)
-    shipping_cost = Column(Float, nullable=True)
-    total_bids = Column(Integer, nullable=True)
-    cost_per_unit = Column(Float, nullable=True)
-    source_url = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
@@ -1 +1,293 @@
-# Data export handlers 
+# Data export handlers
+import csv
+import gzip
+import os
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+import logging
+
+from sqlalchemy import Float, Integer, DateTime, Select, Table, select
+
+from .models import AuctionDB, AuctionSnapshotDB
+
+logger = logging.getLogger(__name__)
+
+# Exportable tables and the timestamp column used for --since and partitioning
+TABLES: Dict[str, Tuple[Table, str]] = {
+    "auctions": (AuctionDB.__table__, "updated_at"),
+    "history": (AuctionSnapshotDB.__table__, "observed_at"),
+}
+
+
+def export_query(table: Table) -> Select:
+    """
+    Columns exported for a table
+
+    Tables without a ``marketplace`` column (the snapshot history) get the
+    auction's marketplace joined in, so they can be partitioned by it.
+    """
+    if "marketplace" in table.c or "auction_id" not in table.c:
+        return select(table)
+    auctions = AuctionDB.__table__
+    return (
+        select(table, auctions.c.marketplace)
+        .select_from(table.outerjoin(auctions, auctions.c.auction_id == table.c.auction_id))
+    )
+
+
+def stream_rows(engine, table: Table, time_column: str, since: Optional[datetime] = None,
+                chunk_size: int = 10000, inclusive: bool = False) -> Iterator[Sequence[Any]]:
+    """
+    Yield rows in chunks through a server-side cursor, oldest first
+
+    Only one chunk is held in memory at a time, however large the table.
+    Rows come ordered by ``time_column`` (NULLs last), so exporters see
+    each time partition in one run.
+
+    Args:
+        engine: SQLAlchemy engine
+        table: Table to read
+        time_column: Timestamp column filtered by ``since`` and ordered on
+        since: Only rows with ``time_column`` after this time
+        chunk_size: Rows fetched per round-trip
+        inclusive: Also include rows exactly at ``since``
+    """
+    time = table.c[time_column]
+    stmt = export_query(table)
+    if since is not None:
+        stmt = stmt.where(time >= since if inclusive else time > since)
+    stmt = stmt.order_by(time.asc().nulls_last())
+    with engine.connect() as connection:
+        result = connection.execution_options(
+            stream_results=True, max_row_buffer=chunk_size
+        ).execute(stmt)
+        for chunk in result.partitions(chunk_size):
+            yield chunk
+
+
+class Exporter(ABC):
+    """Incremental writer receiving rows one chunk at a time"""
+
+    def __init__(self, table: Table, time_column: str):
+        self.table = table
+        self.time_column = time_column
+        self.query_columns = list(export_query(table).selected_columns)
+        self.columns = [column.name for column in self.query_columns]
+        self.rows_written = 0
+
+    @abstractmethod
+    def write(self, rows: Sequence[Any]) -> None:
+        """Write one chunk of rows"""
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class CSVExporter(Exporter):
+    """Streams rows into a single gzip-compressed CSV file"""
+
+    def __init__(self, table: Table, time_column: str, path: str):
+        super().__init__(table, time_column)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._file = gzip.open(path, "wt", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.columns)
+
+    def write(self, rows: Sequence[Any]) -> None:
+        self._writer.writerows(rows)
+        self.rows_written += len(rows)
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+class ParquetExporter(Exporter):
+    """
+    Streams rows into Hive-style Parquet partitions
+
+    Files are laid out as ``marketplace=<m>/date=<YYYY-MM-DD>/part-<run>.parquet``
+    with the date taken from the table's timestamp column. As usual for Hive
+    layouts, ``marketplace`` lives in the directory name rather than the
+    files. Every run writes new part files, so incremental exports add to a
+    dataset without rewriting it. Rows arrive ordered by time, so the
+    writers of a day are closed as soon as a later day starts and only one
+    day's files are open at once. Requires pyarrow.
+    """
+
+    def __init__(self, table: Table, time_column: str, out_dir: str, run_id: Optional[str] = None):
+        super().__init__(table, time_column)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("pyarrow is required for Parquet exports") from e
+        self._pa = pa
+        self._pq = pq
+        self.out_dir = out_dir
+        self.run_id = run_id or datetime.utcnow().strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+        marketplace_index = self.columns.index("marketplace") if "marketplace" in self.columns else None
+        self._partition_index = (marketplace_index, self.columns.index(time_column))
+        self._file_columns = [i for i in range(len(self.columns)) if i != marketplace_index]
+        self.schema = pa.schema([
+            (column.name, self._arrow_type(column.type))
+            for i, column in enumerate(self.query_columns) if i in self._file_columns
+        ])
+        self._writers: Dict[Tuple[str, str], Any] = {}
+        self._day: Optional[str] = None
+        # Partitions already closed this run; reopening one starts a new part file
+        self._parts: Dict[Tuple[str, str], int] = {}
+
+    def _arrow_type(self, sql_type):
+        pa = self._pa
+        if isinstance(sql_type, Integer):
+            return pa.int64()
+        if isinstance(sql_type, Float):
+            return pa.float64()
+        if isinstance(sql_type, DateTime):
+            return pa.timestamp("us")
+        return pa.string()
+
+    def _partition(self, row: Sequence[Any]) -> Tuple[str, str]:
+        marketplace_index, time_index = self._partition_index
+        marketplace = row[marketplace_index] if marketplace_index is not None else None
+        timestamp = row[time_index]
+        return (
+            marketplace or "unknown",
+            timestamp.date().isoformat() if timestamp else "unknown",
+        )
+
+    def _writer(self, key: Tuple[str, str]):
+        writer = self._writers.get(key)
+        if writer is None:
+            marketplace, day = key
+            directory = os.path.join(self.out_dir, f"marketplace={marketplace}", f"date={day}")
+            os.makedirs(directory, exist_ok=True)
+            part = self._parts.get(key, 0)
+            suffix = f"-{part}" if part else ""
+            path = os.path.join(directory, f"part-{self.run_id}{suffix}.parquet")
+            writer = self._pq.ParquetWriter(path, self.schema, compression="zstd")
+            self._writers[key] = writer
+        return writer
+
+    def _close_writers(self) -> None:
+        for key, writer in self._writers.items():
+            writer.close()
+            self._parts[key] = self._parts.get(key, 0) + 1
+        self._writers.clear()
+
+    def write(self, rows: Sequence[Any]) -> None:
+        groups: Dict[Tuple[str, str], List[Sequence[Any]]] = {}
+        for row in rows:
+            groups.setdefault(self._partition(row), []).append(row)
+
+        for key, group in groups.items():
+            if key[1] != self._day:
+                # Rows are ordered by time, so earlier days are complete
+                self._close_writers()
+                self._day = key[1]
+            columns = list(zip(*group))
+            columns = [columns[i] for i in self._file_columns]
+            batch = self._pa.RecordBatch.from_arrays(
+                [self._pa.array(values, type=field.type) for values, field in zip(columns, self.schema)],
+                schema=self.schema,
+            )
+            self._writer(key).write_batch(batch)
+        self.rows_written += len(rows)
+
+    def close(self) -> None:
+        self._close_writers()
+
+
+@dataclass
+class Watermark:
+    """
+    Where an incremental export left off
+
+    ``time`` is the latest timestamp exported. The next export re-reads
+    from ``time - overlap``, so rows that committed late with an earlier
+    timestamp are still picked up; ``recent`` holds the keys of the rows
+    already exported inside that window, so they are not written twice.
+    """
+    time: Optional[datetime] = None
+    recent: Set[str] = field(default_factory=set)
+
+    def to_dict(self) -> dict:
+        return {"time": self.time.isoformat() if self.time else None, "recent": sorted(self.recent)}
+
+    @classmethod
+    def from_dict(cls, data) -> "Watermark":
+        if isinstance(data, str):
+            # Older state files held only the timestamp
+            return cls(datetime.fromisoformat(data))
+        time = data.get("time")
+        return cls(datetime.fromisoformat(time) if time else None, set(data.get("recent", ())))
+
+
+def row_keys(exporter: Exporter) -> List[int]:
+    """Indices of the columns identifying one version of a row: primary key plus timestamp"""
+    names = [column.name for column in exporter.table.primary_key.columns]
+    if exporter.time_column not in names:
+        names.append(exporter.time_column)
+    return [exporter.columns.index(name) for name in names]
+
+
+def export_table(engine, exporter: Exporter, since: Optional[datetime] = None,
+                 chunk_size: int = 10000, watermark: Optional[Watermark] = None,
+                 overlap: timedelta = timedelta(minutes=10)) -> Watermark:
+    """
+    Stream a table into an exporter
+
+    Args:
+        engine: SQLAlchemy engine
+        exporter: Destination
+        since: Only rows with a timestamp after this time
+        chunk_size: Rows fetched per round-trip
+        watermark: Continue from a previous export instead of ``since``
+        overlap: How far before the watermark to look for late commits
+
+    Returns:
+        Watermark to continue from next time
+    """
+    time_index = exporter.columns.index(exporter.time_column)
+    key_indices = row_keys(exporter)
+    seen: Set[str] = set()
+    if watermark is not None and watermark.time is not None:
+        since, inclusive, seen = watermark.time - overlap, True, watermark.recent
+    else:
+        inclusive = False
+    latest = watermark.time if watermark is not None else since
+    recent: Deque[Tuple[datetime, str]] = deque()
+
+    for chunk in stream_rows(engine, exporter.table, exporter.time_column, since, chunk_size, inclusive):
+        fresh = []
+        for row in chunk:
+            timestamp = row[time_index]
+            key = "|".join(str(row[i]) for i in key_indices)
+            if key not in seen:
+                fresh.append(row)
+            if timestamp is None:
+                continue
+            if latest is None or timestamp > latest:
+                latest = timestamp
+            recent.append((timestamp, key))
+            while recent[0][0] < latest - overlap:
+                recent.popleft()
+        if fresh:
+            exporter.write(fresh)
+        logger.debug(f"Exported {exporter.rows_written} rows")
+    return Watermark(latest, {key for timestamp, key in recent if timestamp >= latest - overlap})
@@ -0,0 +1,42 @@
+# Database models
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from sqlalchemy.orm import declarative_base
+from datetime import datetime
+
+Base = declarative_base()
+
+class AuctionDB(Base):
+    __tablename__ = "auctions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    auction_id = Column(String, unique=True, index=True)
+    marketplace = Column(String, index=True)
+    title = Column(String)
+    current_bid = Column(Float)
+    total_units = Column(Integer)
+    condition = Column(String)
+    retail_value = Column(Float)
+    location = Column(String)
+    end_time = Column(DateTime)
+    shipping_cost = Column(Float, nullable=True)
+    total_bids = Column(Integer, nullable=True)
+    cost_per_unit = Column(Float, nullable=True)
+    source_url = Column(String)
+    # When the page this row came from was fetched; replays never overwrite later observations
+    observed_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class AuctionSnapshotDB(Base):
+    """Append-only history of bid fields, range-partitioned by day on observed_at"""
+    __tablename__ = "auction_snapshots"
+    __table_args__ = (
+        Index("ix_auction_snapshots_observed_at", "observed_at", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (observed_at)"},
+    )
+
+    auction_id = Column(String, primary_key=True)
+    observed_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
+    current_bid = Column(Float)
+    total_bids = Column(Integer, nullable=True)
+    cost_per_unit = Column(Float, nullable=True)
@@ -0,0 +1,457 @@
+# Bulk auction writer
+import asyncio
+import csv
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Union
+import logging
+
+from ..models.auction import Auction
+from ..models.batch import AuctionBatch
+from ..utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Columns written from Auction objects, in COPY order
+COLUMNS = [
+    "auction_id",
+    "marketplace",
+    "title",
+    "current_bid",
+    "total_units",
+    "condition",
+    "retail_value",
+    "location",
+    "end_time",
+    "shipping_cost",
+    "total_bids",
+    "cost_per_unit",
+    "source_url",
+]
+
+# Staged rows also carry when their page was fetched; NULL means now. It is
+# kept in auctions.observed_at, and replayed pages pass the archive time so
+# they never overwrite rows observed later. updated_at is always the write time.
+STAGE_COLUMNS = COLUMNS + ["observed_at"]
+
+# Fields that listing pages leave NULL when the title does not give them; a
+# NULL must not erase a value previously filled in from a detail page
+PRESERVE_ON_NULL = {
+    "total_units", "condition", "retail_value", "location",
+    "shipping_cost", "total_bids", "cost_per_unit",
+}
+
+STAGE_TABLE = "auctions_stage"
+
+CREATE_STAGE_SQL = f"""
+CREATE TEMP TABLE {STAGE_TABLE} (
+    auction_id VARCHAR PRIMARY KEY,
+    marketplace VARCHAR,
+    title VARCHAR,
+    current_bid DOUBLE PRECISION,
+    total_units INTEGER,
+    condition VARCHAR,
+    retail_value DOUBLE PRECISION,
+    location VARCHAR,
+    end_time TIMESTAMP,
+    shipping_cost DOUBLE PRECISION,
+    total_bids INTEGER,
+    cost_per_unit DOUBLE PRECISION,
+    source_url VARCHAR,
+    observed_at TIMESTAMP
+) ON COMMIT DROP
+"""
+
+# csv writes None as a quoted empty string; read it back as NULL in non-text columns
+NULLABLE_COLUMNS = [
+    "current_bid", "total_units", "retail_value", "end_time",
+    "shipping_cost", "total_bids", "cost_per_unit", "observed_at",
+]
+
+COPY_SQL = (
+    f"COPY {STAGE_TABLE} ({', '.join(STAGE_COLUMNS)}) FROM STDIN "
+    f"WITH (FORMAT csv, FORCE_NULL ({', '.join(NULLABLE_COLUMNS)}))"
+)
+
+
+def _merge_value(column: str, new: str = "EXCLUDED", current: str = "auctions") -> str:
+    """SQL expression for a column's value after merging a staged row"""
+    if column in PRESERVE_ON_NULL:
+        return f"COALESCE({new}.{column}, {current}.{column})"
+    return f"{new}.{column}"
+
+
+_UPDATED = [c for c in COLUMNS if c != "auction_id"]
+
+_NOW = "now() AT TIME ZONE 'utc'"
+
+MERGE_SQL = f"""
+INSERT INTO auctions ({', '.join(COLUMNS)}, observed_at, created_at, updated_at)
+SELECT {', '.join(COLUMNS)}, COALESCE(observed_at, {_NOW}), {_NOW}, {_NOW}
+FROM {STAGE_TABLE}
+ON CONFLICT (auction_id) DO UPDATE SET
+    {', '.join(f'{c} = {_merge_value(c)}' for c in _UPDATED)},
+    observed_at = EXCLUDED.observed_at,
+    updated_at = EXCLUDED.updated_at
+WHERE (auctions.observed_at IS NULL OR auctions.observed_at <= EXCLUDED.observed_at)
+    AND ({', '.join(f'auctions.{c}' for c in _UPDATED)})
+    IS DISTINCT FROM ({', '.join(_merge_value(c) for c in _UPDATED)})
+"""
+
+
+# Bid fields whose changes are recorded in auction_snapshots
+SNAPSHOT_COLUMNS = ["current_bid", "total_bids", "cost_per_unit"]
+
+# Runs before the merge, comparing staged rows with the current values
+SNAPSHOT_SQL = f"""
+INSERT INTO auction_snapshots (auction_id, observed_at, {', '.join(SNAPSHOT_COLUMNS)})
+SELECT s.auction_id, now() AT TIME ZONE 'utc',
+    {', '.join(_merge_value(c, 's', 'a') for c in SNAPSHOT_COLUMNS)}
+FROM {STAGE_TABLE} s
+LEFT JOIN auctions a ON a.auction_id = s.auction_id
+WHERE a.auction_id IS NULL
+    OR ({', '.join(f'a.{c}' for c in SNAPSHOT_COLUMNS)})
+    IS DISTINCT FROM ({', '.join(_merge_value(c, 's', 'a') for c in SNAPSHOT_COLUMNS)})
+"""
+
+
+def snapshot_partition_sql(day: date) -> str:
+    """DDL creating the daily auction_snapshots partition for ``day`` if missing"""
+    return (
+        f"CREATE TABLE IF NOT EXISTS auction_snapshots_{day:%Y%m%d} "
+        f"PARTITION OF auction_snapshots "
+        f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+    )
+
+
+def auction_rows(auctions: Union[AuctionBatch, Iterable[Auction]]) -> Iterator[tuple]:
+    """Row tuples in COPY order; batches are read column-wise without building Auctions"""
+    if isinstance(auctions, AuctionBatch):
+        return auctions.rows(COLUMNS)
+    return (tuple(getattr(auction, column) for column in COLUMNS) for auction in auctions)
+
+
+def stage_rows(auctions: Union[AuctionBatch, Iterable[Auction]],
+               observed_at: Optional[datetime] = None) -> Iterator[tuple]:
+    """Row tuples in ``STAGE_COLUMNS`` order"""
+    return (row + (observed_at,) for row in auction_rows(auctions))
+
+
+def to_copy_buffer(auctions: Union[AuctionBatch, Iterable[Auction]],
+                   observed_at: Optional[datetime] = None) -> io.StringIO:
+    """
+    Serialize auctions as CSV for ``COPY ... FROM STDIN``
+
+    csv writes both None and "" as a quoted empty field, so ``COPY_SQL``
+    lists every numeric and timestamp column under ``FORCE_NULL`` to load
+    those as NULL; in the text columns an empty string stays an empty
+    string.
+    """
+    return rows_to_copy_buffer(stage_rows(auctions, observed_at))
+
+
+def rows_to_copy_buffer(rows: Iterable[tuple]) -> io.StringIO:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC, lineterminator="\n")
+    for row in rows:
+        writer.writerow([
+            value.isoformat(sep=" ") if isinstance(value, datetime) else value
+            for value in row
+        ])
+    buffer.seek(0)
+    return buffer
+
+
+class AuctionWriter:
+    """
+    Batched upsert of auctions into the ``auctions`` table.
+
+    Auctions are buffered as row tuples (deduplicated by ``auction_id``,
+    last write wins); an ``AuctionBatch`` is read column-wise straight into
+    the buffer
+    and flushed once ``batch_size`` is reached or ``flush_interval`` seconds
+    have passed. Each flush COPYs the batch into a temp table and merges it
+    with one ``INSERT ... ON CONFLICT DO UPDATE``; rows whose values did not
+    change are left alone so ``updated_at`` only moves on real changes.
+
+    With ``record_snapshots`` enabled, new auctions and auctions whose bid
+    fields changed also get a row appended to ``auction_snapshots`` in the
+    same transaction.
+
+    Auctions added with ``observed_at`` (UTC, e.g. the fetch time of a
+    replayed page) only replace rows last changed at or before that time,
+    and that time becomes their ``updated_at``.
+    """
+
+    def __init__(self, engine=None, batch_size: int = 1000, flush_interval: float = 5.0,
+                 record_snapshots: bool = True):
+        if engine is None:
+            from .database import get_engine
+            engine = get_engine()
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.record_snapshots = record_snapshots
+        self._partitions: Set[date] = set()
+        self._buffer: Dict[str, tuple] = {}
+        self._last_flush = time.monotonic()
+        self.rows_written = 0
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def add(self, auction: Auction, observed_at: Optional[datetime] = None) -> int:
+        """Buffer one auction; returns rows written if this triggered a flush"""
+        self._buffer[auction.auction_id] = tuple(getattr(auction, column) for column in COLUMNS) + (observed_at,)
+        return self.maybe_flush()
+
+    def buffer(self, auctions: Union[AuctionBatch, Iterable[Auction]],
+               observed_at: Optional[datetime] = None) -> None:
+        """Buffer auctions without ever flushing"""
+        for row in stage_rows(auctions, observed_at):
+            self._buffer[row[0]] = row
+
+    def add_many(self, auctions: Union[AuctionBatch, Iterable[Auction]],
+                 observed_at: Optional[datetime] = None) -> int:
+        """Buffer many auctions, flushing whenever the batch fills up"""
+        written = 0
+        for row in stage_rows(auctions, observed_at):
+            self._buffer[row[0]] = row  # COLUMNS starts with auction_id
+            if len(self._buffer) >= self.batch_size:
+                written += self.flush()
+        return written + self.maybe_flush()
+
+    def maybe_flush(self) -> int:
+        """Flush if the batch is full or the flush interval has elapsed"""
+        if not self._buffer:
+            return 0
+        if (len(self._buffer) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            return self.flush()
+        return 0
+
+    def flush(self) -> int:
+        """
+        Write all buffered auctions
+
+        If the write fails the rows stay buffered and the error is raised.
+
+        Returns:
+            Number of rows inserted or changed
+        """
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return 0
+        batch = list(self._buffer.values())
+        self._buffer.clear()
+
+        started = time.monotonic()
+        try:
+            written = self._write_batch(batch)
+        except Exception:
+            # Keep the rows for the next flush; anything buffered since is newer
+            for row in batch:
+                self._buffer.setdefault(row[0], row)
+            raise
+        elapsed = time.monotonic() - started
+        self.rows_written += written
+        metrics.DB_FLUSH_LATENCY.observe(elapsed)
+        metrics.DB_FLUSH_ROWS.observe(len(batch))
+        logger.debug(f"Upserted {written}/{len(batch)} auctions in {elapsed:.3f}s")
+        return written
+
+    def _write_batch(self, batch: List[tuple]) -> int:
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(CREATE_STAGE_SQL)
+            cursor.copy_expert(COPY_SQL, rows_to_copy_buffer(batch))
+            if self.record_snapshots:
+                self._ensure_partitions(cursor)
+                cursor.execute(SNAPSHOT_SQL)
+            cursor.execute(MERGE_SQL)
+            written = cursor.rowcount
+            connection.commit()
+            return written
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    def _ensure_partitions(self, cursor) -> None:
+        """Create today's and tomorrow's snapshot partitions once per writer"""
+        today = datetime.utcnow().date()
+        for day in (today, today + timedelta(days=1)):
+            if day not in self._partitions:
+                cursor.execute(snapshot_partition_sql(day))
+                self._partitions.add(day)
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.flush()
+
+
+_STOP = object()
+
+
+class AsyncAuctionWriter:
+    """
+    Asynchronous front for ``AuctionWriter`` that keeps DB I/O off the event loop.
+
+    ``add_many`` only puts the parsed auctions on a bounded queue. A single
+    writer task drains it into the wrapped writer's buffer and runs each
+    flush on a dedicated thread, so fetching and parsing continue while a
+    COPY/merge is in flight. When the database falls behind, the queue
+    fills up and ``add_many`` waits, which slows the fetchers instead of
+    piling up memory.
+
+    A flush that fails keeps its rows buffered and is retried with
+    exponential backoff; the queue keeps filling meanwhile, so producers
+    are held back. After ``max_flush_attempts`` failures in a row the
+    writer task stops, and the error is raised from ``add_many`` and
+    ``close()``. Use ``async with`` or ``start()``/``close()``.
+    ``close()`` drains the queue and writes whatever is left.
+    """
+
+    def __init__(self, writer: Optional[AuctionWriter] = None, max_pending: int = 64,
+                 max_flush_attempts: int = 5, retry_base: float = 1.0, retry_max: float = 60.0,
+                 **writer_kwargs):
+        """
+        Args:
+            writer: Writer to drive; one is created from ``writer_kwargs`` if omitted
+            max_pending: Parsed pages that may wait in the queue before
+                ``add_many`` blocks
+            max_flush_attempts: Attempts at one flush before giving up
+            retry_base: Delay before the first retry of a failed flush
+            retry_max: Upper bound on any retry delay
+        """
+        self.writer = writer if writer is not None else AuctionWriter(**writer_kwargs)
+        self.max_pending = max_pending
+        self.max_flush_attempts = max_flush_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.failed_flushes = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def rows_written(self) -> int:
+        return self.writer.rows_written
+
+    @property
+    def pending(self) -> int:
+        """Parsed pages waiting in the queue"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="auction-writer")
+        self._task = asyncio.create_task(self._run())
+
+    async def add_many(self, auctions: Union[AuctionBatch, Iterable[Auction]],
+                       observed_at: Optional[datetime] = None) -> None:
+        """Queue auctions for writing, waiting while the queue is full"""
+        if self._task is None:
+            await self.start()
+        if self._task.done():
+            # The writer task only ends on close() or a bug; don't block on a dead consumer
+            self._task.result()
+            raise RuntimeError("AsyncAuctionWriter is closed")
+        if isinstance(auctions, AuctionBatch):
+            item = auctions
+        else:
+            item = list(auctions)
+        if not len(item):
+            return
+        item = (item, observed_at)
+        if self._queue.full():
+            with metrics.DB_QUEUE_WAIT.time():
+                put = asyncio.ensure_future(self._queue.put(item))
+                # Stop waiting if the writer task dies while the queue is full
+                await asyncio.wait({put, self._task}, return_when=asyncio.FIRST_COMPLETED)
+                if not put.done():
+                    put.cancel()
+                    self._task.result()
+                    raise RuntimeError("AsyncAuctionWriter is closed")
+        else:
+            self._queue.put_nowait(item)
+
+    async def add(self, auction: Auction, observed_at: Optional[datetime] = None) -> None:
+        await self.add_many([auction], observed_at)
+
+    async def _run(self) -> None:
+        writer = self.writer
+        while True:
+            timeout = None
+            if len(writer):
+                timeout = max(0.0, writer.flush_interval - (time.monotonic() - writer._last_flush))
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                await self._flush()
+                continue
+            if item is _STOP:
+                break
+            writer.buffer(*item)
+            # Take whatever else is already waiting before deciding to flush
+            while len(writer) < writer.batch_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is _STOP:
+                    await self._flush()
+                    return
+                writer.buffer(*item)
+            if (len(writer) >= writer.batch_size
+                    or time.monotonic() - writer._last_flush >= writer.flush_interval):
+                await self._flush()
+        await self._flush()
+
+    async def _flush(self) -> int:
+        """Flush the buffer, retrying with backoff; raises after ``max_flush_attempts`` failures"""
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while len(self.writer):
+            rows = len(self.writer)
+            try:
+                return await loop.run_in_executor(self._executor, self.writer.flush)
+            except Exception as e:
+                attempt += 1
+                self.failed_flushes += 1
+                if attempt >= self.max_flush_attempts:
+                    logger.error(f"Giving up writing {rows} auctions after {attempt} attempts: {str(e)}")
+                    raise
+                delay = min(self.retry_max, self.retry_base * (2 ** (attempt - 1)))
+                logger.warning(f"Failed to write {rows} auctions, retrying in {delay:.1f}s: {str(e)}")
+                await asyncio.sleep(delay)
+        return 0
+
+    async def close(self) -> None:
+        """Write everything queued so far and stop the writer task"""
+        if self._task is None:
+            return
+        if not self._task.done():
+            await self._queue.put(_STOP)
+        try:
+            await self._task
+        finally:
+            self._task = None
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
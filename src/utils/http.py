@@ -1,9 +1,20 @@
 # HTTP utilities 
+import asyncio
+import math
 import random
-from typing import List, Optional
-from datetime import datetime
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Mapping, Optional
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 import logging
 
+import aiohttp
+from multidict import CIMultiDict
+
+from . import metrics
+
 logger = logging.getLogger(__name__)
 
 def get_user_agent() -> str:
@@ -29,16 +40,271 @@ class RequestError(Exception):
     """Base exception for HTTP request errors"""
     pass
 
+@dataclass
+class FetchResult:
+    """Outcome of a single fetch, including retries"""
+    url: str
+    status: Optional[int] = None
+    text: Optional[str] = None
+    headers: Mapping[str, str] = field(default_factory=CIMultiDict)
+    attempts: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    not_modified: bool = False
+    # URL of the page finally served, after redirects
+    final_url: Optional[str] = None
+    # Redirected to the login page: the session is gone, whatever the status
+    logged_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        if self.error is not None or self.status is None or self.logged_out:
+            return False
+        return 200 <= self.status < 300 or self.not_modified
+
 class HTTPClient:
     """
     HTTP client utility class with built-in retry logic and error handling
+
+    Requests share one pooled ``aiohttp.TCPConnector`` (per-host connection
+    limit, DNS cache, keep-alive) and are retried with exponential backoff
+    and full jitter whenever ``should_retry`` allows it. An optional rate
+    limiter and adaptive concurrency limiter gate every attempt.
     """
-    def __init__(self, max_retries: int = 3, timeout: int = 30):
+    def __init__(self, max_retries: int = 3, timeout: int = 30,
+                 limit: int = 100, limit_per_host: int = 10,
+                 dns_cache_ttl: int = 300, keepalive_timeout: float = 30.0,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 session: Optional[aiohttp.ClientSession] = None,
+                 rate_limiter=None, concurrency=None,
+                 marketplace: str = "default",
+                 before_request: Optional[Callable[[], Awaitable[None]]] = None,
+                 cache=None, archive=None, login_path: Optional[str] = None,
+                 on_logged_out: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            max_retries: Retries after the first attempt
+            timeout: Total timeout per attempt in seconds
+            limit: Maximum open connections across all hosts
+            limit_per_host: Maximum open connections per host
+            dns_cache_ttl: Seconds to cache DNS lookups
+            keepalive_timeout: Seconds to keep idle connections open
+            backoff_base: Delay before the first retry (before jitter)
+            backoff_max: Upper bound on any single retry delay
+            session: Existing session to use (e.g. an authenticated one); not closed by this client
+            rate_limiter: Optional ``RateLimiter`` acquired before each attempt
+            concurrency: Optional ``AdaptiveConcurrencyLimiter`` wrapping each attempt
+            marketplace: Rate-limit bucket to draw from
+            before_request: Optional coroutine run before each attempt, e.g. ``authenticator.login``
+            cache: Optional ``HTTPCache`` used to make GETs conditional
+            archive: Optional ``PageArchive`` receiving every full successful response
+            login_path: Path of the site's login page; a response redirected there
+                is marked ``logged_out`` and never counts as a success
+            on_logged_out: Called when that happens; the request is then retried,
+                so ``before_request`` can log in again. Without it the
+                logged-out result is returned to the caller.
+        """
         self.max_retries = max_retries
         self.timeout = timeout
-        self._session = None
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.marketplace = marketplace
+        self.before_request = before_request
+        self.cache = cache
+        self.archive = archive
+        self.login_path = login_path
+        self.on_logged_out = on_logged_out
+        self._session: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
         self._last_request_time: Optional[datetime] = None
 
+    def create_connector(self) -> aiohttp.TCPConnector:
+        """Create the pooled connector shared by every request of this client"""
+        return aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            use_dns_cache=True,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Pooled session, created on first use"""
+        if self._session is None or self._session.closed:
+            # aiohttp negotiates Accept-Encoding itself based on installed decoders
+            headers = {k: v for k, v in self.get_headers().items() if k != "Accept-Encoding"}
+            self._session = aiohttp.ClientSession(
+                connector=self.create_connector(),
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._owns_session = True
+        return self._session
+
+    async def close(self) -> None:
+        """Close the session if this client created it"""
+        if self._owns_session and self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Delay before retry number ``attempt`` (0-based)
+
+        Uses exponential backoff with full jitter; a server-provided
+        Retry-After is treated as a lower bound, capped at ``backoff_max``.
+        Non-finite Retry-After values are ignored.
+        """
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        delay = random.uniform(0, ceiling)
+        if retry_after is not None and math.isfinite(retry_after):
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    async def fetch(self, url: str, method: str = "GET", **kwargs) -> FetchResult:
+        """
+        Fetch a URL, retrying transient failures
+
+        Args:
+            url: URL to request
+            method: HTTP method
+            **kwargs: Passed through to ``aiohttp.ClientSession.request``
+
+        When a cache is configured, GETs carry the cached validators. A 304
+        response comes back with ``not_modified`` set and the cached body, so
+        callers can skip re-parsing a page they have already processed.
+
+        Returns:
+            FetchResult for the final response; check ``ok`` for success
+
+        Raises:
+            RequestError: If every attempt failed without a response
+        """
+        started = time.monotonic()
+        last_error: Optional[BaseException] = None
+
+        use_cache = self.cache is not None and method.upper() == "GET"
+        conditional: Dict[str, str] = {}
+        if use_cache:
+            # SQLite and zlib work stays off the event loop
+            conditional = await asyncio.to_thread(self.cache.conditional_headers, url)
+            if conditional:
+                kwargs["headers"] = {**kwargs.get("headers", {}), **conditional}
+
+        attempt = 0
+        while attempt <= self.max_retries:
+            if self.before_request is not None:
+                await self.before_request()
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire(self.marketplace)
+
+            retry_after = None
+            attempt_started = time.perf_counter()
+            try:
+                gate = self.concurrency.request() if self.concurrency is not None else nullcontext()
+                async with gate as slot:
+                    async with self.session.request(method, url, **kwargs) as response:
+                        header_retry_after = response.headers.get("Retry-After")
+                        if slot is not None:
+                            slot.record(response.status, header_retry_after)
+                        result = FetchResult(
+                            url=url,
+                            status=response.status,
+                            headers=CIMultiDict(response.headers),
+                            attempts=attempt + 1,
+                            final_url=str(response.url),
+                            logged_out=bool(self.login_path) and self.login_path in response.url.path,
+                        )
+                        if self.is_success_status(response.status):
+                            result.text = await response.text()
+                metrics.HTTP_LATENCY.observe(time.perf_counter() - attempt_started, marketplace=self.marketplace)
+                metrics.HTTP_REQUESTS.inc(marketplace=self.marketplace, status=result.status)
+                self._last_request_time = datetime.now()
+
+                if use_cache:
+                    if result.status == 304 and conditional:
+                        entry = await asyncio.to_thread(self.cache.not_modified, url)
+                        if entry is None:
+                            # Entry was evicted since the validators were sent; refetch in
+                            # full right away, without using up an attempt
+                            kwargs["headers"] = {
+                                k: v for k, v in kwargs["headers"].items() if k not in conditional
+                            }
+                            conditional = {}
+                            continue
+                        result.not_modified = True
+                        result.text = entry.body
+                    elif result.ok:
+                        await asyncio.to_thread(self.cache.store, url, result.headers, result.text)
+                if (self.archive is not None and method.upper() == "GET"
+                        and result.ok and not result.not_modified):
+                    # Compression, the segment write and the SQLite commit run off the event loop
+                    await asyncio.to_thread(
+                        self.archive.store, url, result.text, fetched_at=time.time(), status=result.status,
+                        marketplace=None if self.marketplace == "default" else self.marketplace,
+                    )
+
+                if result.logged_out and self.on_logged_out is not None and attempt < self.max_retries:
+                    logger.warning(f"Redirected to the login page fetching {url}; logging in again")
+                    self.on_logged_out()
+                    attempt += 1
+                    continue
+                if result.ok or not self.should_retry(result.status) or attempt == self.max_retries:
+                    result.elapsed = time.monotonic() - started
+                    return result
+                retry_after = self.parse_retry_after(header_retry_after)
+                logger.debug(f"Retrying {url} after status {result.status} (attempt {attempt + 1})")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = e
+                metrics.HTTP_ERRORS.inc(marketplace=self.marketplace, error=type(e).__name__)
+                logger.debug(f"Retrying {url} after {type(e).__name__}: {e} (attempt {attempt + 1})")
+                if attempt == self.max_retries:
+                    break
+
+            await asyncio.sleep(self.backoff_delay(attempt, retry_after))
+            attempt += 1
+
+        raise RequestError(f"Request to {url} failed after {self.max_retries + 1} attempts: {last_error}")
+
+    async def fetch_many(self, urls: Iterable[str], max_in_flight: Optional[int] = None,
+                         **kwargs) -> AsyncIterator[FetchResult]:
+        """
+        Fetch many URLs concurrently, yielding results as they complete
+
+        Failures are reported as FetchResults with ``error`` set rather than
+        raised, so one bad URL does not abort the batch. Any other exception
+        in a worker (e.g. an ``AuthenticationError`` from ``before_request``)
+        cancels the remaining workers and is re-raised to the caller.
+
+        Args:
+            urls: URLs to fetch; consumed lazily
+            max_in_flight: Number of worker tasks (defaults to the concurrency
+                limiter's maximum, else ``limit_per_host``)
+            **kwargs: Passed through to ``fetch``
+        """
+        if max_in_flight is None:
+            max_in_flight = self.concurrency.max_limit if self.concurrency is not None else self.limit_per_host
+
+        results = fetch_concurrently(lambda url: self.fetch(url, **kwargs), urls, max_in_flight)
+        try:
+            async for result in results:
+                yield result
+        finally:
+            await results.aclose()
+
     def get_headers(self, additional_headers: Optional[dict] = None) -> dict:
         """
         Get default headers with optional additional headers
@@ -143,4 +409,94 @@ class HTTPClient:
             status_code == 429 or  # Too Many Requests
             status_code == 408 or  # Request Timeout
             status_code == 404     # Not Found (temporary)
-        )
\ No newline at end of file
+        )
+
+    @staticmethod
+    def is_throttle_status(status_code: int) -> bool:
+        """
+        Determine if status code signals that the server is overloaded or throttling us
+
+        Args:
+            status_code: HTTP status code
+
+        Returns:
+            Boolean indicating the request rate should be reduced
+        """
+        return status_code >= 500 or status_code in (408, 429)
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str], now: Optional[datetime] = None) -> Optional[float]:
+        """
+        Parse a Retry-After header value
+
+        Args:
+            value: Header value, either delay-seconds or an HTTP-date
+            now: Reference time for HTTP-date values (defaults to current UTC time)
+
+        Returns:
+            Delay in seconds, or None if the header is missing or malformed
+        """
+        if not value:
+            return None
+        value = value.strip()
+        try:
+            seconds = float(value)
+        except ValueError:
+            pass
+        else:
+            return max(0.0, seconds) if math.isfinite(seconds) else None
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        now = now or datetime.now(timezone.utc)
+        return max(0.0, (retry_at - now).total_seconds())
+
+
+async def fetch_concurrently(fetch: Callable[[str], Awaitable[FetchResult]], urls: Iterable[str],
+                             max_in_flight: int) -> AsyncIterator[FetchResult]:
+    """
+    Run ``fetch`` over URLs with a fixed number of workers, yielding results as they complete
+
+    A ``RequestError`` becomes a FetchResult with ``error`` set. Any other
+    exception cancels the remaining workers and is re-raised to the caller.
+
+    Args:
+        fetch: Coroutine function fetching one URL
+        urls: URLs to fetch; consumed lazily
+        max_in_flight: Number of worker tasks
+    """
+    url_iter = iter(urls)
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def worker() -> None:
+        try:
+            for url in url_iter:
+                try:
+                    result = await fetch(url)
+                except RequestError as e:
+                    result = FetchResult(url=url, error=str(e))
+                await results.put(result)
+        except Exception as e:
+            results.put_nowait(e)
+        finally:
+            # Always signal completion so the consumer never waits forever
+            results.put_nowait(None)
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, max_in_flight))]
+    remaining = len(workers)
+    try:
+        while remaining:
+            result = await results.get()
+            if result is None:
+                remaining -= 1
+                continue
+            if isinstance(result, Exception):
+                raise result
+            yield result
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
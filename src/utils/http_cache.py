@@ -0,0 +1,185 @@
+# Conditional GET cache
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """Validators and body stored for a URL"""
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body: str
+    stored_at: float
+
+
+class HTTPCache:
+    """
+    On-disk cache of validators (ETag / Last-Modified) and bodies keyed by URL.
+
+    ``conditional_headers`` returns the If-None-Match / If-Modified-Since
+    headers for a URL; a 304 response is then answered from the cache via
+    ``not_modified`` without downloading or re-parsing the page. Entries are
+    evicted least-recently-used once the stored bodies exceed ``max_bytes``.
+
+    A lookup is a hit when a 304 is answered from the cache and a miss when
+    nothing was cached for the URL (or the entry was evicted before the
+    304 arrived). Methods are thread-safe; ``HTTPClient`` calls them through
+    ``asyncio.to_thread``.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_accessed_at ON entries (accessed_at)")
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    @classmethod
+    def from_settings(cls, settings) -> "HTTPCache":
+        return cls(settings.HTTP_CACHE_PATH, max_bytes=settings.HTTP_CACHE_MAX_BYTES)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """Return the cached entry for a URL, marking it recently used"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, body, stored_at FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE url = ?", (time.time(), url))
+        etag, last_modified, body, stored_at = row
+        return CacheEntry(url, etag, last_modified, zlib.decompress(body).decode("utf-8"), stored_at)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Validators to send with a GET for this URL (empty, and a miss, if nothing is cached)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return {}
+        etag, last_modified = row
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def not_modified(self, url: str) -> Optional[CacheEntry]:
+        """Record a 304 response and return the cached entry it refers to"""
+        entry = self.get(url)
+        if entry is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return entry
+
+    def store(self, url: str, headers: Mapping[str, str], body: str) -> bool:
+        """
+        Store a full response if it carries validators
+
+        Args:
+            url: Request URL
+            headers: Response headers
+            body: Decoded response body
+
+        Returns:
+            True if the response was cached
+        """
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return False
+
+        blob = zlib.compress(body.encode("utf-8"))
+        if len(blob) > self.max_bytes:
+            return False
+
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM entries WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (url, etag, last_modified, body, size, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, blob, len(blob), now, now),
+            )
+            self._total_bytes += len(blob) - (previous[0] if previous else 0)
+            self._evict()
+        return True
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until under max_bytes (lock held)"""
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT url, size FROM entries ORDER BY accessed_at LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for url, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+                self._total_bytes -= size
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bytes": self._total_bytes,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._total_bytes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,28 +1,204 @@
-# Logging configuration 
+# Logging configuration
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import queue
 import sys
-from typing import Optional
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+# WARNING+ records allowed per call site per sampling interval, by logger prefix
+DEFAULT_SAMPLE_LIMITS = {"": 50}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any ``extra`` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that keeps the traceback out of the message
+
+    The stock ``prepare`` formats the whole record, traceback included,
+    into ``msg``. Here the message is merged with its args as usual, but
+    the traceback goes into ``exc_text``, where the listener's formatters
+    pick it up: text output still appends it, JSON output puts it in its
+    own field.
+    """
+
+    _formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self._formatter.formatException(record.exc_info)
+            # Tracebacks hold frames, which must not outlive the logging call
+            record.exc_info = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Caps how often one logging call site may emit per interval
+
+    Only records at ``min_level`` or above are sampled. A call site is the
+    file and line of the logging call, so ``f"Error parsing auction {id}"``
+    counts as one repetitive message however the ids vary. ``limits`` maps
+    logger name prefixes to the cap per interval; the longest matching
+    prefix wins and "" sets the default. The first record let through
+    after a quiet spell notes how many were dropped.
+    """
+
+    def __init__(self, limits: Dict[str, int], interval: float = 60.0,
+                 min_level: int = logging.WARNING):
+        super().__init__()
+        self.limits = limits
+        self.interval = interval
+        self.min_level = min_level
+        self._prefixes = sorted(limits, key=len, reverse=True)
+        # call site -> (window start, emitted, suppressed)
+        self._sites: Dict[Tuple[str, int], list] = {}
+        # Records are filtered on the logging thread, which may be any thread
+        self._lock = threading.Lock()
+
+    def _limit(self, name: str) -> Optional[int]:
+        for prefix in self._prefixes:
+            if prefix == "" or name == prefix or name.startswith(prefix + "."):
+                return self.limits[prefix]
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.min_level:
+            return True
+        limit = self._limit(record.name)
+        if limit is None:
+            return True
+        now = time.monotonic()
+        site = (record.pathname, record.lineno)
+        with self._lock:
+            state = self._sites.get(site)
+            if state is None or now - state[0] >= self.interval:
+                suppressed = state[2] if state else 0
+                self._sites[site] = [now, 1, 0]
+            elif state[1] < limit:
+                state[1] += 1
+                return True
+            else:
+                state[2] += 1
+                return False
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+            record.args = None
+        return True
+
+
+def stop_logging() -> None:
+    """Flush queued records and detach the handlers installed by ``setup_logging``"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+
+
+def setup_logging(level: int = logging.INFO,
+                  log_file: Optional[str] = None,
+                  json_format: bool = False,
+                  max_bytes: int = 10 * 1024 * 1024,
+                  backup_count: int = 5,
+                  sample_limits: Optional[Dict[str, int]] = DEFAULT_SAMPLE_LIMITS,
+                  sample_interval: float = 60.0) -> logging.handlers.QueueListener:
+    """
+    Configure logging for the application
+
+    Loggers only put records on an in-memory queue; a background thread
+    owned by a ``QueueListener`` formats them and does the console and file
+    I/O, so logging never blocks the event loop. Calling this again
+    replaces the previous configuration instead of stacking handlers.
+
+    Args:
+        level: Root log level
+        log_file: Also write to this file, rotated at ``max_bytes``
+        json_format: Emit JSON lines instead of plain text
+        max_bytes: Size at which the log file is rotated
+        backup_count: Rotated files kept
+        sample_limits: Per-logger-prefix cap on WARNING+ records per call site
+            per ``sample_interval`` (see ``SamplingFilter``); None disables sampling
+        sample_interval: Sampling window in seconds
+    """
+    global _listener, _queue_handler
+    stop_logging()
 
-def setup_logging(level: int = logging.INFO, 
-                 log_file: Optional[str] = None) -> None:
-    """Configure logging for the application"""
-    
     # Create formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    
+    if json_format:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
+
     # Setup console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    
-    # Setup root logger
-    root_logger = logging.getLogger()
-    root_logger.setLevel(level)
-    root_logger.addHandler(console_handler)
-    
+    handlers = [console_handler]
+
     # Setup file handler if log file specified
     if log_file:
-        file_handler = logging.FileHandler(log_file)
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
\ No newline at end of file
+        handlers.append(file_handler)
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = _QueueHandler(records)
+    if sample_limits:
+        # Filter before enqueueing so dropped records cost nothing downstream
+        _queue_handler.addFilter(SamplingFilter(sample_limits, sample_interval))
+
+    # Setup root logger
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
+    root_logger.addHandler(_queue_handler)
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,359 @@
+# Pipeline metrics
+"""
+Counters and histograms for the scrape pipeline, exposed in Prometheus
+text format and as a periodic summary log line.
+
+Metrics are off until ``enable()`` is called. While disabled every
+``inc``/``observe`` returns after a single attribute check and ``time()``
+hands back a shared no-op context manager, so instrumented hot paths pay
+almost nothing.
+"""
+from abc import ABC, abstractmethod
+import asyncio
+import bisect
+import math
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+LabelValues = Tuple[str, ...]
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_labels", "_started")
+
+    def __init__(self, histogram: "Histogram", labels: LabelValues):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._histogram._observe(self._labels, time.perf_counter() - self._started)
+        return False
+
+
+class Registry:
+    """Holds every metric and whether recording is switched on"""
+
+    def __init__(self):
+        self.enabled = False
+        self._metrics: Dict[str, "Metric"] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: "Metric") -> "Metric":
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> "Metric":
+        return self._metrics[name]
+
+    def reset(self) -> None:
+        with self._lock:
+            for metric in self._metrics.values():
+                metric.reset()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        # Recording threads mutate the values in place; render a consistent snapshot
+        with self._lock:
+            for metric in self._metrics.values():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = (),
+                 registry: Optional[Registry] = None):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._registry = registry if registry is not None else REGISTRY
+        self._registry.register(self)
+
+    def _labels(self, labels: Dict[str, object]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _format_labels(self, values: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, values))
+        if extra is not None:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+    @property
+    def family(self) -> str:
+        """Name of the exposed metric family"""
+        return self.name
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.family} {self.description}", f"# TYPE {self.family} {self.kind}"]
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Drop every recorded value"""
+        pass
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        """Prometheus text lines for this metric, including HELP and TYPE"""
+        pass
+
+
+class Counter(Metric):
+    """Monotonically increasing count per label set"""
+
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if not self._registry.enabled:
+            return
+        key = self._labels(labels)
+        with self._registry._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._labels(labels), 0)
+
+    def total(self) -> float:
+        with self._registry._lock:
+            return sum(self._values.values())
+
+    def items(self) -> Iterable[Tuple[LabelValues, float]]:
+        with self._registry._lock:
+            return list(self._values.items())
+
+    @property
+    def family(self) -> str:
+        # Counter samples end in _total, and the HELP/TYPE lines must name them the same way
+        return f"{self.name}_total"
+
+    def reset(self) -> None:
+        self._values.clear()
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.family}{self._format_labels(labels)} {value:g}")
+        return lines
+
+
+class Histogram(Metric):
+    """Bucketed distribution with sum and count per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, registry: Optional[Registry] = None):
+        super().__init__(name, description, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: bucket counts (last is +Inf), sum, count
+        self._values: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        if not self._registry.enabled:
+            return
+        self._observe(self._labels(labels), value)
+
+    def _observe(self, key: LabelValues, value: float) -> None:
+        with self._registry._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, **labels):
+        """Context manager observing the elapsed seconds of its block"""
+        if not self._registry.enabled:
+            return _NULL_TIMER
+        return _Timer(self, self._labels(labels))
+
+    def _states(self, labels: Dict[str, object]) -> List:
+        """Copies of the states of one label set, or of all of them"""
+        with self._registry._lock:
+            if labels:
+                state = self._values.get(self._labels(labels))
+                states = [state] if state else []
+            else:
+                states = list(self._values.values())
+            return [[list(counts), total, count] for counts, total, count in states]
+
+    def count(self, **labels) -> int:
+        return sum(state[2] for state in self._states(labels))
+
+    def sum(self, **labels) -> float:
+        return sum(state[1] for state in self._states(labels))
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """
+        Estimate a quantile from the buckets, merging label sets unless given
+
+        Interpolates linearly inside the bucket, as Prometheus'
+        ``histogram_quantile`` does.
+        """
+        states = self._states(labels)
+        counts = [sum(state[0][i] for state in states) for i in range(len(self.buckets) + 1)]
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def reset(self) -> None:
+        self._values.clear()
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == math.inf else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{self._format_labels(labels, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(labels)} {total:g}")
+            lines.append(f"{self.name}_count{self._format_labels(labels)} {count}")
+        return lines
+
+
+REGISTRY = Registry()
+
+# Pipeline metrics
+HTTP_REQUESTS = Counter("bstock_http_requests", "HTTP responses by marketplace and status",
+                        ["marketplace", "status"])
+HTTP_ERRORS = Counter("bstock_http_errors", "HTTP attempts that failed without a response",
+                      ["marketplace", "error"])
+HTTP_LATENCY = Histogram("bstock_http_request_seconds", "Latency of single HTTP attempts",
+                         ["marketplace"])
+RATE_LIMIT_WAIT = Histogram("bstock_rate_limit_wait_seconds", "Time spent waiting for a rate-limit token",
+                            ["marketplace"])
+LOGINS = Counter("bstock_logins", "Full logins performed", ["marketplace"])
+PARSE_LATENCY = Histogram("bstock_parse_seconds", "Time to parse one page", ["marketplace", "kind"])
+ITEMS_PARSED = Counter("bstock_items_parsed", "Auctions parsed from pages", ["marketplace", "kind"])
+DB_FLUSH_LATENCY = Histogram("bstock_db_flush_seconds", "Duration of AuctionWriter flushes")
+DB_QUEUE_WAIT = Histogram("bstock_db_queue_wait_seconds",
+                          "Time producers waited for room in the DB write queue")
+DB_FLUSH_ROWS = Histogram("bstock_db_flush_batch_rows", "Auctions per AuctionWriter flush",
+                          buckets=SIZE_BUCKETS)
+
+
+def enable() -> None:
+    REGISTRY.enabled = True
+
+
+def disable() -> None:
+    REGISTRY.enabled = False
+
+
+def enabled() -> bool:
+    return REGISTRY.enabled
+
+
+def _ms(seconds: Optional[float]) -> str:
+    return "-" if seconds is None else f"{seconds * 1e3:.0f}ms"
+
+
+def summary() -> str:
+    """One-line digest of the pipeline counters since start"""
+    requests = HTTP_REQUESTS.total()
+    throttled = sum(v for (_, status), v in HTTP_REQUESTS.items() if status in ("429", "503"))
+    flushes = DB_FLUSH_LATENCY.count()
+    return (
+        f"requests={requests:g} throttled={throttled:g} errors={HTTP_ERRORS.total():g} "
+        f"latency_p50={_ms(HTTP_LATENCY.quantile(0.5))} latency_p99={_ms(HTTP_LATENCY.quantile(0.99))} "
+        f"rate_wait={RATE_LIMIT_WAIT.sum():.1f}s logins={LOGINS.total():g} "
+        f"parsed={ITEMS_PARSED.total():g} parse_p50={_ms(PARSE_LATENCY.quantile(0.5))} "
+        f"flushes={flushes} flush_rows={DB_FLUSH_ROWS.sum():g} "
+        f"flush_avg={_ms(DB_FLUSH_LATENCY.sum() / flushes if flushes else None)} "
+        f"db_backpressure={DB_QUEUE_WAIT.sum():.1f}s"
+    )
+
+
+async def log_summary(interval: float = 60.0) -> None:
+    """Log ``summary()`` every ``interval`` seconds until cancelled"""
+    while True:
+        await asyncio.sleep(interval)
+        logger.info(f"metrics {summary()}")
+
+
+async def start_from_settings(settings) -> Tuple[Optional[object], Optional[asyncio.Task]]:
+    """
+    Enable metrics as configured by ``METRICS_ENABLED``, ``METRICS_HOST``,
+    ``METRICS_PORT`` and ``METRICS_SUMMARY_INTERVAL``
+
+    Returns:
+        The metrics server runner and summary task (either may be None)
+    """
+    if not settings.METRICS_ENABLED:
+        return None, None
+    enable()
+    runner = None
+    if settings.METRICS_PORT:
+        runner = await start_metrics_server(settings.METRICS_HOST, settings.METRICS_PORT)
+    task = None
+    if settings.METRICS_SUMMARY_INTERVAL:
+        task = asyncio.create_task(log_summary(settings.METRICS_SUMMARY_INTERVAL))
+    return runner, task
+
+
+async def start_metrics_server(host: str = "127.0.0.1", port: int = 9108):
+    """
+    Serve ``/metrics`` in Prometheus text format
+
+    Listens on localhost only unless another ``host`` is given.
+
+    Returns:
+        The ``aiohttp.web.AppRunner``; call ``cleanup()`` to stop it
+    """
+    from aiohttp import web
+
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(body=REGISTRY.render().encode("utf-8"),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return runner
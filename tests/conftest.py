@@ -0,0 +1,34 @@
+# Shared test helpers
+from datetime import datetime
+from src.models.auction import Auction
+
+
+class FakeClock:
+    """Manually advanced clock; pass it wherever a ``clock`` callable is accepted"""
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_auction(auction_id: str = "26964", **overrides) -> Auction:
+    """Auction with the fields of a typical Amazon pallet lot, overridable per test"""
+    fields = dict(
+        auction_id=auction_id,
+        title="Est. 2 Pallets of Apparel & More by Levi's, 974 Units, Used - Good Condition, "
+              "Ext. Retail $44,826, North Las Vegas, NV - West Coast",
+        current_bid=2202.0,
+        total_units=974,
+        condition="Used - Good",
+        retail_value=44826.0,
+        location="North Las Vegas, NV",
+        end_time=datetime(2024, 11, 2, 14, 48),
+        marketplace="amazon",
+        cost_per_unit=2.26,
+    )
+    fields.update(overrides)
+    fields.setdefault(
+        "source_url", f"https://bstock.com/{fields['marketplace']}/auction/auction/view/id/{auction_id}/"
+    )
+    return Auction(**fields)
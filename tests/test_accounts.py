@@ -0,0 +1,179 @@
+import asyncio
+import pytest
+from collections import Counter
+from multidict import CIMultiDict
+from src.core.accounts import Account, AccountPool, HashRing
+from src.core.auth import AuthenticationError, BStockAuthenticator
+from src.core.concurrency import AdaptiveConcurrencyLimiter
+from src.core.rate_limiter import RateLimiter
+from src.utils.http import FetchResult
+from tests.conftest import FakeClock
+
+KEYS = [str(auction_id) for auction_id in range(2000)]
+
+
+class FakeClient:
+    """Returns a fixed status and records the URLs it fetched"""
+
+    def __init__(self, status: int = 200, headers=None):
+        self.status = status
+        self.headers = CIMultiDict(headers or {})
+        self.fetched = []
+
+    async def fetch(self, url, **kwargs):
+        self.fetched.append(url)
+        return FetchResult(url=url, status=self.status, text="ok", headers=self.headers)
+
+
+def make_pool(count: int = 3, clock=None):
+    accounts = []
+    for i in range(count):
+        auth = BStockAuthenticator(f"user{i}@example.com", "password")
+        account = Account(auth, RateLimiter(), AdaptiveConcurrencyLimiter())
+        account._client = FakeClient()
+        accounts.append(account)
+    return AccountPool(accounts, clock=clock or FakeClock())
+
+
+def test_ring_spreads_keys_evenly():
+    """Test virtual nodes give each node a similar share of keys"""
+    ring = HashRing(["a", "b", "c", "d"], replicas=128)
+    shares = Counter(ring.node_for(key) for key in KEYS)
+    assert set(shares) == {"a", "b", "c", "d"}
+    assert min(shares.values()) > len(KEYS) / 4 * 0.6
+
+
+def test_ring_removal_only_moves_removed_keys():
+    """Test removing a node leaves other keys with their owner"""
+    ring = HashRing(["a", "b", "c"])
+    before = {key: ring.node_for(key) for key in KEYS}
+    ring.remove("b")
+    after = {key: ring.node_for(key) for key in KEYS}
+    moved = [key for key in KEYS if before[key] != after[key]]
+    assert moved
+    assert all(before[key] == "b" for key in moved)
+    ring.add("b")
+    assert {key: ring.node_for(key) for key in KEYS} == before
+
+
+def test_throttled_account_rebalances_until_cooldown():
+    """Test a throttled account's keys move away and return after the cooldown"""
+    clock = FakeClock()
+    pool = make_pool(clock=clock)
+    owners = {key: pool.account_for(key).name for key in KEYS}
+    throttled = pool.accounts["user1@example.com"]
+
+    pool.mark_throttled(throttled, retry_after=30)
+    assert throttled.name not in pool.healthy
+    assert all(pool.account_for(key) is not throttled for key in KEYS)
+    for key in KEYS:
+        if owners[key] != throttled.name:
+            assert pool.account_for(key).name == owners[key]
+
+    clock.now = 31
+    assert {key: pool.account_for(key).name for key in KEYS} == owners
+
+
+def test_shard_covers_every_key_once():
+    """Test sharding partitions the frontier across accounts"""
+    pool = make_pool()
+    shards = pool.shard(KEYS)
+    assert len(shards) == 3
+    assert sorted(key for keys in shards.values() for key in keys) == sorted(KEYS)
+
+
+@pytest.mark.asyncio
+async def test_fetch_fails_over_on_throttle():
+    """Test a 429 benches the owner and the request moves to the next account"""
+    pool = make_pool()
+    owner = pool.account_for("42")
+    owner._client.status = 429
+    owner._client.headers = CIMultiDict({"Retry-After": "10"})
+
+    result = await pool.fetch("42", "http://example.com/auction/42")
+    assert result.ok
+    assert owner._client.fetched == ["http://example.com/auction/42"]
+    assert owner.name not in pool.healthy
+    assert pool.account_for("42") is not owner
+
+
+@pytest.mark.asyncio
+async def test_fetch_fails_over_on_login_failure():
+    """Test an account whose login fails is taken off the ring and the next one serves"""
+    pool = make_pool()
+    owner = pool.account_for("42")
+
+    async def failing_fetch(url, **kwargs):
+        raise AuthenticationError("Login failed: 429")
+
+    owner._client.fetch = failing_fetch
+    owner.auth.login = failing_fetch
+    result = await pool.fetch("42", "http://example.com/auction/42")
+
+    assert result.ok
+    assert owner.name not in pool.healthy
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_fetch_fails_over_on_login_redirect():
+    """Test a page redirected to the login form counts as a logout, not a result"""
+    pool = make_pool()
+    owner = pool.account_for("42")
+    logins = []
+
+    async def redirected(url, **kwargs):
+        return FetchResult(url=url, status=200, text="<form>", logged_out=True,
+                           final_url="http://example.com/amazon/customer/account/login/")
+
+    async def login(force=False):
+        logins.append(force)
+
+    owner._client.fetch = redirected
+    owner.auth.login = login
+    result = await pool.fetch("42", "http://example.com/auction/42")
+
+    assert result.ok and result.text == "ok"
+    assert owner.name not in pool.healthy
+
+    await asyncio.sleep(0)
+    assert logins == [True]
+    assert pool.account_for("42") is owner
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_fetch_many_spreads_urls():
+    """Test the pool fetches every URL, each through the account owning it"""
+    pool = make_pool()
+    urls = [f"http://example.com/auction/{i}" for i in range(30)]
+
+    results = [result async for result in pool.fetch_many(urls)]
+
+    assert sorted(r.url for r in results) == sorted(urls)
+    for account in pool.accounts.values():
+        assert all(pool.account_for(url) is account for url in account._client.fetched)
+
+
+@pytest.mark.asyncio
+async def test_account_creates_session_lazily():
+    """Test an account's client is usable before any session exists"""
+    auth = BStockAuthenticator("user@example.com", "password")
+    account = Account(auth, RateLimiter(), AdaptiveConcurrencyLimiter())
+    client = await account.get_client()
+
+    assert client.session is auth.session
+    assert await account.get_client() is client
+    await auth.close()
+
+
+def test_settings_credentials_include_extra_accounts():
+    """Test extra accounts follow the primary one without duplicates"""
+    from config.settings import Settings
+    settings = Settings(
+        DB_HOST="localhost", DB_PORT="5432", DB_NAME="db", DB_USER="u", DB_PASSWORD="p",
+        BSTOCK_EMAIL="a@example.com", BSTOCK_PASSWORD="pa",
+        BSTOCK_ACCOUNTS=[("b@example.com", "pb"), ("a@example.com", "dup")],
+        _env_file=None,
+    )
+    assert settings.credentials() == [("a@example.com", "pa"), ("b@example.com", "pb")]
@@ -0,0 +1,201 @@
+import json
+import random
+import pytest
+from benchmarks.load_test import CountingSink
+from benchmarks.mock_server import MockConfig, MockMarketplace, start_server
+from src.core.alerts import AlertEngine, AlertRule, AlertSink, FileAlertSink, RuleIndex, load_rules, tokenize
+from src.core.auth import BStockAuthenticator
+from src.core.scraper import ListingState, Scraper
+from src.models.auction import Auction
+from src.parsers.amazon_parser import AmazonParser
+from tests.conftest import make_auction
+
+
+def brute_force(rule: AlertRule, auction: Auction, region=None) -> bool:
+    """Reference implementation checking one rule directly"""
+    if rule.marketplace and rule.marketplace.lower() != auction.marketplace.lower():
+        return False
+    if rule.condition and rule.condition.lower() != (auction.condition or "").lower():
+        return False
+    if rule.max_cost_per_unit is not None and (auction.cost_per_unit is None
+                                               or auction.cost_per_unit > rule.max_cost_per_unit):
+        return False
+    if rule.min_retail_value is not None and (auction.retail_value is None
+                                              or auction.retail_value < rule.min_retail_value):
+        return False
+    if rule.regions:
+        places = {auction.location.rsplit(", ", 1)[-1].lower(), (region or "").lower()}
+        if not places & {r.lower() for r in rule.regions}:
+            return False
+    words = set(tokenize(auction.title))
+    return all(word in words for keyword in rule.keywords for word in tokenize(keyword))
+
+
+def test_rule_index_matches_each_criterion():
+    """Test every kind of criterion narrows the match"""
+    index = RuleIndex([
+        AlertRule("any"),
+        AlertRule("target only", marketplace="target"),
+        AlertRule("used", condition="used - good"),
+        AlertRule("cheap", max_cost_per_unit=2.5),
+        AlertRule("very cheap", max_cost_per_unit=1.0),
+        AlertRule("big", min_retail_value=40000),
+        AlertRule("huge", min_retail_value=100000),
+        AlertRule("west", regions=("West Coast",)),
+        AlertRule("texas", regions=("TX",)),
+        AlertRule("nevada", regions=("NV",)),
+        AlertRule("levis", keywords=("levi's", "apparel")),
+        AlertRule("shoes", keywords=("shoes",)),
+    ])
+    matched = {rule.name for rule in index.match(make_auction(), region="West Coast")}
+    assert matched == {"any", "used", "cheap", "big", "west", "nevada", "levis"}
+
+
+def test_rule_index_agrees_with_brute_force():
+    """Test the compiled indexes give the same answer as checking every rule"""
+    rng = random.Random(0)
+    rules = [
+        AlertRule(
+            f"rule-{i}",
+            marketplace=rng.choice([None, "amazon", "target"]),
+            condition=rng.choice([None, "Used - Good", "New"]),
+            max_cost_per_unit=rng.choice([None, 0.5, 1.0, 2.26, 5.0]),
+            min_retail_value=rng.choice([None, 1000.0, 20000.0, 44826.0, 90000.0]),
+            regions=tuple(rng.sample(["NV", "MD", "West Coast", "TX"], rng.randint(0, 2))),
+            keywords=tuple(rng.sample(["apparel", "levi's", "electronics", "more"], rng.randint(0, 2))),
+        )
+        for i in range(300)
+    ]
+    index = RuleIndex(rules)
+    for i in range(100):
+        auction = make_auction(
+            str(i),
+            marketplace=rng.choice(["amazon", "target"]),
+            condition=rng.choice(["Used - Good", "New", ""]),
+            cost_per_unit=rng.choice([None, 0.3, 1.0, 2.26, 8.0]),
+            retail_value=rng.choice([0, 5000.0, 44826.0, 120000.0]),
+            location=rng.choice(["North Las Vegas, NV", "Upper Marlboro, MD"]),
+        )
+        region = rng.choice([None, "West Coast"])
+        expected = [rule.name for rule in rules if brute_force(rule, auction, region)]
+        assert [rule.name for rule in index.match(auction, region)] == expected
+
+
+class NoScanDict(dict):
+    """Dict that fails if iterated, to prove lookups go through the index"""
+
+    def items(self):
+        raise AssertionError("keyword index was scanned")
+
+    __iter__ = values = keys = items
+
+
+def test_keyword_match_looks_up_title_words_only():
+    """Test keyword matching costs lookups per title word, not a pass over every indexed word"""
+    rules = [AlertRule(f"word-{i}", keywords=(f"w{i}",)) for i in range(5000)]
+    rules.append(AlertRule("levis", keywords=("levi's apparel", "pallets")))
+    rules.append(AlertRule("shoes and apparel", keywords=("shoes", "apparel")))
+    index = RuleIndex(rules)
+    index._keywords = NoScanDict(index._keywords)
+
+    assert [rule.name for rule in index.match(make_auction())] == ["levis"]
+
+
+@pytest.mark.asyncio
+async def test_engine_dedupes_and_writes_file(tmp_path):
+    """Test an auction alerts a rule once and alerts land in the file sink"""
+    log = tmp_path / "alerts.jsonl"
+    now = [1000.0]
+    engine = AlertEngine([AlertRule("cheap", max_cost_per_unit=2.5)], FileAlertSink(str(log)),
+                         dedupe_window=3600, path=str(tmp_path / "sent.json"), clock=lambda: now[0])
+
+    assert len(await engine.process([make_auction("1"), make_auction("2", cost_per_unit=9.0)])) == 1
+    assert await engine.process([make_auction("1", current_bid=2300.0)]) == []
+    now[0] += 7200
+    assert len(await engine.process([make_auction("1")])) == 1
+
+    lines = [json.loads(line) for line in log.read_text().splitlines()]
+    assert [(a["rule"], a["auction_id"]) for a in lines] == [("cheap", "1"), ("cheap", "1")]
+
+    engine.close()
+    restored = AlertEngine([AlertRule("cheap", max_cost_per_unit=2.5)], FileAlertSink(str(log)),
+                           dedupe_window=3600, path=str(tmp_path / "sent.json"), clock=lambda: now[0])
+    assert await restored.process([make_auction("1")]) == []
+
+
+class FlakySink(AlertSink):
+    """Fails the first ``failures`` sends"""
+
+    def __init__(self, failures: int = 1):
+        self.failures = failures
+        self.sent = []
+
+    async def send(self, alerts):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("webhook down")
+        self.sent.extend(alerts)
+
+
+@pytest.mark.asyncio
+async def test_failed_send_is_not_deduped(tmp_path):
+    """Test alerts are only marked sent once the sink accepted them"""
+    sink = FlakySink()
+    path = tmp_path / "sent.json"
+    engine = AlertEngine([AlertRule("cheap", max_cost_per_unit=2.5)], sink, path=str(path))
+
+    with pytest.raises(ConnectionError):
+        await engine.process([make_auction("1"), make_auction("1")])
+    assert engine.alerts_sent == 0
+
+    assert len(await engine.process([make_auction("1"), make_auction("1")])) == 1
+    assert [a.auction_id for a in sink.sent] == ["1"]
+    assert await engine.process([make_auction("1")]) == []
+
+    engine.save()
+    assert list(tmp_path.iterdir()) == [path]
+    path.write_text("{trunc")
+    assert AlertEngine([], sink, path=str(path))._sent == {}
+
+
+@pytest.mark.asyncio
+async def test_scraper_survives_alert_sink_errors():
+    """Test a failing alert sink does not stop auctions reaching the data sink"""
+    data = CountingSink()
+    engine = AlertEngine([AlertRule("any")], FlakySink())
+    scraper = Scraper(None, AmazonParser(), "https://bstock.com/amazon", sink=data, alerts=engine)
+
+    await scraper._emit([make_auction("1")])
+    await scraper._emit([make_auction("1")])
+    assert data.rows == 2
+    assert engine.alerts_sent == 1
+
+
+def test_load_rules(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps([{"name": "levis", "keywords": ["levi's"], "max_cost_per_unit": 1.5}]))
+    assert load_rules(str(path)) == [AlertRule("levis", max_cost_per_unit=1.5, keywords=("levi's",))]
+
+
+@pytest.mark.asyncio
+async def test_sweep_alerts_only_on_changed_auctions(tmp_path):
+    """Test a repeat sweep with nothing changed sends no alerts"""
+    marketplace = MockMarketplace(MockConfig(pages=2, items_per_page=5, seed=0))
+    runner, base_url = await start_server(marketplace)
+    auth = BStockAuthenticator("test@example.com", "password123", "amazon", base_url=f"{base_url}/amazon")
+    log = tmp_path / "alerts.jsonl"
+    engine = AlertEngine([AlertRule("apparel", marketplace="amazon", keywords=("apparel",))],
+                         FileAlertSink(str(log)))
+    try:
+        await auth.login()
+        scraper = Scraper(auth.http_client(), AmazonParser(), auth.base_url, sink=CountingSink(),
+                          state=ListingState(), alerts=engine)
+        await scraper.sweep()
+        assert engine.alerts_sent == 10
+
+        await scraper.sweep()
+        assert engine.alerts_sent == 10
+        assert len(log.read_text().splitlines()) == 10
+    finally:
+        await auth.close()
+        await runner.cleanup()
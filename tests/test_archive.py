@@ -0,0 +1,129 @@
+import os
+import threading
+import pytest
+from datetime import datetime
+from aiohttp import web
+from benchmarks.fixtures import listing_page
+from benchmarks.load_test import CountingSink
+from src.core.replay import replay
+from src.parsers.amazon_parser import AmazonParser
+from src.storage.archive import DETAIL, LISTING, PageArchive, page_kind, url_marketplace
+from src.utils.http import HTTPClient
+
+LISTING_URL = "https://bstock.com/amazon/?p=1"
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = PageArchive(str(tmp_path / "archive"))
+    yield archive
+    archive.close()
+
+
+def test_identical_bodies_stored_once(archive):
+    """Test repeated fetches of an unchanged page share one compressed body"""
+    html = listing_page("amazon", 20, first_id=1, seed=1)
+    for fetched_at in (100.0, 200.0, 300.0):
+        archive.store(LISTING_URL, html, fetched_at=fetched_at)
+    archive.store(LISTING_URL, listing_page("amazon", 20, first_id=1, seed=2), fetched_at=400.0)
+
+    stats = archive.stats()
+    assert stats["pages"] == 4
+    assert stats["bodies"] == 2
+    assert stats["stored_bytes"] < stats["raw_bytes"] / 3
+    assert [page.fetched_at for page in archive.history(LISTING_URL)] == [100.0, 200.0, 300.0, 400.0]
+    assert archive.read(archive.history(LISTING_URL)[0].content_hash).decode("utf-8") == html
+
+
+def test_segments_roll_over_and_survive_reopen(tmp_path):
+    """Test segment rotation and reading an archive written by an earlier run"""
+    directory = str(tmp_path / "archive")
+    with PageArchive(directory, segment_max_bytes=1) as archive:
+        hashes = [archive.store(f"https://bstock.com/amazon/?p={i}", os.urandom(64).hex()) for i in range(3)]
+        assert archive.stats()["segments"] == 3
+
+    with PageArchive(directory, segment_max_bytes=1) as archive:
+        assert all(archive.read(h) for h in hashes)
+        archive.store("https://bstock.com/amazon/?p=9", "new")
+        assert archive.stats()["segments"] == 4
+        assert archive.latest("https://bstock.com/amazon/?p=9") == b"new"
+
+
+def test_url_classification():
+    """Test kind and marketplace are inferred from B-Stock URLs"""
+    assert page_kind("https://bstock.com/target/auction/auction/view/id/119203/") == DETAIL
+    assert page_kind("https://bstock.com/target/?p=3") == LISTING
+    assert url_marketplace("https://bstock.com/target/?p=3") == "target"
+    assert url_marketplace("http://localhost:8080/amazon/auction/auction/view/id/1/") == "amazon"
+
+
+def test_pages_filters_and_pages_through_index(archive):
+    """Test iterating the index in small batches with filters"""
+    for i in range(25):
+        archive.store(f"https://bstock.com/amazon/?p={i}", f"amazon {i}", fetched_at=float(i))
+        archive.store(f"https://bstock.com/target/?p={i}", f"target {i}", fetched_at=float(i))
+
+    pages = list(archive.pages(marketplace="target", since=10.0, batch_size=4))
+    assert len(pages) == 15
+    assert all(page.marketplace == "target" for page in pages)
+
+
+@pytest.mark.asyncio
+async def test_client_archives_fetched_pages(archive):
+    """Test the HTTP client writes successful responses to the archive"""
+    async def handler(request):
+        return web.Response(text="<html>page</html>", content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/amazon/", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    threads = []
+    store = archive.store
+    archive.store = lambda *args, **kwargs: threads.append(threading.current_thread()) or store(*args, **kwargs)
+    try:
+        async with HTTPClient(archive=archive) as client:
+            result = await client.fetch(f"http://127.0.0.1:{port}/amazon/?p=1")
+    finally:
+        await runner.cleanup()
+
+    assert result.ok
+    assert threads and threads[0] is not threading.main_thread()
+    [page] = archive.history(f"http://127.0.0.1:{port}/amazon/?p=1")
+    assert page.marketplace == "amazon"
+    assert page.kind == LISTING
+    assert archive.read(page.content_hash) == b"<html>page</html>"
+
+
+@pytest.mark.asyncio
+async def test_replay_reparses_archive_in_order(archive):
+    """Test replay feeds parsed auctions to the sink, later fetches last"""
+    first = listing_page("amazon", 10, first_id=1, seed=1)
+    second = listing_page("amazon", 10, first_id=1, seed=2)
+    archive.store(LISTING_URL, first, fetched_at=100.0)
+    archive.store("https://bstock.com/amazon/?p=2", listing_page("amazon", 10, first_id=11, seed=3), fetched_at=150.0)
+    archive.store(LISTING_URL, second, fetched_at=200.0)
+    archive.store("https://example.com/robots.txt", "User-agent: *", fetched_at=250.0)
+
+    class RecordingSink(CountingSink):
+        def __init__(self):
+            super().__init__()
+            self.latest = {}
+
+        def add_many(self, auctions, observed_at=None):
+            for auction in auctions:
+                self.latest[auction.auction_id] = (auction, observed_at)
+            return super().add_many(auctions)
+
+    sink = RecordingSink()
+    stats = await replay(archive, sink, window=2)
+
+    assert stats.pages == 3
+    assert stats.skipped == 1
+    assert sink.rows == 30
+    expected = {a.auction_id: a for a in AmazonParser().parse_auction_list(second)}
+    assert all(sink.latest[auction_id] == (auction, datetime(1970, 1, 1, 0, 3, 20))
+               for auction_id, auction in expected.items())
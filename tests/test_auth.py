@@ -1,7 +1,11 @@
+import asyncio
+import json
+import os
 import pytest
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from datetime import datetime, timedelta
-from src.core.auth import BStockAuthenticator, AuthenticationError
+from yarl import URL
+from src.core.auth import BStockAuthenticator, AuthenticationError, extract_form_key
 
 # Test data
 TEST_EMAIL = "test@example.com"
@@ -18,7 +22,7 @@ async def auth():
     mock_session.get = AsyncMock(return_value=AsyncMock(
         status=200,
         text=AsyncMock(return_value='<input name="form_key" value="test_key"/>'),
-        raise_for_status=AsyncMock(),
+        raise_for_status=MagicMock(),
         __aenter__=AsyncMock(),
         __aexit__=AsyncMock(),
     ))
@@ -28,7 +32,7 @@ async def auth():
         url="https://bstock.com/amazon/account",
         cookies={"frontend": "test_token"},
         text=AsyncMock(return_value="success"),
-        raise_for_status=AsyncMock(),
+        raise_for_status=MagicMock(),
         __aenter__=AsyncMock(),
         __aexit__=AsyncMock(),
     ))
@@ -53,7 +57,7 @@ async def test_auth_failure(auth):
     auth.session.post = AsyncMock(return_value=AsyncMock(
         status=200,
         url="https://bstock.com/amazon/customer/account/login",
-        raise_for_status=AsyncMock(),
+        raise_for_status=MagicMock(),
         __aenter__=AsyncMock(),
         __aexit__=AsyncMock(),
     ))
@@ -74,4 +78,69 @@ async def test_auth_expiration(auth):
 async def test_marketplace_validation():
     """Test marketplace validation"""
     with pytest.raises(ValueError):
-        BStockAuthenticator(TEST_EMAIL, TEST_PASSWORD, "invalid")
\ No newline at end of file
+        BStockAuthenticator(TEST_EMAIL, TEST_PASSWORD, "invalid")
+
+@pytest.mark.asyncio
+async def test_concurrent_logins_share_one_request(auth):
+    """Test a burst of expired callers triggers a single login"""
+    await asyncio.gather(*(auth.login() for _ in range(20)))
+    assert auth.session.post.await_count == 1
+    assert auth.login_count == 1
+
+@pytest.mark.asyncio
+async def test_persisted_cookies_skip_login(tmp_path):
+    """Test a saved session is restored on restart without logging in"""
+    cookie_path = str(tmp_path / "sessions" / "amazon.json")
+    first = BStockAuthenticator(TEST_EMAIL, TEST_PASSWORD, base_url="http://localhost:1/amazon",
+                                cookie_path=cookie_path)
+    await first.create_session()
+    first.session.cookie_jar.update_cookies({"frontend": "saved_token"},
+                                            response_url=URL(first.base_url))
+    first.last_auth = datetime.now()
+    first.save_cookies()
+    await first.close()
+    assert os.stat(cookie_path).st_mode & 0o777 == 0o600
+
+    second = BStockAuthenticator(TEST_EMAIL, TEST_PASSWORD, base_url="http://localhost:1/amazon",
+                                 cookie_path=cookie_path)
+    try:
+        await second.login()
+        assert second.is_authenticated()
+        assert second.login_count == 0
+        assert second.auth_token == "saved_token"
+        cookie = second.session.cookie_jar.filter_cookies(URL(second.base_url)).get("frontend")
+        assert cookie.value == "saved_token"
+    finally:
+        await second.close()
+
+@pytest.mark.asyncio
+async def test_expired_cookies_are_not_restored(tmp_path):
+    """Test a persisted session past its lifetime is ignored"""
+    cookie_path = tmp_path / "amazon.json"
+    cookie_path.write_text(json.dumps({
+        "marketplace": "amazon",
+        "base_url": "https://bstock.com/amazon",
+        "last_auth": (datetime.now() - timedelta(hours=2)).isoformat(),
+        "cookies": {"frontend": "stale"},
+    }))
+    auth = BStockAuthenticator(TEST_EMAIL, TEST_PASSWORD, cookie_path=str(cookie_path))
+    assert not await auth.restore_cookies()
+    assert auth.last_auth is None
+
+@pytest.mark.asyncio
+async def test_background_refresh_logs_in_before_expiry(auth):
+    """Test the refresh task logs in again once inside the refresh margin"""
+    await auth.login()
+    auth.session_lifetime = timedelta(seconds=0.2)
+    auth.refresh_margin = timedelta(seconds=0.15)
+    auth.start_refresh()
+    await asyncio.sleep(0.2)
+    assert auth.login_count >= 2
+    await auth.stop_refresh()
+
+def test_extract_form_key():
+    """Test form key extraction handles attribute order and quoting"""
+    assert extract_form_key('<input name="form_key" type="hidden" value="abc123" />') == "abc123"
+    assert extract_form_key("<input value='xyz' name='form_key'>") == "xyz"
+    assert extract_form_key('<input name="other" value="nope">') is None
+    assert extract_form_key('<input name="form_key" value="">') is None
@@ -0,0 +1,91 @@
+import pickle
+import tracemalloc
+import pytest
+from datetime import datetime, timedelta, timezone
+from benchmarks.fixtures import listing_page
+from src.models.auction import Auction
+from src.models.batch import AuctionBatch
+from src.parsers.amazon_parser import AmazonParser
+from tests.conftest import make_auction
+
+
+def numbered_auction(i: int, **overrides) -> Auction:
+    """``make_auction`` with bid, units, bids and end time varying with ``i``"""
+    fields = dict(
+        current_bid=100.0 + i,
+        total_units=10 * i,
+        condition="Uninspected Returns" if i % 2 else "New",
+        location="Ontario, CA",
+        end_time=datetime(2024, 11, 2, 14, 48) + timedelta(minutes=i),
+        total_bids=i,
+    )
+    fields.update(overrides)
+    return make_auction(str(i), **fields)
+
+
+def test_auction_uses_slots():
+    """Test that Auction instances carry no per-instance __dict__"""
+    assert not hasattr(numbered_auction(1), "__dict__")
+
+
+def test_round_trip_preserves_missing_values():
+    """Test None survives the NaN, NaT and mask encodings"""
+    auctions = [
+        numbered_auction(1),
+        numbered_auction(2, end_time=None, total_bids=None, shipping_cost=None, condition=None),
+        numbered_auction(3, shipping_cost=45.5, cost_per_unit=0.0),
+    ]
+    batch = AuctionBatch.from_auctions(auctions)
+
+    assert len(batch) == 3
+    assert list(batch) == auctions
+    assert batch[1] == auctions[1]
+    assert batch[-1] == auctions[-1]
+    assert batch.column("total_bids") == [1, None, 3]
+    with pytest.raises(IndexError):
+        batch[3]
+
+
+def test_category_columns_are_dictionary_encoded():
+    """Test repeated strings are stored once"""
+    batch = AuctionBatch.from_auctions(numbered_auction(i) for i in range(100))
+    values, codes = batch._categories["condition"]
+    assert sorted(values) == ["New", "Uninspected Returns"]
+    assert len(codes) == 100
+    assert batch.array("current_bid").sum() == sum(100.0 + i for i in range(100))
+
+
+def test_aware_end_times_stored_as_utc():
+    """Test timezone-aware end times become naive UTC"""
+    pacific = timezone(timedelta(hours=-7))
+    batch = AuctionBatch.from_auctions([numbered_auction(1, end_time=datetime(2024, 11, 2, 7, 0, tzinfo=pacific))])
+    assert batch[0].end_time == datetime(2024, 11, 2, 14, 0)
+
+
+def test_concat_reencodes_categories():
+    """Test concatenating batches with different category sets"""
+    first = AuctionBatch.from_auctions([numbered_auction(1, location="Ontario, CA")])
+    second = AuctionBatch.from_auctions([numbered_auction(2, location="Dallas, TX"), numbered_auction(3)])
+    joined = AuctionBatch.concat([first, second])
+    assert [a.location for a in joined] == ["Ontario, CA", "Dallas, TX", "Ontario, CA"]
+    assert list(joined) == list(first) + list(second)
+
+
+def test_batch_is_smaller_than_objects():
+    """Test a parsed page uses less memory and pickles to an equal batch"""
+    auctions = AmazonParser().parse_auction_list(listing_page("amazon", 500, first_id=1, seed=1))
+
+    tracemalloc.start()
+    copies = pickle.loads(pickle.dumps(auctions))
+    objects_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del copies
+
+    batch = AuctionBatch.from_auctions(auctions)
+    tracemalloc.start()
+    restored = pickle.loads(pickle.dumps(batch))
+    batch_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert batch_size < objects_size
+    assert list(restored) == auctions
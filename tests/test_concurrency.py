@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+from src.core.concurrency import AdaptiveConcurrencyLimiter
+from src.utils.http import HTTPClient
+from tests.conftest import FakeClock
+
+
+async def complete(limiter, clock, status, latency=0.1, retry_after=None):
+    """Run one request through the limiter with a fixed latency"""
+    async with limiter.request() as slot:
+        clock.now += latency
+        slot.record(status, retry_after)
+
+
+@pytest.mark.asyncio
+async def test_limit_grows_while_healthy():
+    """Test additive increase on fast successful responses"""
+    clock = FakeClock()
+    limiter = AdaptiveConcurrencyLimiter(initial=2, max_limit=10, clock=clock)
+
+    for _ in range(20):
+        await complete(limiter, clock, 200)
+
+    assert limiter.limit > 2
+    assert limiter.limit <= 10
+
+
+@pytest.mark.asyncio
+async def test_limit_halves_on_throttle():
+    """Test multiplicative decrease on 429 responses"""
+    clock = FakeClock()
+    limiter = AdaptiveConcurrencyLimiter(initial=8, clock=clock)
+
+    await complete(limiter, clock, 429)
+    assert limiter.limit == 4
+
+    # A second error inside the cooldown window is part of the same event
+    await complete(limiter, clock, 503)
+    assert limiter.limit == 4
+
+    clock.now += 5
+    await complete(limiter, clock, 503)
+    assert limiter.limit == 2
+
+
+@pytest.mark.asyncio
+async def test_limit_never_below_minimum():
+    """Test that repeated throttling stops at min_limit"""
+    clock = FakeClock()
+    limiter = AdaptiveConcurrencyLimiter(initial=4, min_limit=2, cooldown=0, clock=clock)
+
+    for _ in range(5):
+        await complete(limiter, clock, 500)
+
+    assert limiter.limit == 2
+
+
+@pytest.mark.asyncio
+async def test_slow_responses_hold_limit():
+    """Test that rising latency stops growth without cutting the limit"""
+    clock = FakeClock()
+    limiter = AdaptiveConcurrencyLimiter(initial=4, clock=clock)
+
+    await complete(limiter, clock, 200, latency=0.1)
+    grown = limiter._limit
+    for _ in range(10):
+        await complete(limiter, clock, 200, latency=1.0)
+
+    assert limiter._limit == pytest.approx(grown, rel=0.1)
+    assert limiter.limit == 4
+
+
+@pytest.mark.asyncio
+async def test_waiters_blocked_at_limit():
+    """Test that requests beyond the limit wait for a free slot"""
+    limiter = AdaptiveConcurrencyLimiter(initial=1)
+    first = await limiter.acquire()
+
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    first.record(200)
+    await limiter.release(first)
+    second = await asyncio.wait_for(waiter, timeout=1)
+    assert limiter.in_flight == 1
+    await limiter.release(second)
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_requests():
+    """Test that a Retry-After header delays subsequent acquires"""
+    clock = FakeClock()
+    limiter = AdaptiveConcurrencyLimiter(initial=4, clock=clock)
+
+    await complete(limiter, clock, 429, retry_after="30")
+    assert limiter._blocked_until == pytest.approx(clock.now + 30)
+
+
+def test_parse_retry_after():
+    """Test Retry-After parsing for seconds and HTTP-date values"""
+    from datetime import datetime, timezone
+    now = datetime(2024, 11, 2, 12, 0, 0, tzinfo=timezone.utc)
+
+    assert HTTPClient.parse_retry_after("120") == 120.0
+    assert HTTPClient.parse_retry_after("Sat, 02 Nov 2024 12:00:30 GMT", now=now) == 30.0
+    assert HTTPClient.parse_retry_after("garbage") is None
+    assert HTTPClient.parse_retry_after(None) is None
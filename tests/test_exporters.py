@@ -0,0 +1,139 @@
+import csv
+import gzip
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, insert
+from src.storage.models import AuctionDB, AuctionSnapshotDB
+from src.storage.exporters import TABLES, CSVExporter, ParquetExporter, Watermark, export_table, stream_rows
+
+
+@pytest.fixture
+def engine():
+    """SQLite engine holding a few auctions"""
+    engine = create_engine("sqlite://")
+    AuctionDB.__table__.create(engine)
+    rows = [
+        dict(auction_id=str(i), marketplace="amazon" if i % 2 else "target", title=f"Lot {i}",
+             current_bid=100.0 + i, total_units=10 * i, condition="", retail_value=None,
+             end_time=datetime(2024, 11, 2, 12), source_url=f"https://bstock.com/x/{i}",
+             created_at=datetime(2024, 11, 1), updated_at=datetime(2024, 11, 1 + i % 3, 8))
+        for i in range(10)
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(AuctionDB.__table__), rows)
+    return engine
+
+
+def test_stream_rows_in_chunks(engine):
+    """Test that rows arrive in bounded chunks"""
+    table, time_column = TABLES["auctions"]
+    chunks = list(stream_rows(engine, table, time_column, chunk_size=4))
+
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    times = [row.updated_at for chunk in chunks for row in chunk]
+    assert times == sorted(times)
+
+
+def test_csv_export_with_since(engine, tmp_path):
+    """Test incremental gzip CSV export filtered on updated_at"""
+    table, time_column = TABLES["auctions"]
+    path = tmp_path / "auctions.csv.gz"
+
+    with CSVExporter(table, time_column, str(path)) as exporter:
+        watermark = export_table(engine, exporter, since=datetime(2024, 11, 2), chunk_size=3)
+
+    with gzip.open(path, "rt", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert exporter.rows_written == len(rows) == 6
+    assert all(row["updated_at"] > "2024-11-02" for row in rows)
+    assert all(row["retail_value"] == "" for row in rows)
+    assert watermark.time == datetime(2024, 11, 3, 8)
+
+
+def test_incremental_export_picks_up_late_commits(engine, tmp_path):
+    """Test a row committed after the export with an earlier timestamp is exported once, next time"""
+    table, time_column = TABLES["auctions"]
+
+    with CSVExporter(table, time_column, str(tmp_path / "first.csv.gz")) as exporter:
+        watermark = export_table(engine, exporter, overlap=timedelta(hours=1))
+    assert exporter.rows_written == 10
+    assert watermark.time == datetime(2024, 11, 3, 8)
+    restored = Watermark.from_dict(watermark.to_dict())
+    assert restored == watermark and len(restored.recent) == 3
+
+    # Committed late, stamped just before the watermark
+    with engine.begin() as connection:
+        connection.execute(insert(AuctionDB.__table__), [dict(
+            auction_id="late", marketplace="amazon", title="Late lot", current_bid=1.0, total_units=1,
+            condition="", source_url="https://bstock.com/x/late", updated_at=datetime(2024, 11, 3, 7, 30))])
+
+    path = tmp_path / "second.csv.gz"
+    with CSVExporter(table, time_column, str(path)) as exporter:
+        watermark = export_table(engine, exporter, watermark=restored, overlap=timedelta(hours=1))
+    with gzip.open(path, "rt", newline="") as f:
+        assert [row["auction_id"] for row in csv.DictReader(f)] == ["late"]
+    assert watermark.time == datetime(2024, 11, 3, 8)
+    assert len(watermark.recent) == 4
+
+    # Older state files held just the timestamp
+    assert Watermark.from_dict("2024-11-03T08:00:00") == Watermark(datetime(2024, 11, 3, 8))
+
+
+def test_parquet_export_partitions(engine, tmp_path):
+    """Test Parquet output partitioned by marketplace and date"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    table, time_column = TABLES["auctions"]
+
+    with ParquetExporter(table, time_column, str(tmp_path), run_id="test") as exporter:
+        export_table(engine, exporter, chunk_size=4)
+
+    files = sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob("*.parquet"))
+    assert "marketplace=amazon/date=2024-11-02/part-test.parquet" in files
+    assert "marketplace=target/date=2024-11-01/part-test.parquet" in files
+
+    dataset = pq.read_table(tmp_path)
+    assert dataset.num_rows == 10
+    assert dataset.column("total_units").type == "int64"
+    assert sorted(set(dataset.column("marketplace").to_pylist())) == ["amazon", "target"]
+
+
+def test_parquet_history_partitioned_by_auction_marketplace(engine, tmp_path):
+    """Test snapshots get their marketplace from the auctions table"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    snapshots = AuctionSnapshotDB.__table__
+    snapshots.create(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(snapshots), [
+            dict(auction_id=str(i), observed_at=datetime(2024, 11, 1, 9 + i), current_bid=100.0 + i,
+                 total_bids=i, cost_per_unit=None)
+            for i in range(4)
+        ])
+    table, time_column = TABLES["history"]
+
+    with ParquetExporter(table, time_column, str(tmp_path), run_id="test") as exporter:
+        export_table(engine, exporter)
+
+    files = sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob("*.parquet"))
+    assert files == ["marketplace=amazon/date=2024-11-01/part-test.parquet",
+                     "marketplace=target/date=2024-11-01/part-test.parquet"]
+    assert pq.read_table(tmp_path).num_rows == 4
+
+
+def test_parquet_closes_finished_days(engine, tmp_path):
+    """Test a day's files are closed once a later day starts, and never overwritten"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    table, time_column = TABLES["auctions"]
+    chunks = list(stream_rows(engine, table, time_column, chunk_size=4))
+
+    with ParquetExporter(table, time_column, str(tmp_path), run_id="test") as exporter:
+        exporter.write(chunks[0])
+        assert {day for _, day in exporter._writers} == {"2024-11-01"}
+        exporter.write(chunks[1])
+        assert {day for _, day in exporter._writers} == {"2024-11-03"}
+        assert pq.read_table(tmp_path / "marketplace=amazon" / "date=2024-11-01").num_rows > 0
+        # Out-of-order rows for a closed day go to a new part file
+        exporter.write(chunks[0])
+
+    files = sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob("*.parquet"))
+    assert "marketplace=target/date=2024-11-01/part-test-1.parquet" in files
+    assert pq.read_table(tmp_path).num_rows == 12
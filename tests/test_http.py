@@ -0,0 +1,138 @@
+import asyncio
+import pytest
+from aiohttp import web
+from src.utils.http import HTTPClient, RequestError
+
+
+@pytest.fixture
+async def server():
+    """Local server that fails a configurable number of times per path"""
+    failures = {"/flaky": 2, "/throttled": 1}
+    hits = {}
+
+    async def handler(request):
+        path = request.path
+        hits[path] = hits.get(path, 0) + 1
+        if path == "/missing-forever":
+            return web.Response(status=503)
+        if path == "/forbidden":
+            return web.Response(status=403)
+        if hits[path] <= failures.get(path, 0):
+            headers = {"Retry-After": "0"} if path == "/throttled" else {}
+            return web.Response(status=503 if path == "/flaky" else 429, headers=headers)
+        return web.Response(text=f"page {path}")
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}", hits
+    await runner.cleanup()
+
+
+@pytest.fixture
+async def client():
+    client = HTTPClient(max_retries=3, backoff_base=0.001, backoff_max=0.01)
+    yield client
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_fetch_retries_until_success(server, client):
+    """Test that retryable statuses are retried with backoff"""
+    base_url, hits = server
+    result = await client.fetch(f"{base_url}/flaky")
+
+    assert result.ok
+    assert result.text == "page /flaky"
+    assert result.attempts == 3
+    assert hits["/flaky"] == 3
+
+
+@pytest.mark.asyncio
+async def test_fetch_does_not_retry_client_errors(server, client):
+    """Test that non-retryable statuses return immediately"""
+    base_url, hits = server
+    result = await client.fetch(f"{base_url}/forbidden")
+
+    assert not result.ok
+    assert result.status == 403
+    assert hits["/forbidden"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fetch_gives_up_after_max_retries(server, client):
+    """Test that exhausted retries return the last response"""
+    base_url, hits = server
+    result = await client.fetch(f"{base_url}/missing-forever")
+
+    assert result.status == 503
+    assert hits["/missing-forever"] == 4
+
+
+@pytest.mark.asyncio
+async def test_fetch_raises_on_connection_failure():
+    """Test that transport errors raise RequestError once retries run out"""
+    client = HTTPClient(max_retries=1, backoff_base=0.001)
+    try:
+        with pytest.raises(RequestError):
+            await client.fetch("http://127.0.0.1:1/")
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_fetch_many_streams_all_results(server, client):
+    """Test batch fetching over a shared connection pool"""
+    base_url, _ = server
+    urls = [f"{base_url}/page/{i}" for i in range(25)] + [f"{base_url}/throttled"]
+
+    results = [result async for result in client.fetch_many(urls, max_in_flight=5)]
+
+    assert len(results) == len(urls)
+    assert all(result.ok for result in results)
+    assert {result.url for result in results} == set(urls)
+
+
+@pytest.mark.asyncio
+async def test_fetch_many_reraises_unexpected_errors(server, client):
+    """Test a worker dying on a non-request error surfaces instead of hanging the consumer"""
+    base_url, _ = server
+    calls = 0
+
+    async def login():
+        nonlocal calls
+        calls += 1
+        if calls == 3:
+            raise PermissionError("login failed")
+
+    client.before_request = login
+    urls = [f"{base_url}/page/{i}" for i in range(10)]
+    with pytest.raises(PermissionError):
+        await asyncio.wait_for(_drain(client.fetch_many(urls, max_in_flight=2)), timeout=5)
+
+
+async def _drain(results):
+    return [result async for result in results]
+
+
+def test_backoff_delay_bounds():
+    """Test exponential backoff ceiling and Retry-After floor"""
+    client = HTTPClient(backoff_base=1.0, backoff_max=4.0)
+
+    for attempt in range(6):
+        assert 0 <= client.backoff_delay(attempt) <= min(4.0, 2 ** attempt)
+    assert client.backoff_delay(0, retry_after=3.0) == 3.0
+    assert client.backoff_delay(0, retry_after=10.0) == 4.0
+    assert client.backoff_delay(0, retry_after=1e300) == 4.0
+    assert client.backoff_delay(0, retry_after=float("inf")) <= 1.0
+
+
+def test_parse_retry_after_ignores_non_finite():
+    """Test infinite or NaN delays are treated as missing"""
+    assert HTTPClient.parse_retry_after("5") == 5.0
+    assert HTTPClient.parse_retry_after("inf") is None
+    assert HTTPClient.parse_retry_after("nan") is None
@@ -0,0 +1,142 @@
+import os
+import pytest
+from aiohttp import web
+from src.utils.http import HTTPClient
+from src.utils.http_cache import HTTPCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = HTTPCache(str(tmp_path / "http_cache.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def test_store_requires_validators(cache):
+    """Test that responses without ETag or Last-Modified are not cached"""
+    assert not cache.store("https://example.com/a", {}, "body")
+    assert cache.store("https://example.com/b", {"ETag": '"v1"'}, "body")
+    assert len(cache) == 1
+
+
+def test_only_lookups_count_misses(cache):
+    """Test storing a response is not a miss but looking up an unknown URL is"""
+    cache.store("https://example.com/a", {"ETag": '"v1"'}, "body")
+    assert cache.stats()["misses"] == 0
+    cache.conditional_headers("https://example.com/a")
+    cache.conditional_headers("https://example.com/b")
+    assert cache.not_modified("https://example.com/a").body == "body"
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_conditional_headers(cache):
+    """Test that stored validators become conditional request headers"""
+    cache.store("https://example.com/a", {
+        "ETag": '"v1"',
+        "Last-Modified": "Sat, 02 Nov 2024 14:48:00 GMT",
+    }, "body")
+
+    assert cache.conditional_headers("https://example.com/a") == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Sat, 02 Nov 2024 14:48:00 GMT",
+    }
+    assert cache.conditional_headers("https://example.com/unknown") == {}
+
+
+def test_lru_eviction(tmp_path):
+    """Test that least recently used entries are evicted past max_bytes"""
+    cache = HTTPCache(str(tmp_path / "small.sqlite3"), max_bytes=400)
+    bodies = [os.urandom(60).hex() for _ in range(10)]  # ~100 bytes each once compressed
+    for i in range(3):
+        cache.store(f"https://example.com/{i}", {"ETag": f'"{i}"'}, bodies[i])
+    cache.get("https://example.com/0")
+
+    for i in range(3, 10):
+        cache.store(f"https://example.com/{i}", {"ETag": f'"{i}"'}, bodies[i])
+
+    assert cache.total_bytes <= 400
+    assert cache.evictions > 0
+    assert cache.get("https://example.com/1") is None
+    cache.close()
+
+
+def test_persists_across_instances(tmp_path):
+    """Test that the cache survives a restart"""
+    path = str(tmp_path / "persist.sqlite3")
+    first = HTTPCache(path)
+    first.store("https://example.com/a", {"ETag": '"v1"'}, "body")
+    first.close()
+
+    second = HTTPCache(path)
+    assert second.get("https://example.com/a").body == "body"
+    assert second.total_bytes > 0
+    second.close()
+
+
+@pytest.fixture
+async def server():
+    """Local server honouring If-None-Match"""
+    hits = []
+
+    async def handler(request):
+        hits.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304, headers={"ETag": '"v1"'})
+        return web.Response(text="<li id=\"auction-1\"></li>", headers={"ETag": '"v1"'})
+
+    app = web.Application()
+    app.router.add_get("/auction", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}/auction", hits
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_client_revalidates_with_cache(server, cache):
+    """Test that a second fetch is answered by a 304 from the cache"""
+    url, hits = server
+    async with HTTPClient(cache=cache) as client:
+        first = await client.fetch(url)
+        second = await client.fetch(url)
+
+    assert first.ok and not first.not_modified
+    assert second.ok and second.not_modified
+    assert second.text == first.text
+    assert hits == [None, '"v1"']
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_client_refetches_when_entry_evicted(server, cache):
+    """Test a full refetch if the cached entry vanished before the 304"""
+    url, hits = server
+    async with HTTPClient(cache=cache) as client:
+        await client.fetch(url)
+        original_not_modified = cache.not_modified
+        cache.not_modified = lambda u: None
+        result = await client.fetch(url)
+        cache.not_modified = original_not_modified
+
+    assert result.ok and not result.not_modified
+    assert hits == [None, '"v1"', None]
+
+
+@pytest.mark.asyncio
+async def test_evicted_refetch_does_not_use_an_attempt(server, cache):
+    """Test the refetch after an evicted 304 works even with no retries left"""
+    url, hits = server
+    async with HTTPClient(cache=cache, max_retries=0) as client:
+        await client.fetch(url)
+        cache.not_modified = lambda u: None
+        result = await client.fetch(url)
+
+    assert result.ok and not result.not_modified
+    assert result.attempts == 1
+    assert result.text == "<li id=\"auction-1\"></li>"
+    assert hits == [None, '"v1"', None]
@@ -0,0 +1,153 @@
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+import pytest
+from src.utils.logging import SamplingFilter, setup_logging, stop_logging
+
+logger = logging.getLogger("src.parsers.test_logging")
+
+
+@pytest.fixture(autouse=True)
+def restore_logging():
+    """Detach the queue handler and restore the root level after each test"""
+    level = logging.getLogger().level
+    yield
+    stop_logging()
+    logging.getLogger().setLevel(level)
+
+
+def queue_handlers():
+    return [h for h in logging.getLogger().handlers if isinstance(h, logging.handlers.QueueHandler)]
+
+
+def test_setup_twice_does_not_stack_handlers(tmp_path):
+    """Test repeated setup replaces the previous queue handler"""
+    setup_logging(log_file=str(tmp_path / "a.log"))
+    setup_logging(log_file=str(tmp_path / "a.log"))
+    assert len(queue_handlers()) == 1
+
+    logger.warning("once")
+    stop_logging()
+    assert (tmp_path / "a.log").read_text().count("once") == 1
+    assert not queue_handlers()
+
+
+def test_json_format_includes_extra_fields(tmp_path):
+    """Test JSON lines carry the message, level and extra fields"""
+    path = tmp_path / "scraper.log"
+    setup_logging(log_file=str(path), json_format=True)
+    logger.info("fetched %s", "page 1", extra={"marketplace": "amazon", "status": 200})
+    stop_logging()
+
+    entry = json.loads(path.read_text().splitlines()[-1])
+    assert entry["message"] == "fetched page 1"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "src.parsers.test_logging"
+    assert entry["marketplace"] == "amazon"
+    assert entry["status"] == 200
+
+
+def test_exceptions_stay_out_of_the_message(tmp_path):
+    """Test tracebacks get their own JSON field and still follow plain text messages"""
+    path = tmp_path / "scraper.json.log"
+    setup_logging(log_file=str(path), json_format=True)
+    try:
+        raise ValueError("bad price")
+    except ValueError:
+        logger.exception("failed to parse %s", "page 2")
+    stop_logging()
+
+    entry = json.loads(path.read_text().splitlines()[-1])
+    assert entry["message"] == "failed to parse page 2"
+    assert entry["exc_info"].startswith("Traceback")
+    assert "ValueError: bad price" in entry["exc_info"]
+
+    path = tmp_path / "scraper.log"
+    setup_logging(log_file=str(path))
+    try:
+        raise ValueError("bad price")
+    except ValueError:
+        logger.exception("failed to parse %s", "page 2")
+    stop_logging()
+    text = path.read_text()
+    assert "failed to parse page 2\nTraceback" in text
+    assert text.count("ValueError: bad price") == 1
+
+
+def test_sampling_is_thread_safe():
+    """Test concurrent records from one call site never exceed the cap"""
+    sampler = SamplingFilter({"": 100}, interval=3600)
+    record = logging.LogRecord("src.x", logging.ERROR, "x.py", 1, "boom", None, None)
+    passed = []
+
+    def emit():
+        passed.append(sum(sampler.filter(copy.copy(record)) for _ in range(1000)))
+
+    threads = [threading.Thread(target=emit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(passed) == 100
+
+
+def test_repetitive_errors_are_sampled(tmp_path):
+    """Test one call site is capped per interval and reports what it dropped"""
+    path = tmp_path / "scraper.log"
+    def parse_error(auction_id):
+        logger.error(f"Error parsing auction {auction_id}: missing element")
+
+    setup_logging(log_file=str(path), sample_limits={"src.parsers": 5}, sample_interval=0.2)
+    for auction_id in range(100):
+        parse_error(auction_id)
+    logging.getLogger("src.storage.test_logging").error("not sampled")
+    time.sleep(0.25)
+    for auction_id in range(100, 102):
+        parse_error(auction_id)
+    stop_logging()
+
+    lines = path.read_text().splitlines()
+    assert sum("Error parsing auction" in line for line in lines) == 7
+    assert "(95 similar messages suppressed)" in lines[-2]
+    assert any("not sampled" in line for line in lines)
+
+
+def test_file_rotates_by_size(tmp_path):
+    """Test the log file rolls over at max_bytes"""
+    path = tmp_path / "scraper.log"
+    setup_logging(log_file=str(path), max_bytes=500, backup_count=2, sample_limits=None)
+    for i in range(50):
+        logger.info("line %d with some padding to fill the file", i)
+    stop_logging()
+    assert os.path.exists(f"{path}.1")
+    assert os.path.getsize(path) <= 500
+
+
+def test_logging_does_not_wait_for_slow_output(tmp_path, monkeypatch):
+    """Test callers return before a slow stream finishes writing"""
+    class SlowStream:
+        def __init__(self):
+            self.lines = []
+
+        def write(self, text):
+            time.sleep(0.02)
+            self.lines.append(text)
+
+        def flush(self):
+            pass
+
+    stream = SlowStream()
+    monkeypatch.setattr("sys.stdout", stream)
+    setup_logging()
+    started = time.perf_counter()
+    for i in range(20):
+        logger.info("request %d", i)
+    elapsed = time.perf_counter() - started
+    stop_logging()
+
+    assert elapsed < 0.1
+    assert sum("request" in line for line in stream.lines) == 20
@@ -0,0 +1,135 @@
+import threading
+import time
+import aiohttp
+import pytest
+from benchmarks.load_test import CountingSink
+from benchmarks.mock_server import MockConfig, MockMarketplace, start_server
+from src.core.auth import BStockAuthenticator
+from src.core.scraper import Scraper
+from src.parsers.amazon_parser import AmazonParser
+from src.utils import metrics
+from src.utils.metrics import Counter, Histogram, Registry
+
+
+@pytest.fixture
+def enabled():
+    """Record into the global registry for one test"""
+    metrics.REGISTRY.reset()
+    metrics.enable()
+    yield metrics.REGISTRY
+    metrics.disable()
+    metrics.REGISTRY.reset()
+
+
+def test_disabled_metrics_record_nothing():
+    """Test that nothing is recorded until metrics are enabled"""
+    registry = Registry()
+    counter = Counter("jobs", "Jobs", ["kind"], registry=registry)
+    histogram = Histogram("job_seconds", "Job time", registry=registry)
+    counter.inc(kind="a")
+    histogram.observe(0.2)
+    with histogram.time():
+        pass
+    assert counter.total() == 0
+    assert histogram.count() == 0
+
+
+def test_disabled_calls_are_cheap():
+    """Test the disabled fast path stays around a function call"""
+    calls = 100000
+    started = time.perf_counter()
+    for _ in range(calls):
+        metrics.HTTP_REQUESTS.inc(marketplace="amazon", status=200)
+        with metrics.PARSE_LATENCY.time(marketplace="amazon", kind="listing"):
+            pass
+    per_call = (time.perf_counter() - started) / calls
+    assert per_call < 5e-6
+
+
+def test_prometheus_text_format():
+    """Test counter and histogram exposition lines"""
+    registry = Registry()
+    registry.enabled = True
+    counter = Counter("requests", "Requests", ["status"], registry=registry)
+    histogram = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0), registry=registry)
+    counter.inc(status=200)
+    counter.inc(2, status=429)
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+
+    text = registry.render()
+    assert "# HELP requests_total Requests" in text
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{status="429"} 2' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "latency_seconds_count 3" in text
+
+
+def test_render_while_recording_from_threads():
+    """Test rendering is safe while other threads add label sets"""
+    registry = Registry()
+    registry.enabled = True
+    counter = Counter("requests", "Requests", ["worker"], registry=registry)
+    histogram = Histogram("latency_seconds", "Latency", ["worker"], registry=registry)
+
+    def record(worker):
+        for i in range(2000):
+            counter.inc(worker=f"{worker}-{i}")
+            histogram.observe(0.01, worker=f"{worker}-{i}")
+
+    threads = [threading.Thread(target=record, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        registry.render()
+        histogram.quantile(0.5)
+    for thread in threads:
+        thread.join()
+    assert counter.total() == histogram.count() == 8000
+
+
+def test_quantile_interpolates_within_bucket():
+    """Test quantile estimates follow histogram_quantile"""
+    registry = Registry()
+    registry.enabled = True
+    histogram = Histogram("latency_seconds", "Latency", buckets=(0.1, 0.2, 0.4), registry=registry)
+    for _ in range(50):
+        histogram.observe(0.05)
+    for _ in range(50):
+        histogram.observe(0.15)
+    assert histogram.quantile(0.5) == pytest.approx(0.1)
+    assert histogram.quantile(0.75) == pytest.approx(0.15)
+    assert Histogram("empty", "Empty", registry=registry).quantile(0.5) is None
+
+
+@pytest.mark.asyncio
+async def test_sweep_is_instrumented_and_served(enabled):
+    """Test a mock sweep fills the pipeline metrics and /metrics serves them"""
+    marketplace = MockMarketplace(MockConfig(pages=2, items_per_page=5, seed=0))
+    runner, base_url = await start_server(marketplace)
+    metrics_runner = await metrics.start_metrics_server(host="127.0.0.1", port=0)
+    port = metrics_runner.addresses[0][1]
+    auth = BStockAuthenticator("test@example.com", "password123", "amazon", base_url=f"{base_url}/amazon")
+    try:
+        await auth.login()
+        scraper = Scraper(auth.http_client(), AmazonParser(), auth.base_url, sink=CountingSink())
+        await scraper.sweep()
+
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                body = await response.text()
+                content_type = response.headers["Content-Type"]
+    finally:
+        await auth.close()
+        await metrics_runner.cleanup()
+        await runner.cleanup()
+
+    assert metrics.LOGINS.value(marketplace="amazon") == 1
+    assert metrics.HTTP_REQUESTS.value(marketplace="amazon", status=200) >= 3
+    assert metrics.ITEMS_PARSED.value(marketplace="amazon", kind="listing") == 10
+    assert metrics.PARSE_LATENCY.count(marketplace="amazon", kind="listing") >= 3
+    assert content_type.startswith("text/plain; version=0.0.4")
+    assert 'bstock_http_requests_total{marketplace="amazon",status="200"}' in body
+    assert "requests=" in metrics.summary()
@@ -0,0 +1,109 @@
+import threading
+import pytest
+from unittest.mock import patch
+from benchmarks.fixtures import listing_page
+from src.parsers.amazon_parser import AmazonParser
+from src.parsers.memo import ParseCache
+from src.parsers.pool import ParsePool
+from src.parsers.target_parser import TargetParser
+
+HTML = listing_page("amazon", 10, first_id=1, seed=1)
+
+
+def test_identical_page_skips_parsing():
+    """Test a byte-identical page is answered from the cache"""
+    parser = AmazonParser(cache=ParseCache())
+    with patch.object(AmazonParser, "parse_auction_list", wraps=parser.parse_auction_list) as parse:
+        first = parser.parse_listing(HTML)
+        second = parser.parse_listing(HTML)
+        parser.parse_listing(listing_page("amazon", 10, first_id=1, seed=2))
+
+    assert parse.call_count == 2
+    assert list(first) == list(second)
+    assert parser.cache.hits == 1
+    assert parser.cache.misses == 2
+    assert parser.cache.hit_rate == pytest.approx(1 / 3)
+
+
+def test_hits_return_independent_auctions():
+    """Test callers mutating a cached result do not affect later hits"""
+    parser = AmazonParser(cache=ParseCache())
+    auctions = list(parser.parse_listing(HTML))
+    auctions[0].current_bid = -1.0
+    assert list(parser.parse_listing(HTML))[0].current_bid != -1.0
+
+
+def test_keys_separate_parsers_and_kinds():
+    """Test the same body parsed by another parser or as a detail page misses"""
+    cache = ParseCache()
+    AmazonParser(cache=cache).parse_listing(HTML)
+    TargetParser(cache=cache).parse_listing(HTML)
+    assert AmazonParser(cache=cache).parse_detail(HTML) is None
+    assert cache.hits == 0
+    assert len(cache) == 3
+
+
+def test_lru_eviction():
+    """Test the least recently used entry is dropped at capacity"""
+    cache = ParseCache(max_entries=2)
+    parser = AmazonParser(cache=cache)
+    pages = [listing_page("amazon", 2, first_id=1, seed=seed) for seed in range(3)]
+    parser.parse_listing(pages[0])
+    parser.parse_listing(pages[1])
+    parser.parse_listing(pages[0])
+    parser.parse_listing(pages[2])
+
+    cache.hits = cache.misses = 0
+    parser.parse_listing(pages[0])
+    parser.parse_listing(pages[1])
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_disk_cache_shared_between_instances(tmp_path):
+    """Test a second process-level cache finds results written by the first"""
+    path = str(tmp_path / "parse_cache.sqlite3")
+    writer = ParseCache(path=path)
+    expected = list(AmazonParser(cache=writer).parse_listing(HTML))
+    writer.close()
+
+    reader = ParseCache(path=path)
+    with patch.object(AmazonParser, "parse_auction_list") as parse:
+        assert list(AmazonParser(cache=reader).parse_listing(HTML)) == expected
+    parse.assert_not_called()
+    assert reader.disk_hits == 1
+    reader.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_answers_repeats_without_workers():
+    """Test the parse pool checks the cache before submitting to a worker"""
+    pool = ParsePool(max_workers=1, cache=ParseCache())
+    try:
+        first = await pool.parse_listing("amazon", HTML)
+        second = await pool.parse_listing("amazon", HTML.encode("utf-8"))
+    finally:
+        pool.close()
+    assert list(first) == list(second)
+    assert pool.cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_cache_calls_leave_the_event_loop(tmp_path):
+    """Test the pool's SQLite-backed cache lookups and stores run outside the loop thread"""
+    cache = ParseCache(path=str(tmp_path / "parse_cache.sqlite3"))
+    threads = []
+    for name in ("get", "put"):
+        method = getattr(cache, name)
+        def record(*args, method=method):
+            threads.append(threading.get_ident())
+            return method(*args)
+        setattr(cache, name, record)
+
+    pool = ParsePool(max_workers=1, cache=cache)
+    try:
+        await pool.parse_listing("amazon", HTML)
+        await pool.parse_listing("amazon", HTML)
+    finally:
+        pool.close()
+    assert len(threads) == 3
+    assert threading.get_ident() not in threads
@@ -0,0 +1,52 @@
+import asyncio
+import pytest
+from pathlib import Path
+from src.parsers.pool import ParsePool
+
+FIXTURES = Path(__file__).resolve().parent.parent / "prompts"
+
+
+@pytest.fixture
+async def pool():
+    pool = ParsePool(max_workers=2, max_pending=2)
+    yield pool
+    pool.close()
+
+
+@pytest.mark.asyncio
+async def test_parse_listing_in_worker(pool):
+    """Test that listing pages are parsed in worker processes"""
+    body = (FIXTURES / "HTML target all-inventory.html").read_bytes()
+
+    auctions = await pool.parse_listing("target", body)
+
+    assert [a.auction_id for a in auctions] == ["119203"]
+    assert auctions[0].marketplace == "target"
+    assert auctions[0].source_url == "https://bstock.com/target/auction/auction/view/id/119203/"
+
+
+@pytest.mark.asyncio
+async def test_backpressure_limits_pending_pages(pool):
+    """Test that no more than max_pending pages are in the pool at once"""
+    body = (FIXTURES / "HTML amazon all-inventory.html").read_bytes()
+    peak = 0
+
+    async def parse():
+        nonlocal peak
+        task = asyncio.ensure_future(pool.parse_listing("amazon", body))
+        await asyncio.sleep(0)
+        peak = max(peak, pool.pending)
+        return await task
+
+    results = await asyncio.gather(*(parse() for _ in range(8)))
+
+    assert all(len(auctions) == 1 for auctions in results)
+    assert peak <= 2
+    assert pool.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_unknown_marketplace(pool):
+    """Test marketplace validation before submitting work"""
+    with pytest.raises(ValueError):
+        await pool.parse_listing("walmart", b"")
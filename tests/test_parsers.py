@@ -0,0 +1,125 @@
+import pytest
+from pathlib import Path
+from src.parsers.amazon_parser import AmazonParser
+from src.parsers.backends import BeautifulSoupBackend, LxmlBackend, get_backend
+from src.parsers.title import TitleExtractor
+
+FIXTURES = Path(__file__).resolve().parent.parent / "prompts"
+LISTING_FIXTURES = sorted(FIXTURES.glob("HTML * all-inventory.html"))
+
+
+def load_fixture(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+def test_amazon_listing_fixture():
+    """Test parsing the Amazon listing sample"""
+    auctions = AmazonParser().parse_auction_list(load_fixture("HTML amazon all-inventory.html"))
+
+    assert len(auctions) == 1
+    auction = auctions[0]
+    assert auction.auction_id == "26964"
+    assert auction.title.startswith("Est. 2 Pallets of Apparel & More, 974 Units")
+    assert auction.current_bid == 2202.0
+    assert auction.cost_per_unit == 2.26
+    assert auction.total_bids == 23
+    assert auction.total_units == 974
+    assert auction.condition == "Used - Good"
+    assert auction.retail_value == 44826.0
+    assert auction.location == "North Las Vegas, NV"
+    assert auction.source_url == "https://bstock.com/amazon/auction/auction/view/id/26964/"
+
+
+def test_unknown_title_fields_are_none():
+    """Test fields a vague title does not give are None rather than placeholders"""
+    html = load_fixture("HTML amazon all-inventory.html")
+    start = html.index(">", html.index('class="product-name"')) + 1
+    start = html.index(">", html.index("<a", start)) + 1
+    html = html[:start] + "Assorted Electronics" + html[html.index("</a>", start):]
+    auction = AmazonParser().parse_auction_list(html)[0]
+
+    assert auction.title == "Assorted Electronics"
+    assert (auction.total_units, auction.condition, auction.retail_value, auction.location) == (None,) * 4
+
+
+@pytest.mark.parametrize("fixture", LISTING_FIXTURES, ids=lambda p: p.name)
+def test_backend_parity(fixture):
+    """Test that lxml and BeautifulSoup backends produce identical auctions"""
+    html = fixture.read_text(encoding="utf-8")
+    # Repeat the listing item so multi-item pages are covered too
+    start, end = html.index("<li id="), html.rindex("</li>") + len("</li>")
+    html = html[:end] + html[start:end].replace('id="auction-', 'id="auction-9') + html[end:]
+
+    expected = AmazonParser(backend="bs4").parse_auction_list(html)
+    actual = AmazonParser(backend="lxml").parse_auction_list(html)
+
+    assert len(expected) == 2
+    assert actual == expected
+
+
+def test_backend_parity_skips_malformed_items():
+    """Test that both backends skip the same incomplete items"""
+    html = '<ul><li id="auction-1"><div class="product-name"><a>Only a title</a></div></li></ul>'
+
+    assert AmazonParser(backend="bs4").parse_auction_list(html) == []
+    assert AmazonParser(backend="lxml").parse_auction_list(html) == []
+
+
+def test_backend_resolution():
+    """Test backend lookup by name and instance"""
+    assert isinstance(get_backend("bs4"), BeautifulSoupBackend)
+    assert isinstance(get_backend("lxml"), LxmlBackend)
+    backend = BeautifulSoupBackend()
+    assert get_backend(backend) is backend
+    with pytest.raises(ValueError):
+        get_backend("regex")
+
+
+def test_lxml_backend_handles_empty_document():
+    """Test that an empty page parses to no auctions"""
+    assert AmazonParser(backend="lxml").parse_auction_list("") == []
+
+
+@pytest.mark.parametrize("marketplace", ["amazon", "target"])
+def test_backend_parity_on_synthetic_pages(marketplace):
+    """Test parity on a large page synthesized from the fixtures"""
+    from benchmarks.fixtures import listing_page
+    from src.parsers.pool import PARSERS
+
+    html = listing_page(marketplace, 200)
+    expected = PARSERS[marketplace](backend="bs4").parse_auction_list(html)
+    actual = PARSERS[marketplace](backend="lxml").parse_auction_list(html)
+
+    assert len(expected) == 200
+    assert len({a.current_bid for a in expected}) > 1
+    assert actual == expected
+
+
+@pytest.mark.parametrize("title, units, condition, retail, location, region", [
+    ("Est. 2 Pallets of Outdoors by Speedo, Retrospec, Bell & More, 981 Units, Used - Good Condition, "
+     "Ext. Retail $19,051, North Las Vegas, NV - West Coast",
+     981, "Used - Good", 19051.0, "North Las Vegas, NV", "West Coast"),
+    ("1 Pallet of Women's Apparel & Accessories by Levi's & More,\n      Used - Good Condition, "
+     "1,085 Units, Ext. Retail $24,050, Upper\n      Marlboro, MD",
+     1085, "Used - Good", 24050.0, "Upper Marlboro, MD", None),
+    ("Truckload of Home Goods, 12 Units, New Condition, Ext. Retail $1,234.50, Dallas, TX",
+     12, "New", 1234.5, "Dallas, TX", None),
+])
+def test_title_extractor(title, units, condition, retail, location, region):
+    """Test units, condition, retail and location are read from lot titles"""
+    fields = TitleExtractor().extract(title)
+
+    assert (fields.total_units, fields.condition, fields.retail_value) == (units, condition, retail)
+    assert (fields.location, fields.region) == (location, region)
+    assert fields.confident
+
+
+@pytest.mark.parametrize("title", [
+    "Est. 2 Pallets of Apparel & More, Used - Good Condition, Ext. Retail $44,826, North Las Vegas, NV",
+    "Est. 2 Pallets of Apparel, 974 Units, Used - Good Condition, Ext. Retail $44,826",
+    "Mixed lot, 10 Units, 20 Units, New Condition, Ext. Retail $500, Dallas, TX",
+    "Assorted Electronics",
+])
+def test_title_extractor_flags_low_confidence(title):
+    """Test missing or repeated fields are not trusted"""
+    assert not TitleExtractor().extract(title).confident
@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from src.core.rate_limiter import RateLimiter, TokenBucket
+from tests.conftest import FakeClock
+
+
+def test_bucket_allows_burst_then_queues():
+    """Test that a full bucket serves its capacity before imposing delays"""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1.0, capacity=3, clock=clock)
+
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Subsequent reservations queue up one refill interval apart
+    assert bucket.reserve() == pytest.approx(1.0)
+    assert bucket.reserve() == pytest.approx(2.0)
+
+
+def test_bucket_refills_up_to_capacity():
+    """Test that idle time refills tokens but never beyond capacity"""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, capacity=4, clock=clock)
+    for _ in range(4):
+        bucket.reserve()
+
+    clock.now += 1.0
+    assert bucket.tokens == pytest.approx(2.0)
+
+    clock.now += 100.0
+    assert bucket.tokens == pytest.approx(4.0)
+
+
+@pytest.mark.asyncio
+async def test_acquire_uses_asyncio_sleep():
+    """Test that waiting yields to the event loop instead of blocking it"""
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=60, burst=1, clock=clock)
+
+    with patch("src.core.rate_limiter.asyncio.sleep", new=AsyncMock()) as sleep:
+        assert await limiter.acquire("amazon")
+        sleep.assert_not_awaited()
+
+        assert await limiter.acquire("amazon")
+        sleep.assert_awaited_once()
+        assert sleep.await_args.args[0] == pytest.approx(1.0)
+
+
+@pytest.mark.asyncio
+async def test_marketplaces_have_independent_buckets():
+    """Test that exhausting one marketplace does not delay another"""
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=60, burst=1, clock=clock)
+
+    assert limiter.bucket("amazon").reserve() == 0.0
+    assert limiter.bucket("amazon").reserve() > 0
+    assert limiter.bucket("target").reserve() == 0.0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_waiters_are_spaced_by_rate():
+    """Test that many concurrent acquires are scheduled at the refill rate"""
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=600, burst=1, clock=clock)
+
+    with patch("src.core.rate_limiter.asyncio.sleep", new=AsyncMock()) as sleep:
+        await asyncio.gather(*(limiter.acquire("target") for _ in range(5)))
+
+    delays = sorted(call.args[0] for call in sleep.await_args_list)
+    assert delays == pytest.approx([0.1, 0.2, 0.3, 0.4])
+
+
+def test_invalid_rate():
+    """Test rate validation"""
+    with pytest.raises(ValueError):
+        RateLimiter(requests_per_minute=0)
@@ -0,0 +1,115 @@
+import asyncio
+import pytest
+from datetime import datetime
+from src.core.rate_limiter import RateLimiter
+from src.core.scraper import CrawlScheduler, refresh_interval
+from src.models.auction import Auction
+from tests.conftest import FakeClock, make_auction
+
+NOW = 1_730_000_000.0
+
+
+def closing_in(auction_id: str, seconds_left: float, marketplace: str = "amazon") -> Auction:
+    """``make_auction`` ending ``seconds_left`` after ``NOW``"""
+    return make_auction(auction_id, end_time=datetime.fromtimestamp(NOW + seconds_left), marketplace=marketplace)
+
+
+def test_refresh_interval_shrinks_near_close():
+    """Test that the interval tracks time left within its bounds"""
+    assert refresh_interval(7 * 24 * 3600) == 3 * 3600
+    assert refresh_interval(600) == 60
+    assert refresh_interval(30) == 5
+    assert refresh_interval(None) == 3 * 3600
+
+
+def test_due_order_follows_deadlines():
+    """Test that auctions closing sooner become due sooner"""
+    clock = FakeClock(NOW)
+    scheduler = CrawlScheduler(refresh=None, rate_limiter=RateLimiter(), clock=clock)
+    scheduler.schedule(closing_in("week", 7 * 24 * 3600))
+    scheduler.schedule(closing_in("minutes", 300))
+
+    assert scheduler.next_due_in() == pytest.approx(30)
+    clock.now += 30
+    assert scheduler.promote_due() == 1
+    assert scheduler.pop_ready("amazon").auction_id == "minutes"
+    assert scheduler.pop_ready("amazon") is None
+
+
+def test_overdue_auctions_dispatch_most_urgent_first():
+    """Test that a backlog is drained in end_time order, not due order"""
+    clock = FakeClock(NOW)
+    scheduler = CrawlScheduler(refresh=None, rate_limiter=RateLimiter(), clock=clock)
+    scheduler.schedule(closing_in("tomorrow", 24 * 3600), due=NOW - 100)
+    scheduler.schedule(closing_in("closing", 60), due=NOW - 1)
+
+    scheduler.promote_due()
+    assert [scheduler.pop_ready("amazon").auction_id for _ in range(2)] == ["closing", "tomorrow"]
+
+
+def test_rescheduling_replaces_previous_entry():
+    """Test that an auction is only dispatched once after being rescheduled"""
+    clock = FakeClock(NOW)
+    scheduler = CrawlScheduler(refresh=None, rate_limiter=RateLimiter(), clock=clock)
+    scheduler.schedule(closing_in("a", 3600), due=NOW)
+    scheduler.promote_due()
+    scheduler.schedule(closing_in("a", 3600), due=NOW)
+    scheduler.promote_due()
+
+    assert scheduler.pop_ready("amazon").auction_id == "a"
+    assert scheduler.pop_ready("amazon") is None
+
+
+def test_closed_auction_gets_one_final_refresh():
+    """Test that ended auctions are polled once more and then dropped"""
+    clock = FakeClock(NOW)
+    scheduler = CrawlScheduler(refresh=None, rate_limiter=RateLimiter(), clock=clock)
+    ended = closing_in("ended", -1)
+
+    scheduler.schedule(ended)
+    assert len(scheduler) == 1
+    scheduler.schedule(ended)
+    assert len(scheduler) == 0
+
+
+@pytest.mark.asyncio
+async def test_run_refreshes_within_budget():
+    """Test that dispatch refreshes due auctions through the rate limiter"""
+    refreshed = []
+
+    async def refresh(auction):
+        refreshed.append(auction.auction_id)
+        return None
+
+    scheduler = CrawlScheduler(refresh=refresh, rate_limiter=RateLimiter(requests_per_minute=6000))
+    scheduler.schedule(closing_in("a", 10 ** 9), due=0)
+    scheduler.schedule(closing_in("b", 10 ** 9, marketplace="target"), due=0)
+
+    runner = asyncio.create_task(scheduler.run(["amazon", "target"]))
+    for _ in range(50):
+        if len(refreshed) == 2:
+            break
+        await asyncio.sleep(0.01)
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+
+    assert sorted(refreshed) == ["a", "b"]
+    # Both auctions are far from closing, so they wait a full interval again
+    assert scheduler.next_due_in() > 3600
+
+
+@pytest.mark.asyncio
+async def test_dispatch_spends_no_token_on_stale_entries():
+    """Test that a ready entry removed before dispatch costs no rate-limit token"""
+    limiter = RateLimiter(requests_per_minute=60)
+    scheduler = CrawlScheduler(refresh=None, rate_limiter=limiter)
+    scheduler.schedule(closing_in("gone", 10 ** 9), due=0)
+    scheduler.promote_due()
+    scheduler.remove("gone")
+
+    runner = asyncio.create_task(scheduler.run(["amazon"]))
+    await asyncio.sleep(0.05)
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+
+    assert limiter.bucket("amazon").tokens == pytest.approx(60)
@@ -0,0 +1,365 @@
+import pytest
+from datetime import datetime
+from benchmarks.fixtures import listing_page
+from benchmarks.load_test import CountingSink
+from benchmarks.mock_server import MockConfig, MockMarketplace, start_server
+from src.core.accounts import AccountPool
+from src.core.auth import AuthenticationError, BStockAuthenticator
+from src.core.scraper import ListingState, Scraper, page_fingerprint
+from src.parsers.amazon_parser import AmazonParser
+from src.utils.http import FetchResult, HTTPClient
+from src.utils.http_cache import HTTPCache
+
+
+@pytest.fixture
+async def mock():
+    """Local B-Stock stand-in with three listing pages"""
+    marketplace = MockMarketplace(MockConfig(pages=3, items_per_page=5, seed=0))
+    runner, base_url = await start_server(marketplace)
+    yield marketplace, base_url
+    await runner.cleanup()
+
+
+@pytest.fixture
+async def auth(mock):
+    _, base_url = mock
+    auth = BStockAuthenticator("test@example.com", "password123", "amazon", base_url=f"{base_url}/amazon")
+    await auth.create_session()
+    yield auth
+    await auth.close()
+
+
+@pytest.mark.asyncio
+async def test_login_against_mock(mock, auth):
+    """Test the form_key login flow end to end"""
+    marketplace, _ = mock
+    await auth.login()
+
+    assert auth.is_authenticated()
+    assert auth.auth_token
+    assert marketplace.stats.logins == 1
+
+
+@pytest.mark.asyncio
+async def test_login_rejects_bad_credentials(mock, auth):
+    """Test that a rejected login lands back on the login page"""
+    marketplace, _ = mock
+    auth.password = ""
+
+    with pytest.raises(AuthenticationError):
+        await auth.login()
+    assert marketplace.stats.logins == 0
+
+
+@pytest.mark.asyncio
+async def test_mock_never_throttles_login():
+    """Test injected 429s hit crawl routes only, so logging in always works"""
+    marketplace = MockMarketplace(MockConfig(pages=1, items_per_page=5, seed=0, throttle_rate=1.0))
+    runner, base_url = await start_server(marketplace)
+    auth = BStockAuthenticator("test@example.com", "password123", "amazon", base_url=f"{base_url}/amazon")
+    try:
+        await auth.login()
+        result = await auth.http_client(max_retries=0).fetch(f"{base_url}/amazon/?p=1")
+        assert result.status == 429
+        assert marketplace.stats.throttled == 1
+    finally:
+        await auth.close()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_sweep_collects_all_pages(mock, auth):
+    """Test a full listing sweep with detail fetches"""
+    marketplace, _ = mock
+    await auth.login()
+    sink = CountingSink()
+    scraper = Scraper(auth.http_client(), AmazonParser(), auth.base_url, sink=sink, page_window=2,
+                      fetch_shipping=True)
+
+    stats = await scraper.sweep(details=True)
+
+    assert stats.auctions == 15
+    assert stats.details == 15
+    assert stats.failures == 0
+    # Each auction reaches the sink from its listing and again from its detail page
+    assert sink.rows == 30
+    assert marketplace.stats.by_route["listing"] == 4  # three pages plus the empty one
+
+
+@pytest.mark.asyncio
+async def test_sweep_skips_details_for_confident_titles(mock, auth):
+    """Test listing titles fill the detail fields so no detail page is needed"""
+    marketplace, _ = mock
+    await auth.login()
+    sink = CountingSink()
+    scraper = Scraper(auth.http_client(), AmazonParser(), auth.base_url, sink=sink, page_window=2)
+
+    stats = await scraper.sweep(details=True)
+
+    assert stats.auctions == 15
+    assert stats.details == 0
+    assert stats.details_skipped == 15
+    assert marketplace.stats.by_route.get("detail", 0) == 0
+
+
+@pytest.mark.asyncio
+async def test_requests_require_login(mock, auth):
+    """Test that the mock refuses unauthenticated listing requests"""
+    _, base_url = mock
+    response = await auth.session.get(f"{base_url}/amazon/?p=1")
+    assert response.status == 403
+
+
+@pytest.mark.asyncio
+async def test_dropped_session_redirect_logs_in_again():
+    """Test a redirect to the login page is not a listing page and triggers a fresh login"""
+    marketplace = MockMarketplace(MockConfig(pages=2, items_per_page=5, seed=0, redirect_to_login=True))
+    runner, base_url = await start_server(marketplace)
+    auth = BStockAuthenticator("test@example.com", "password123", "amazon", base_url=f"{base_url}/amazon")
+    try:
+        await auth.login()
+        client = auth.http_client()
+        marketplace._sessions.clear()
+
+        result = await client.fetch(f"{base_url}/amazon/?p=1")
+        assert result.ok
+        assert marketplace.stats.logins == 2
+
+        marketplace._sessions.clear()
+        result = await auth.http_client(on_logged_out=None).fetch(f"{base_url}/amazon/?p=1")
+        assert result.logged_out and result.status == 200 and not result.ok
+        assert result.final_url.endswith("/amazon/customer/account/login/")
+    finally:
+        await auth.close()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_logged_out_crawl_keeps_tracked_auctions():
+    """Test a login page in place of listing page 1 does not count as the end of the listing"""
+    page = listing_page("amazon", 3, first_id=1, seed=0)
+    client = StubClient({1: page})
+    state = ListingState()
+    scraper = Scraper(client, AmazonParser(), "https://bstock.com/amazon", sink=CountingSink(), state=state)
+    await scraper.sweep()
+    assert set(state.auctions) == {"1", "2", "3"}
+
+    async def fetch_many(urls, max_in_flight=None):
+        for url in urls:
+            yield FetchResult(url=url, status=200, text="<html>Log in</html>",
+                              final_url="https://bstock.com/amazon/customer/account/login/", logged_out=True)
+
+    client.fetch_many = fetch_many
+    stats = await scraper.sweep()
+    assert stats.failures == scraper.page_window
+    assert set(state.auctions) == {"1", "2", "3"}
+
+
+@pytest.mark.asyncio
+async def test_incremental_sweep_stops_on_unchanged_pages(tmp_path):
+    """Test a repeat sweep stops early and only emits changed auctions"""
+    marketplace = MockMarketplace(MockConfig(pages=8, items_per_page=5, seed=0))
+    runner, base_url = await start_server(marketplace)
+    auth = BStockAuthenticator("test@example.com", "password123", "amazon", base_url=f"{base_url}/amazon")
+    try:
+        await auth.login()
+        state_path = str(tmp_path / "listing_state.json")
+        sink = CountingSink()
+        scraper = Scraper(auth.http_client(), AmazonParser(), auth.base_url, sink=sink,
+                          page_window=2, state=ListingState(state_path), stop_after_unchanged=2,
+                          fetch_shipping=True)
+
+        first = await scraper.sweep()
+        assert first.changed == 40
+        assert first.unchanged_pages == 0
+
+        # Bids move on page 1 only
+        marketplace._pages[("amazon", 1)] = listing_page(
+            "amazon", 5, first_id=marketplace.first_id("amazon", 1), seed=99)
+        before = marketplace.stats.by_route["listing"]
+        scraper.state = ListingState(state_path)
+        second = await scraper.sweep(details=True)
+
+        assert marketplace.stats.by_route["listing"] - before == 4
+        assert second.unchanged_pages == 2
+        assert 0 < second.changed <= 5
+        assert second.details == second.changed
+        assert sink.rows == 40 + 2 * second.changed
+    finally:
+        await auth.close()
+        await runner.cleanup()
+
+
+def test_page_fingerprint_tracks_bids():
+    """Test fingerprints change with bids but not with unrelated fields"""
+    auctions = AmazonParser().parse_auction_list(listing_page("amazon", 3, first_id=1, seed=1))
+    fingerprint = page_fingerprint(auctions)
+    auctions[0].title = "renamed"
+    assert page_fingerprint(auctions) == fingerprint
+    auctions[0].current_bid += 1
+    assert page_fingerprint(auctions) != fingerprint
+
+
+class CachedPagesClient:
+    """Serves each listing page once in full, then as a 304 with the cached body"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.seen = set()
+
+    async def fetch_many(self, urls, **kwargs):
+        for url in urls:
+            number = int(url.rsplit("=", 1)[1])
+            body = self.pages.get(number, listing_page("amazon", 0, first_id=1))
+            not_modified = url in self.seen
+            self.seen.add(url)
+            yield FetchResult(url, status=304 if not_modified else 200, text=body,
+                              headers={"ETag": f'"{number}"'}, not_modified=not_modified)
+
+
+@pytest.mark.asyncio
+async def test_not_modified_pages_reuse_previous_parse():
+    """Test a 304 reuses the earlier parse instead of parsing the page again"""
+    parser = AmazonParser()
+    parsed = []
+    parse_listing = parser.parse_listing
+    parser.parse_listing = lambda html: parsed.append(html) or parse_listing(html)
+    client = CachedPagesClient({1: listing_page("amazon", 5, first_id=1, seed=0)})
+    sink = CountingSink()
+    scraper = Scraper(client, parser, "https://bstock.com/amazon", sink=sink, page_window=2)
+
+    await scraper.sweep()
+    await scraper.sweep()
+
+    assert len(parsed) == 2     # page 1 and the empty page 2, parsed once each
+    assert sink.rows == 10
+
+
+def test_from_settings_gives_client_the_http_cache(tmp_path):
+    """Test the scraper built from settings revalidates through the on-disk cache"""
+    from config.settings import Settings
+    settings = Settings(
+        DB_HOST="localhost", DB_PORT="5432", DB_NAME="db", DB_USER="u", DB_PASSWORD="p",
+        BSTOCK_EMAIL="a@example.com", BSTOCK_PASSWORD="pa", HTTP_CACHE_MAX_BYTES=1 << 20,
+        HTTP_CACHE_PATH=str(tmp_path / "http_cache.sqlite3"), AMAZON_BASE_URL="http://127.0.0.1:8080/amazon",
+        _env_file=None,
+    )
+    client = HTTPClient()
+    scraper = Scraper.from_settings(AmazonParser(), client, settings)
+
+    assert isinstance(client.cache, HTTPCache)
+    assert scraper.base_url == "http://127.0.0.1:8080/amazon"
+    assert settings.base_urls()["target"] == "https://bstock.com/target"
+    client.cache.close()
+
+
+def test_from_settings_shards_over_accounts(tmp_path):
+    """Test without a client the scraper crawls through an account pool sharing the cache"""
+    from config.settings import Settings
+    settings = Settings(
+        DB_HOST="localhost", DB_PORT="5432", DB_NAME="db", DB_USER="u", DB_PASSWORD="p",
+        BSTOCK_EMAIL="a@example.com", BSTOCK_PASSWORD="pa", BSTOCK_ACCOUNTS=[("b@example.com", "pb")],
+        HTTP_CACHE_PATH=str(tmp_path / "http_cache.sqlite3"), SESSION_COOKIE_DIR=str(tmp_path / "sessions"),
+        _env_file=None,
+    )
+    scraper = Scraper.from_settings(AmazonParser(), settings=settings)
+
+    assert isinstance(scraper.client, AccountPool)
+    assert len(scraper.client) == 2
+    caches = {id(a.client_kwargs["cache"]) for a in scraper.client.accounts.values()}
+    assert len(caches) == 1
+    next(iter(scraper.client.accounts.values())).client_kwargs["cache"].close()
+
+
+class StubClient:
+    """Serves fixed listing pages; detail pages fail while their auction ID is in ``failing``"""
+
+    def __init__(self, pages, failing=()):
+        self.pages = pages
+        self.failing = set(failing)
+
+    async def fetch_many(self, urls, **kwargs):
+        for url in urls:
+            if "?p=" in url:
+                number = int(url.rsplit("=", 1)[1])
+                yield FetchResult(url, status=200, text=self.pages.get(number, listing_page("amazon", 0)))
+            elif url.rstrip("/").rsplit("/", 1)[1] in self.failing:
+                yield FetchResult(url, error="boom")
+            else:
+                yield FetchResult(url, status=200, text="<html></html>")
+
+
+class FailingSink(CountingSink):
+    def __init__(self, failures: int = 1):
+        super().__init__()
+        self.failures = failures
+
+    def add_many(self, auctions, observed_at=None) -> int:
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database is down")
+        return super().add_many(auctions)
+
+
+@pytest.mark.asyncio
+async def test_failed_write_is_retried_next_sweep():
+    """Test fingerprints are only recorded once the sink accepted the auctions"""
+    client = StubClient({1: listing_page("amazon", 5, first_id=1, seed=0)})
+    sink = FailingSink()
+    scraper = Scraper(client, AmazonParser(), "https://bstock.com/amazon", sink=sink, state=ListingState())
+
+    with pytest.raises(RuntimeError):
+        await scraper.sweep()
+    assert scraper.state.auctions == {}
+
+    stats = await scraper.sweep()
+    assert stats.changed == 5
+    assert sink.rows == 5
+
+
+@pytest.mark.asyncio
+async def test_failed_detail_fetch_is_retried_next_sweep():
+    """Test an auction whose detail page failed stays changed until the fetch succeeds"""
+    client = StubClient({1: listing_page("amazon", 3, first_id=1, seed=0)}, failing={"2"})
+    scraper = Scraper(client, AmazonParser(), "https://bstock.com/amazon", sink=CountingSink(),
+                      state=ListingState(), fetch_shipping=True)
+
+    first = await scraper.sweep(details=True)
+    assert (first.details, first.failures) == (2, 1)
+    assert set(scraper.state.auctions) == {"1", "3"}
+
+    client.failing.clear()
+    second = await scraper.sweep(details=True)
+    assert second.changed == 1
+    assert second.details == 1
+    assert set(scraper.state.auctions) == {"1", "2", "3"}
+
+
+def test_listing_state_prunes_finished_auctions():
+    """Test ended auctions and ones missing from a complete sweep are forgotten"""
+    state = ListingState(ended_grace=60)
+    auctions = AmazonParser().parse_auction_list(listing_page("amazon", 3, first_id=1, seed=1))
+    auctions[0].end_time = datetime(2024, 11, 2, 14, 48)
+    state.record(auctions)
+
+    state.changed(auctions[:2])
+    assert state.prune(complete=False, now=auctions[0].end_time.timestamp() + 30) == 0
+    state.changed(auctions[:2])
+    assert state.prune(complete=True, now=auctions[0].end_time.timestamp() + 30) == 1
+    assert set(state.auctions) == {"1", "2"}
+    assert state.prune(now=auctions[0].end_time.timestamp() + 120) == 1
+    assert set(state.auctions) == {"2"}
+
+
+def test_listing_state_save_is_atomic_and_load_tolerates_corruption(tmp_path):
+    """Test state is swapped in whole and a corrupt file starts a fresh state"""
+    path = tmp_path / "listing_state.json"
+    state = ListingState(str(path))
+    state.record_page(1, "abc")
+    state.save()
+    assert ListingState(str(path)).pages == {1: "abc"}
+    assert list(tmp_path.iterdir()) == [path]
+
+    path.write_text('{"pages": {"1": "ab')
+    restored = ListingState(str(path))
+    assert restored.pages == {} and restored.auctions == {}
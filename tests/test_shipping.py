@@ -0,0 +1,159 @@
+import math
+import numpy as np
+import pytest
+from benchmarks.fixtures import DETAIL_FIXTURES, load_fixture
+from benchmarks.load_test import CountingSink
+from benchmarks.mock_server import MockConfig, MockMarketplace, start_server
+from src.core.auth import BStockAuthenticator
+from src.core.scraper import Scraper
+from src.models.auction import Auction
+from src.models.batch import AuctionBatch
+from src.models.shipping import ShippingEstimator, fit_rate, location_state, pallet_count
+from src.parsers.amazon_parser import AmazonParser
+from src.parsers.target_parser import TargetParser
+from tests.conftest import make_auction
+
+DESTINATION = "Omaha, NE"
+
+
+def pallet_lot(auction_id: str, pallets: int = 1, location: str = "North Las Vegas, NV",
+               current_bid: float = 1000.0, total_units: int = 100, **overrides) -> Auction:
+    """``make_auction`` for a lot whose title states its pallet count"""
+    fields = dict(
+        title=f"Est. {pallets} Pallets of Apparel & More, {total_units} Units, Used - Good Condition, "
+              f"Ext. Retail $10,000, {location}",
+        current_bid=current_bid,
+        total_units=total_units,
+        retail_value=10000.0,
+        location=location,
+        cost_per_unit=None,
+    )
+    fields.update(overrides)
+    return make_auction(auction_id, **fields)
+
+
+@pytest.fixture
+def estimator():
+    """Vegas lane priced at $100 + $150/pallet, one Henderson quote"""
+    estimator = ShippingEstimator(DESTINATION, min_observations=3)
+    for pallets in (1, 2, 3, 4):
+        estimator.observe("North Las Vegas, NV", pallets, 100 + 150 * pallets)
+    estimator.observe("Henderson, NV", 2, 420.0)
+    return estimator
+
+
+def test_title_helpers():
+    """Test pallet counts and states are read from titles and locations"""
+    assert pallet_count("Est. 2 Pallets of Apparel & More") == 2
+    assert pallet_count("1 Pallet of Women's Apparel") == 1
+    assert pallet_count("Truckload of Home Goods") == 26
+    assert pallet_count("Assorted Electronics") == 1
+    assert location_state("Upper Marlboro, MD") == "MD"
+    assert location_state("Somewhere") is None
+
+
+def test_fit_rate():
+    """Test a fixed plus per-pallet fit, and the per-pallet fallback"""
+    rate = fit_rate(np.array([1.0, 2.0, 4.0]), np.array([250.0, 400.0, 700.0]))
+    assert rate.base == pytest.approx(100)
+    assert rate.per_pallet == pytest.approx(150)
+
+    flat = fit_rate(np.array([2.0, 2.0]), np.array([300.0, 500.0]))
+    assert (flat.base, flat.per_pallet) == (0.0, pytest.approx(200))
+
+
+def test_rate_falls_back_to_state_then_overall(estimator):
+    """Test lanes without enough quotes borrow from the state lane and the overall fit"""
+    assert estimator.rate_for("North Las Vegas, NV").cost(2) == pytest.approx(400)
+    # Henderson has one quote; the NV -> NE pool has five
+    assert ("NV", "NE") in estimator.rates()
+    assert ("Henderson, NV", DESTINATION) not in estimator.rates()
+    assert estimator.rate_for("Henderson, NV").observations == 5
+    # Nothing known about Texas or this destination
+    assert estimator.rate_for("Dallas, TX").observations == 5
+    assert estimator.rate_for("Dallas, TX", "Miami, FL") is estimator.rate_for(None)
+
+
+def test_estimate_batch(estimator):
+    """Test a batch is priced column-wise and known quotes are kept"""
+    batch = AuctionBatch.from_auctions([
+        pallet_lot("1", pallets=2),
+        pallet_lot("2", pallets=3, shipping_cost=99.0),
+        pallet_lot("3", pallets=1, location="North Las Vegas, NV"),
+    ])
+    assert estimator.estimate(batch).tolist() == pytest.approx([400.0, 99.0, 250.0])
+
+    empty = ShippingEstimator(DESTINATION)
+    assert math.isnan(empty.estimate(batch)[0])
+    assert empty.estimate(batch)[1] == 99.0
+
+
+def test_rank_by_landed_cost_per_unit(estimator):
+    """Test lots are ranked by (bid + shipping) / units with unknowns last"""
+    batch = AuctionBatch.from_auctions([
+        pallet_lot("pricey", current_bid=5000.0),
+        pallet_lot("cheap", current_bid=100.0, pallets=4),
+        pallet_lot("no-units", current_bid=1.0, total_units=0),
+        pallet_lot("middle", current_bid=1000.0),
+    ])
+    landed = estimator.landed_cost_per_unit(batch)
+    assert landed[1] == pytest.approx((100 + 700) / 100)
+    assert math.isnan(landed[2])
+    assert [batch[i].auction_id for i in estimator.rank(batch)] == ["cheap", "middle", "pricey", "no-units"]
+    assert estimator.rank(batch, top=1).tolist() == [1]
+
+
+def test_rates_persist(tmp_path, estimator):
+    """Test observations survive a restart"""
+    path = str(tmp_path / "rates.json")
+    estimator.save(path)
+
+    restored = ShippingEstimator(DESTINATION, min_observations=3, path=path)
+    assert restored.rates() == estimator.rates()
+
+
+def test_scraper_fetches_shipping_for_cheapest_lots(estimator):
+    """Test only the top landed-cost lots get a detail fetch for shipping"""
+    auctions = [pallet_lot(str(i), current_bid=1000.0 * (i + 1)) for i in range(5)]
+    vague = pallet_lot("vague", title="Assorted Electronics")
+    scraper = Scraper(None, AmazonParser(), "https://bstock.com/amazon", fetch_shipping=True,
+                      shipping_estimator=estimator, shipping_top=2)
+
+    targets = scraper.detail_targets(auctions + [vague])
+    assert [a.auction_id for a in targets] == ["vague", "0", "1"]
+
+
+def test_detail_pages_teach_the_estimator():
+    """Test the shipping quotes on the sample detail pages become lane rates"""
+    estimator = ShippingEstimator(DESTINATION, min_observations=1)
+    details = [parser.parse_detail(load_fixture(DETAIL_FIXTURES[parser.marketplace]))
+               for parser in (AmazonParser(), TargetParser())]
+    assert [(a.auction_id, a.shipping_cost, a.location) for a in details] == [
+        ("27096", 262.68, "North Las Vegas, NV"), ("119203", 370.66, "Upper Marlboro, MD")]
+
+    assert estimator.observe_auctions(details) == 2
+    assert estimator.rate_for("North Las Vegas, NV").cost(2) == pytest.approx(262.68)
+    assert estimator.rate_for("Upper Marlboro, MD").cost(1) == pytest.approx(370.66)
+
+
+@pytest.mark.asyncio
+async def test_detail_sweep_learns_and_saves_rates(tmp_path):
+    """Test a sweep with detail pages records their shipping quotes and saves the rates"""
+    marketplace = MockMarketplace(MockConfig(pages=1, items_per_page=3, seed=0))
+    runner, base_url = await start_server(marketplace)
+    auth = BStockAuthenticator("test@example.com", "password123", "amazon", base_url=f"{base_url}/amazon")
+    path = tmp_path / "rates.json"
+    estimator = ShippingEstimator(DESTINATION, min_observations=1, path=str(path))
+    try:
+        await auth.login()
+        scraper = Scraper(auth.http_client(), AmazonParser(), auth.base_url, sink=CountingSink(),
+                          fetch_shipping=True, shipping_estimator=estimator)
+        stats = await scraper.sweep(details=True)
+        assert stats.details == 3
+    finally:
+        await auth.close()
+        await runner.cleanup()
+
+    assert estimator.rate_for("North Las Vegas, NV").observations == 3
+    restored = ShippingEstimator(DESTINATION, min_observations=1, path=str(path))
+    assert restored.rates() == estimator.rates()
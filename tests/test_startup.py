@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def loaded_after_import(module: str, packages):
+    """Import ``module`` in a clean interpreter without DB settings and report which packages it loaded"""
+    env = {k: v for k, v in os.environ.items() if not k.startswith(("DB_", "BSTOCK_", "DATABASE_"))}
+    code = (
+        f"import json, sys; import {module}; "
+        f"print(json.dumps([p for p in {list(packages)!r} if p in sys.modules]))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def test_parser_pool_import_skips_unrelated_subsystems():
+    """Test parser workers don't load the database, HTTP or settings stacks"""
+    loaded = loaded_after_import("src.parsers.pool", ["sqlalchemy", "aiohttp", "pydantic", "bs4"])
+    assert loaded == []
+
+
+def test_database_import_does_not_connect():
+    """Test importing the database module loads neither SQLAlchemy nor DB settings"""
+    loaded = loaded_after_import("src.storage.database", ["sqlalchemy", "psycopg2", "pydantic", "config.settings"])
+    assert loaded == []
+
+
+def test_models_load_on_first_access():
+    """Test the models are still reachable from the database module"""
+    from src.storage import database, models
+    assert database.AuctionDB is models.AuctionDB
+    assert database.Base.metadata.tables["auctions"] is models.AuctionDB.__table__
+    with pytest.raises(AttributeError):
+        database.Missing
+
+
+@pytest.fixture
+def settings():
+    from config.settings import Settings
+    return Settings(
+        DB_HOST="db.internal", DB_PORT="5433", DB_NAME="bstock", DB_USER="u", DB_PASSWORD="p",
+        BSTOCK_EMAIL="a@example.com", BSTOCK_PASSWORD="pa", DB_POOL_SIZE=3,
+        _env_file=None,
+    )
+
+
+def test_engine_is_created_once_from_settings(monkeypatch, settings):
+    """Test the engine is built lazily from get_settings() and then reused"""
+    from src.storage import database
+    database.dispose_engine()
+    monkeypatch.setattr("config.settings.get_settings", lambda: settings)
+    try:
+        engine = database.get_engine()
+        assert engine.url.host == "db.internal"
+        assert engine.url.port == 5433
+        assert engine.pool.size() == 3
+        assert database.get_engine() is engine
+        assert database.engine is engine
+        assert database.SessionLocal.kw["bind"] is engine
+    finally:
+        database.dispose_engine()
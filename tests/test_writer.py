@@ -0,0 +1,291 @@
+import asyncio
+import csv
+import re
+import threading
+import pytest
+from datetime import date, datetime
+from unittest.mock import MagicMock
+from src.models.batch import AuctionBatch
+from src.storage.writer import (
+    AsyncAuctionWriter, AuctionWriter, COLUMNS, COPY_SQL, CREATE_STAGE_SQL, MERGE_SQL, NULLABLE_COLUMNS,
+    SNAPSHOT_SQL, STAGE_COLUMNS, snapshot_partition_sql, to_copy_buffer
+)
+from tests.conftest import make_auction
+
+
+@pytest.fixture
+def engine():
+    """Engine whose raw connection records executed statements"""
+    engine = MagicMock()
+    cursor = engine.raw_connection.return_value.cursor.return_value
+    cursor.rowcount = 1
+    return engine
+
+
+def test_copy_buffer_distinguishes_null_and_empty():
+    """Test that NULLs come back as NULL only in non-text columns"""
+    buffer = to_copy_buffer([make_auction(condition="", location="", shipping_cost=None)])
+    line = buffer.getvalue().strip()
+    row = next(csv.reader([line]))
+
+    assert row[0] == "26964"
+    assert ',"",' in line          # empty condition is a quoted empty string
+    assert ",,2.26" not in line    # cost_per_unit is present
+    assert row[8] == "2024-11-02 14:48:00"
+    assert row[9] == ""            # shipping_cost is NULL
+    assert "FORCE_NULL" in COPY_SQL and "shipping_cost" in COPY_SQL.split("FORCE_NULL")[1]
+
+
+def copy_csv_values(line: str, force_null: list) -> dict:
+    """Values PostgreSQL's ``COPY ... (FORMAT csv, FORCE_NULL ...)`` would load from one line"""
+    fields, value, quoted, in_quotes, i = [], "", False, False, 0
+    while i < len(line):
+        char = line[i]
+        if in_quotes:
+            if char == '"' and line[i + 1:i + 2] == '"':
+                value += '"'
+                i += 1
+            elif char == '"':
+                in_quotes = False
+            else:
+                value += char
+        elif char == '"':
+            in_quotes = quoted = True
+        elif char == ",":
+            fields.append((value, quoted))
+            value, quoted = "", False
+        else:
+            value += char
+        i += 1
+    fields.append((value, quoted))
+    # Unquoted empty fields are NULL; FORCE_NULL also nulls quoted empty ones
+    return {
+        column: None if value == "" and (not quoted or column in force_null) else value
+        for column, (value, quoted) in zip(COLUMNS, fields)
+    }
+
+
+def test_copy_loads_none_as_null_and_keeps_empty_strings():
+    """Test a listing-page row loads NULL shipping cost but an empty condition"""
+    force_null = [c.strip() for c in COPY_SQL.split("FORCE_NULL (")[1].rstrip(")").split(",")]
+    auction = make_auction(condition="", location="", shipping_cost=None, total_bids=None)
+    line = to_copy_buffer([auction]).getvalue().strip()
+    loaded = copy_csv_values(line, force_null)
+
+    assert loaded["shipping_cost"] is None
+    assert loaded["total_bids"] is None
+    assert loaded["condition"] == ""
+    assert loaded["location"] == ""
+    assert loaded["cost_per_unit"] == "2.26"
+
+
+def test_every_non_text_column_is_nullable():
+    """Test a None in any numeric or timestamp column loads as NULL instead of failing the COPY"""
+    types = dict(re.findall(r"^ +(\w+) (\w+)", CREATE_STAGE_SQL, re.M))
+    assert set(types) == set(STAGE_COLUMNS)
+    assert {c for c, kind in types.items() if kind != "VARCHAR"} == set(NULLABLE_COLUMNS)
+
+
+def test_merge_only_updates_changed_rows():
+    """Test that the merge skips unchanged rows and keeps detail values"""
+    assert "ON CONFLICT (auction_id) DO UPDATE" in MERGE_SQL
+    assert "IS DISTINCT FROM" in MERGE_SQL
+    assert "COALESCE(EXCLUDED.shipping_cost, auctions.shipping_cost)" in MERGE_SQL
+    # Fields a vague title leaves unknown keep what a detail page filled in
+    for column in ("total_units", "condition", "retail_value", "location"):
+        assert f"COALESCE(EXCLUDED.{column}, auctions.{column})" in MERGE_SQL
+
+
+def test_observed_rows_never_overwrite_newer_ones(engine):
+    """Test replayed rows carry their fetch time and the merge skips rows changed later"""
+    assert "auctions.observed_at <= EXCLUDED.observed_at" in MERGE_SQL
+    assert "COALESCE(observed_at, now() AT TIME ZONE 'utc')" in MERGE_SQL
+    # updated_at stays the write time, so incremental exports pick replayed rows up
+    assert "now() AT TIME ZONE 'utc', now() AT TIME ZONE 'utc'\nFROM" in MERGE_SQL
+
+    writer = AuctionWriter(engine=engine, record_snapshots=False)
+    writer.add_many([make_auction("1")], observed_at=datetime(2024, 11, 1, 9, 30))
+    writer.add_many([make_auction("2")])
+    writer.flush()
+
+    cursor = engine.raw_connection.return_value.cursor.return_value
+    lines = cursor.copy_expert.call_args.args[1].getvalue().splitlines()
+    assert lines[0].endswith(',"2024-11-01 09:30:00"')
+    assert lines[1].endswith(',""')
+
+
+def test_flush_by_size(engine):
+    """Test that a full batch is written in one COPY and merge"""
+    writer = AuctionWriter(engine=engine, batch_size=3, flush_interval=3600)
+
+    writer.add_many(make_auction(str(i)) for i in range(2))
+    engine.raw_connection.assert_not_called()
+
+    writer.add(make_auction("2"))
+    cursor = engine.raw_connection.return_value.cursor.return_value
+    assert cursor.copy_expert.call_args.args[0] == COPY_SQL
+    assert cursor.copy_expert.call_args.args[1].getvalue().count("\n") == 3
+    engine.raw_connection.return_value.commit.assert_called_once()
+    assert len(writer) == 0
+
+
+def test_flush_by_time(engine):
+    """Test that an elapsed flush interval writes a partial batch"""
+    writer = AuctionWriter(engine=engine, batch_size=1000, flush_interval=0)
+    writer.add(make_auction())
+    engine.raw_connection.assert_called_once()
+
+
+def test_buffer_deduplicates_auctions(engine):
+    """Test that repeated auctions in one batch keep the latest values"""
+    writer = AuctionWriter(engine=engine, batch_size=1000, flush_interval=3600)
+    writer.add(make_auction(current_bid=100.0))
+    writer.add(make_auction(current_bid=150.0))
+    assert len(writer) == 1
+
+    writer.flush()
+    cursor = engine.raw_connection.return_value.cursor.return_value
+    assert "150.0" in cursor.copy_expert.call_args.args[1].getvalue()
+
+
+def test_failed_flush_rolls_back(engine):
+    """Test that a failed merge rolls back and surfaces the error"""
+    cursor = engine.raw_connection.return_value.cursor.return_value
+    cursor.execute.side_effect = [None, RuntimeError("merge failed")]
+    writer = AuctionWriter(engine=engine)
+    writer.add(make_auction())
+
+    with pytest.raises(RuntimeError):
+        writer.flush()
+    engine.raw_connection.return_value.rollback.assert_called_once()
+    engine.raw_connection.return_value.close.assert_called_once()
+
+
+def test_snapshots_recorded_before_merge(engine):
+    """Test that snapshot rows are derived from the stage before the merge"""
+    writer = AuctionWriter(engine=engine)
+    writer.add(make_auction())
+    writer.flush()
+
+    cursor = engine.raw_connection.return_value.cursor.return_value
+    statements = [call.args[0] for call in cursor.execute.call_args_list]
+    snapshot = next(i for i, sql in enumerate(statements) if "INSERT INTO auction_snapshots" in sql)
+    merge = statements.index(MERGE_SQL)
+    assert snapshot < merge
+    assert any("PARTITION OF auction_snapshots" in sql for sql in statements[:snapshot])
+
+    # Partitions are only created once per writer
+    writer.add(make_auction(current_bid=3000.0))
+    writer.flush()
+    statements = [call.args[0] for call in cursor.execute.call_args_list]
+    assert sum("PARTITION OF" in sql for sql in statements) == 2
+
+
+def test_snapshot_sql_only_on_bid_changes():
+    """Test that snapshots compare only the tracked bid fields"""
+    assert "IS DISTINCT FROM" in SNAPSHOT_SQL
+    assert "title" not in SNAPSHOT_SQL
+    assert snapshot_partition_sql(date(2024, 12, 31)).endswith(
+        "FOR VALUES FROM ('2024-12-31') TO ('2025-01-01')"
+    )
+
+
+def test_snapshots_can_be_disabled(engine):
+    """Test writing without history"""
+    writer = AuctionWriter(engine=engine, record_snapshots=False)
+    writer.add(make_auction())
+    writer.flush()
+
+    cursor = engine.raw_connection.return_value.cursor.return_value
+    assert not any("auction_snapshots" in call.args[0] for call in cursor.execute.call_args_list)
+
+
+def test_add_many_reads_batches_columnwise(engine):
+    """Test an AuctionBatch is written with the same COPY rows as Auction objects"""
+    auctions = [make_auction(str(i), retail_value=0.0, shipping_cost=None if i % 2 else 12.5)
+                for i in range(5)]
+    writer = AuctionWriter(engine=engine, batch_size=1000, flush_interval=3600)
+    writer.add_many(AuctionBatch.from_auctions(auctions))
+    assert len(writer) == 5
+
+    writer.flush()
+    cursor = engine.raw_connection.return_value.cursor.return_value
+    assert cursor.copy_expert.call_args.args[1].getvalue() == to_copy_buffer(auctions).getvalue()
+
+
+@pytest.mark.asyncio
+async def test_async_writer_flushes_in_batches_and_on_close(engine):
+    """Test queued pages are written in full batches and the remainder on close"""
+    async with AsyncAuctionWriter(AuctionWriter(engine=engine, batch_size=4, flush_interval=3600)) as writer:
+        for page in range(3):
+            await writer.add_many([make_auction(f"{page}-{i}") for i in range(2)])
+        await asyncio.sleep(0.05)
+        cursor = engine.raw_connection.return_value.cursor.return_value
+        assert cursor.copy_expert.call_count == 1
+
+    lines = [call.args[1].getvalue().count("\n") for call in cursor.copy_expert.call_args_list]
+    assert lines == [4, 2]
+    assert writer.rows_written == 2
+
+
+@pytest.mark.asyncio
+async def test_async_writer_applies_backpressure(engine):
+    """Test producers wait while a slow flush has the queue full, without blocking the loop"""
+    release = threading.Event()
+    cursor = engine.raw_connection.return_value.cursor.return_value
+    cursor.copy_expert.side_effect = lambda *args: release.wait(5)
+    writer = AsyncAuctionWriter(AuctionWriter(engine=engine, batch_size=1, flush_interval=3600),
+                                max_pending=2)
+    await writer.start()
+
+    await writer.add_many([make_auction("0")])       # taken by the writer task, flush blocks
+    await asyncio.sleep(0.05)
+    await writer.add_many([make_auction("1")])
+    await writer.add_many([make_auction("2")])        # queue is now full
+    blocked = asyncio.create_task(writer.add_many([make_auction("3")]))
+    await asyncio.sleep(0.05)
+    assert not blocked.done()
+    assert writer.pending == 2
+
+    release.set()
+    await asyncio.wait_for(blocked, 5)
+    await writer.close()
+    assert cursor.copy_expert.call_count == 4
+
+
+@pytest.mark.asyncio
+async def test_async_writer_survives_failed_flush(engine):
+    """Test a failed flush keeps its rows and retries until they are written"""
+    cursor = engine.raw_connection.return_value.cursor.return_value
+    cursor.execute.side_effect = [RuntimeError("database is down")] + [None] * 20
+    copied = []
+    cursor.copy_expert.side_effect = lambda sql, buffer: copied.append(buffer.getvalue())
+    writer = AsyncAuctionWriter(AuctionWriter(engine=engine, batch_size=1, flush_interval=3600),
+                                retry_base=0.01)
+    async with writer:
+        await writer.add_many([make_auction("1")])
+        await asyncio.sleep(0.05)
+        await writer.add_many([make_auction("2")])
+
+    assert writer.failed_flushes == 1
+    assert engine.raw_connection.return_value.commit.call_count == 2
+    written = [line.split(",")[0] for buffer in copied for line in buffer.splitlines()]
+    assert written == ['"1"', '"2"']
+
+
+@pytest.mark.asyncio
+async def test_async_writer_surfaces_persistent_failures(engine):
+    """Test the error is raised after repeated failures and the rows stay buffered"""
+    cursor = engine.raw_connection.return_value.cursor.return_value
+    cursor.execute.side_effect = RuntimeError("database is down")
+    writer = AsyncAuctionWriter(AuctionWriter(engine=engine, batch_size=1, flush_interval=3600),
+                                max_flush_attempts=3, retry_base=0.001)
+    await writer.add_many([make_auction("1")])
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(RuntimeError, match="database is down"):
+        await writer.add_many([make_auction("2")])
+    with pytest.raises(RuntimeError, match="database is down"):
+        await writer.close()
+    assert writer.failed_flushes == 3
+    assert len(writer.writer) == 1